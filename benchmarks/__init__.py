@@ -0,0 +1,3 @@
+# offline benchmark suite for the curve construction and pricing hot paths
+# modules bench_*.py hold classes with `params`, `setup(param)` and `time_*(param)` methods (asv layout)
+# run with `python -m benchmarks`, see benchmarks/__main__.py
@@ -0,0 +1,130 @@
+import os
+import re
+import sys
+import json
+import time
+import timeit
+import inspect
+import argparse
+import platform
+import importlib
+
+import numpy as np
+
+import QuantLib as ql
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+
+def benchmark_modules():
+    names = sorted(name[:-3] for name in os.listdir(BENCHMARK_DIR) if re.fullmatch(r'bench_\w+\.py', name))
+    return [importlib.import_module('benchmarks.{}'.format(name)) for name in names]
+
+
+def benchmarks(pattern=None):
+    # (name, class, method name, param) for every time_* method and param, asv naming
+    for module in benchmark_modules():
+        short = module.__name__.split('.')[-1]
+        for class_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            for method in sorted(name for name in vars(cls) if name.startswith('time_')):
+                for param in getattr(cls, 'params', [None]):
+                    name = '{}.{}.{}({})'.format(short, class_name, method, param)
+                    if pattern is None or re.search(pattern, name):
+                        yield name, cls, method, param
+
+
+def measure(cls, method, param, repeat=3, min_time=0.2):
+    # best of `repeat` timings of a fresh setup, in seconds per call
+    instance = cls()
+    if hasattr(instance, 'setup'):
+        instance.setup(param)
+    call = getattr(instance, method)
+    timer = timeit.Timer(lambda: call(param))
+
+    # first call warms caches (schedules, kernels), then size the loop as timeit's autorange
+    start = time.perf_counter()
+    call(param)
+    elapsed = time.perf_counter() - start
+    number = max(1, int(min_time / elapsed)) if elapsed > 0 else 1000
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'quantlib': ql.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.3g}{}'.format(seconds / scale, unit)
+    return '{:.3g}ns'.format(seconds / 1e-9)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='time the curve and pricing hot paths on synthetic data')
+    parser.add_argument('pattern', nargs='?', help='regular expression selecting benchmark names')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline json to compare against')
+    parser.add_argument('--save', action='store_true', help='store these timings as the new baseline')
+    parser.add_argument('--threshold', type=float, default=2.0,
+                        help='slowdown ratio against the baseline reported as a regression')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per timing repeat')
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.baseline)
+    previous = baseline['results'] if baseline else {}
+    if baseline and baseline['environment'] != environment():
+        print('baseline recorded on {}, ratios are only indicative'.format(baseline['environment']))
+
+    results = {}
+    regressions = []
+    for name, cls, method, param in benchmarks(args.pattern):
+        seconds = measure(cls, method, param, args.repeat, args.min_time)
+        results[name] = seconds
+
+        line = '{:<60} {:>10}'.format(name, format_time(seconds))
+        if name in previous:
+            ratio = seconds / previous[name]
+            line += '  {:>10}  x{:.2f}'.format(format_time(previous[name]), ratio)
+            if ratio > args.threshold:
+                regressions.append(name)
+                line += '  REGRESSION'
+        print(line, flush=True)
+
+    if args.save:
+        # a filtered run only replaces the benchmarks it ran
+        save_baseline(args.baseline, dict(previous, **results))
+        print('baseline saved to {}'.format(args.baseline))
+    elif regressions:
+        print('{} benchmark(s) slower than {}x the baseline'.format(len(regressions), args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
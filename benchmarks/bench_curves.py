@@ -0,0 +1,97 @@
+import numpy as np
+
+import QuantLib as ql
+
+from quant_lib import swap_curve, cds_curve, curve
+from quant_lib.discount_kernel import CurveKernel
+from quant_lib.credit_kernel import HazardKernel
+from quant_lib.live_curve import LiveCurve
+
+from benchmarks.synthetic import TODAY, irs_quote, cds_quote, treasury_quote
+
+
+class SwapBootstrap():
+    # full bootstrap of the IRS curve against the number of quotes
+    params = [8, 16, 32, 48]
+
+    def setup(self, nodes):
+        self.quote = irs_quote(TODAY, nodes)
+
+    def time_bootstrap(self, nodes):
+        # curves are lazy, asking for the nodes forces the bootstrap
+        swap_curve.swap_curve(TODAY, self.quote).nodes()
+
+
+class LiveSwapRebootstrap():
+    # re-bootstrap after one quote moves, the path every ladder bucket takes
+    params = [8, 16, 32, 48]
+
+    def setup(self, nodes):
+        self.live = LiveCurve(swap_curve.swap_curve, TODAY, irs_quote(TODAY, nodes))
+        self.tenor = self.live.tenors[-1]
+        self.live.curve.nodes()
+
+    def time_bump(self, nodes):
+        with self.live.bumped(self.tenor):
+            self.live.curve.nodes()
+
+
+class CdsBootstrap():
+    # hazard curve bootstrap over a fixed discount curve
+    params = [4, 8, 12]
+
+    def setup(self, nodes):
+        self.quote = cds_quote(TODAY, nodes)
+        self.discount_curve = cds_curve.swap_curve(TODAY, irs_quote(TODAY, 24))
+        self.discount_curve.nodes()
+
+    def time_bootstrap(self, nodes):
+        cds_curve.cds_curve(TODAY, self.quote, self.discount_curve).nodes()
+
+
+class TreasuryBootstrap():
+    params = [6, 12, 24]
+
+    def setup(self, bonds):
+        self.quote = treasury_quote(TODAY, bonds)
+
+    def time_bootstrap(self, bonds):
+        curve.treasury_curve(TODAY, self.quote).nodes()
+
+
+class DiscountQuery():
+    # discount factors for a grid of dates: QuantLib one date at a time vs the NumPy kernel
+    params = [100, 10000]
+
+    def setup(self, size):
+        self.curve = swap_curve.swap_curve(TODAY, irs_quote(TODAY, 24))
+        self.curve.enableExtrapolation()
+        self.kernel = CurveKernel.from_curve(self.curve)
+        reference = self.curve.referenceDate().serialNumber()
+        self.serials = np.linspace(reference, reference + 365 * 30, size).astype(np.int64)
+        self.dates = [ql.Date(int(serial)) for serial in self.serials]
+
+    def time_quantlib(self, size):
+        [self.curve.discount(date) for date in self.dates]
+
+    def time_kernel(self, size):
+        self.kernel.discount(self.serials)
+
+
+class SurvivalQuery():
+    params = [100, 10000]
+
+    def setup(self, size):
+        discount_curve = cds_curve.swap_curve(TODAY, irs_quote(TODAY, 24))
+        self.curve = cds_curve.cds_curve(TODAY, cds_quote(TODAY, 11), discount_curve)
+        self.curve.enableExtrapolation()
+        self.kernel = HazardKernel.from_curve(self.curve)
+        reference = self.curve.referenceDate().serialNumber()
+        self.serials = np.linspace(reference, reference + 365 * 10, size).astype(np.int64)
+        self.dates = [ql.Date(int(serial)) for serial in self.serials]
+
+    def time_quantlib(self, size):
+        [self.curve.survivalProbability(date) for date in self.dates]
+
+    def time_kernel(self, size):
+        self.kernel.survival(self.serials)
@@ -0,0 +1,16 @@
+from quant_lib import swap_curve
+from quant_lib.exposure import SwapExposure
+
+from benchmarks.synthetic import TODAY, irs_quote, swap_trades
+
+
+class SwapExposureProfile():
+    # Hull-White paths and analytic revaluation of a 1000 swap netting set on the default grid
+    params = [1000, 5000]
+
+    def setup(self, paths):
+        curve = swap_curve.swap_curve(TODAY, irs_quote(TODAY, 24))
+        self.exposure = SwapExposure(swap_trades(1000), curve)
+
+    def time_profile(self, paths):
+        self.exposure.profile(paths)
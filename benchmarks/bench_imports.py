@@ -0,0 +1,12 @@
+from quant_lib.__main__ import CORE_MODULES, import_time
+
+
+class ImportTime():
+    # fresh interpreter importing the lean core vs a single curve module, as a pool worker or cron job does
+    params = ['core', 'swap_curve']
+
+    def setup(self, modules):
+        self.modules = CORE_MODULES if modules == 'core' else ['quant_lib.{}'.format(modules)]
+
+    def time_import(self, modules):
+        import_time(self.modules, repeat=1)
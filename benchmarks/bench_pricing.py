@@ -0,0 +1,93 @@
+import numpy as np
+
+import QuantLib as ql
+
+from quant_lib import swap_curve, cds_curve
+from quant_lib.irs_portfolio import SwapPortfolio
+from quant_lib.cds_portfolio import CdsPortfolio
+from quant_lib.live_curve import LiveCurve
+from quant_lib.black_scholes import black_scholes, implied_volatility
+
+from benchmarks.synthetic import TODAY, irs_quote, cds_quote, swap_trades, cds_trades
+
+
+class SwapPricing():
+    # notebook style (one book, index and engine per trade) against one shared book
+    params = [1, 10, 100, 1000]
+
+    def setup(self, size):
+        self.live = LiveCurve(swap_curve.swap_curve, TODAY, irs_quote(TODAY, 24))
+        self.trades = swap_trades(size)
+        self.portfolio = SwapPortfolio(self.trades, self.live.curve)
+        self.tenor = self.live.tenors[-1]
+
+    def time_single(self, size):
+        [SwapPortfolio([trade], self.live.curve).npv() for trade in self.trades]
+
+    def time_batched(self, size):
+        SwapPortfolio(self.trades, self.live.curve).npv()
+
+    def time_reprice(self, size):
+        # the book already exists, only the curve moved
+        with self.live.bumped(self.tenor):
+            self.portfolio.npv()
+
+
+class CdsPricing():
+    params = [1, 10, 100, 1000]
+
+    def setup(self, size):
+        self.discount_curve = cds_curve.swap_curve(TODAY, irs_quote(TODAY, 24))
+        self.live = LiveCurve(cds_curve.cds_curve, TODAY, cds_quote(TODAY, 11), self.discount_curve)
+        self.trades = cds_trades(size)
+        self.portfolio = CdsPortfolio(self.trades, self.live.curve, self.discount_curve)
+        self.tenor = self.live.tenors[-1]
+
+    def time_single(self, size):
+        [CdsPortfolio([trade], self.live.curve, self.discount_curve).npv() for trade in self.trades]
+
+    def time_batched(self, size):
+        CdsPortfolio(self.trades, self.live.curve, self.discount_curve).npv()
+
+    def time_reprice(self, size):
+        with self.live.bumped(self.tenor):
+            self.portfolio.npv()
+
+
+class OptionPricing():
+    # European options: one AnalyticEuropeanEngine per option as in the Black-Scholes notebook,
+    # against the vectorized formulas
+    params = [10, 1000]
+
+    def setup(self, size):
+        rng = np.random.default_rng(0)
+        self.strikes = rng.uniform(80, 120, size)
+        self.times = rng.uniform(0.1, 2.0, size)
+        self.vols = rng.uniform(0.1, 0.4, size)
+        self.prices = black_scholes(100.0, self.strikes, self.times, 0.01, 0.0, self.vols)['premium']
+
+        today = ql.Date(TODAY.day, TODAY.month, TODAY.year)
+        day_counter = ql.Actual365Fixed()
+        self.today = today
+        self.spot = ql.SimpleQuote(100.0)
+        self.rate = ql.YieldTermStructureHandle(ql.FlatForward(today, 0.01, day_counter))
+        self.dividend = ql.YieldTermStructureHandle(ql.FlatForward(today, 0.0, day_counter))
+        self.expiries = [today + int(round(t * 365)) for t in self.times]
+        self.day_counter = day_counter
+
+    def time_quantlib(self, size):
+        ql.Settings.instance().evaluationDate = self.today
+        for strike, expiry, vol in zip(self.strikes, self.expiries, self.vols):
+            volatility = ql.BlackVolTermStructureHandle(
+                ql.BlackConstantVol(self.today, ql.UnitedStates(), float(vol), self.day_counter))
+            process = ql.BlackScholesMertonProcess(ql.QuoteHandle(self.spot), self.dividend, self.rate, volatility)
+            option = ql.VanillaOption(ql.PlainVanillaPayoff(ql.Option.Call, float(strike)),
+                                      ql.EuropeanExercise(expiry))
+            option.setPricingEngine(ql.AnalyticEuropeanEngine(process))
+            option.NPV()
+
+    def time_vectorized(self, size):
+        black_scholes(100.0, self.strikes, self.times, 0.01, 0.0, self.vols)
+
+    def time_implied_volatility(self, size):
+        implied_volatility(self.prices, 100.0, self.strikes, self.times, 0.01, 0.0)
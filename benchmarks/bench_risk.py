@@ -0,0 +1,49 @@
+from quant_lib import swap_curve, cds_curve
+from quant_lib.risk import key_rate_ladder
+from quant_lib.cds_portfolio import cs01_ladder, CdsPortfolio
+from quant_lib.jacobian import jacobian_ladder
+
+from benchmarks.synthetic import TODAY, irs_quote, cds_quote, swap_trades, cds_trades
+
+
+class KeyRateLadder():
+    # trades x tenors ladder, one re-bootstrap per bucket whatever the book size
+    params = [10, 100, 500]
+
+    def setup(self, size):
+        self.quote = irs_quote(TODAY, 24)
+        self.trades = swap_trades(size)
+
+    def time_ladder(self, size):
+        key_rate_ladder(self.trades, swap_curve.swap_curve, TODAY, self.quote)
+
+
+class Cs01Ladder():
+    params = [10, 100, 500]
+
+    def setup(self, size):
+        self.quote = cds_quote(TODAY, 11)
+        self.discount_curve = cds_curve.swap_curve(TODAY, irs_quote(TODAY, 24))
+        self.trades = cds_trades(size)
+
+    def time_ladder(self, size):
+        cs01_ladder(self.trades, cds_curve.cds_curve, TODAY, self.quote, self.discount_curve)
+
+
+class JacobianLadder():
+    # the same ladders from one bootstrap and its Jacobian
+    params = [10, 100, 500]
+
+    def setup(self, size):
+        self.quote = irs_quote(TODAY, 24)
+        self.cds_quote = cds_quote(TODAY, 11)
+        self.discount_curve = cds_curve.swap_curve(TODAY, self.quote)
+        self.trades = swap_trades(size)
+        self.cds_trades = cds_trades(size)
+
+    def time_swap_ladder(self, size):
+        jacobian_ladder(self.trades, swap_curve.swap_curve, TODAY, self.quote)
+
+    def time_cds_ladder(self, size):
+        jacobian_ladder(self.cds_trades, cds_curve.cds_curve, TODAY, self.cds_quote, self.discount_curve,
+                        portfolio_class=CdsPortfolio)
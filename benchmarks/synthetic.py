@@ -0,0 +1,102 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+import QuantLib as ql
+
+
+# benchmarks run on synthetic market data only, nothing is read from disk or the network
+TODAY = datetime.date(2020, 10, 9)
+
+
+def _maturity(today, n, unit):
+    date = ql.UnitedStates().advance(ql.Date(today.day, today.month, today.year), ql.Period(n, unit))
+    return datetime.date(date.year(), date.month(), date.dayOfMonth())
+
+
+def _frame(rows, inst_type=True):
+    columns = ['Tenor', 'Maturity', 'InstType', 'Market.Mid'] if inst_type else ['Tenor', 'Maturity', 'Market.Mid']
+    frame = pd.DataFrame(rows, columns=columns)
+    frame['Maturity'] = pd.to_datetime(frame['Maturity'])
+    return frame.set_index('Tenor')
+
+
+def irs_quote(today=TODAY, nodes=24, seed=0):
+    # swap_data.xlsx layout (Tenor, Maturity, InstType, Market.Mid): CASH up to 12MO then yearly SWAPs
+    # rates in % on an upward sloping curve with a little noise
+    rng = np.random.default_rng(seed)
+    cash_months = [1, 3, 6, 12][:max(1, min(4, nodes // 6))]
+    swap_years = np.unique(np.round(np.geomspace(2, 50, nodes - len(cash_months))).astype(int))
+    years = 2
+    while len(swap_years) < nodes - len(cash_months):
+        # fill gaps left by rounding with the next unused year
+        years += 1
+        swap_years = np.unique(np.append(swap_years, years))
+
+    rows = []
+    for months in cash_months:
+        rate = 0.2 + 0.05 * months / 12 + rng.normal(0, 0.005)
+        rows.append(('{}MO'.format(months), _maturity(today, months, ql.Months), 'CASH', rate))
+    for n in swap_years[:nodes - len(cash_months)]:
+        rate = 0.2 + 0.9 * (1 - np.exp(-n / 10.0)) + rng.normal(0, 0.005)
+        rows.append(('{}Y'.format(n), _maturity(today, int(n), ql.Years), 'SWAP', rate))
+    return _frame(rows)
+
+
+def cds_quote(today=TODAY, nodes=8, seed=0):
+    # cds_data.xlsx ROKCDS layout (no InstType), spreads in bp
+    rng = np.random.default_rng(seed)
+    years = [0.5] + list(range(1, nodes))
+    rows = []
+    for n in years[:nodes]:
+        label, maturity = ('6MO', _maturity(today, 6, ql.Months)) if n == 0.5 else \
+            ('{}Y'.format(n), _maturity(today, n, ql.Years))
+        rows.append((label, maturity, 8.0 + 3.5 * n + rng.normal(0, 0.1)))
+    return _frame(rows, inst_type=False)
+
+
+def treasury_quote(today=TODAY, bonds=6, seed=0):
+    # curve.get_quote layout: index maturity, days, price (yield in %) and coupon (%)
+    # the first four rows are bills, as treasury_curve expects
+    rng = np.random.default_rng(seed)
+    bill_days = [30, 90, 180, 360]
+    bond_days = np.round(np.linspace(730, 10950, bonds)).astype(int)
+    rows = []
+    for days in bill_days:
+        rows.append((today + datetime.timedelta(days=int(days)), int(days), 3.0 + rng.normal(0, 0.02), 0.0))
+    for days in bond_days:
+        coupon = np.round((3.2 + 0.3 * days / 10950) * 8) / 8
+        rows.append((today + datetime.timedelta(days=int(days)), int(days), coupon, coupon))
+    return pd.DataFrame(rows, columns=['maturity', 'days', 'price', 'coupon']).set_index('maturity')
+
+
+def swap_trades(n, today=TODAY, seed=0):
+    # IRS book in the trade layout of irs_portfolio.SwapPortfolio, starting spot so no fixing is needed
+    rng = np.random.default_rng(seed)
+    spot = _maturity(today, 2, ql.Days)
+    return [
+        dict(
+            pricing_date=spot,
+            maturity_date=_maturity(spot, int(rng.integers(1, 30)), ql.Years),
+            irs_rate=float(rng.uniform(0.002, 0.012)),
+            notional=float(rng.integers(1, 100)) * 1e6,
+            position='long' if rng.random() < 0.5 else 'short',
+            spread=0.0,
+        )
+        for _ in range(n)
+    ]
+
+
+def cds_trades(n, today=TODAY, seed=0):
+    # CDS book in the trade layout of cds_portfolio.CdsPortfolio
+    rng = np.random.default_rng(seed)
+    return [
+        dict(
+            pricing_date=today,
+            maturity_date=_maturity(today, int(rng.integers(1, 10)), ql.Years),
+            spread=float(rng.uniform(10, 60)),
+            notional=float(rng.integers(1, 50)) * 1e6,
+            position='long' if rng.random() < 0.5 else 'short',
+        )
+        for _ in range(n)
+    ]
@@ -0,0 +1,38 @@
+import importlib
+
+
+# the package import stays cheap: submodules (and QuantLib behind them) load on first access,
+# plotting lives in quant_lib.report and only imports matplotlib when drawing
+__all__ = [
+    'black_scholes',
+    'bond_book',
+    'cds_curve',
+    'cds_portfolio',
+    'credit_kernel',
+    'curve',
+    'curve_cache',
+    'curve_history',
+    'discount_kernel',
+    'eod',
+    'evaluation',
+    'exposure',
+    'fx_swap_curve',
+    'irs_portfolio',
+    'jacobian',
+    'live_curve',
+    'market_data',
+    'page_fetch',
+    'profiling',
+    'quote',
+    'report',
+    'risk',
+    'scenario',
+    'server',
+    'swap_curve',
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module('quant_lib.{}'.format(name))
+    raise AttributeError("module 'quant_lib' has no attribute {}".format(name))
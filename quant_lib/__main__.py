@@ -0,0 +1,187 @@
+import os
+import sys
+import argparse
+import datetime
+import contextlib
+import subprocess
+
+
+# modules a batch job or pool worker needs: loaders, curve builders, pricers and risk
+CORE_MODULES = [
+    'quant_lib.swap_curve',
+    'quant_lib.cds_curve',
+    'quant_lib.fx_swap_curve',
+    'quant_lib.curve',
+    'quant_lib.irs_portfolio',
+    'quant_lib.cds_portfolio',
+    'quant_lib.risk',
+    'quant_lib.eod',
+]
+
+# none of these may be pulled in by importing the core
+HEAVY_MODULES = ['pandas', 'matplotlib', 'seaborn', 'xlwings', 'bs4', 'requests']
+
+# seconds for a fresh interpreter to import the core (QuantLib and NumPy included)
+# measured 0.20-0.23s, pandas alone would add about 0.25s
+IMPORT_BUDGET = 0.35
+
+CURVES = ['swap', 'usdirs', 'krwccs', 'cds']
+
+
+def _date(text):
+    return datetime.date.fromisoformat(text)
+
+
+def node_table(curve):
+    # one row per curve node: zero rate and discount factor, or hazard rate and survival probability
+    import pandas as pd
+    import QuantLib as ql
+
+    nodes = curve.nodes()
+    dates = [datetime.date(date.year(), date.month(), date.dayOfMonth()) for date, _ in nodes]
+    if isinstance(curve, ql.DefaultProbabilityTermStructure):
+        columns = {
+            'hazard_rate': [value for _, value in nodes],
+            'survival_prob': [curve.survivalProbability(date) for date, _ in nodes],
+        }
+    else:
+        columns = {
+            'zero_rate': [value * 100 for _, value in nodes],
+            'discount_factor': [curve.discount(date) for date, _ in nodes],
+        }
+    return pd.DataFrame(columns, index=pd.Index(dates, name='date'))
+
+
+def build_curve(args):
+    if args.source:
+        # the curve modules read the market data directory when first imported
+        os.environ['QUANT_LIB_MARKET_DATA'] = os.path.abspath(args.source)
+
+    from quant_lib import profiling
+    from quant_lib.evaluation import evaluation_date
+    from quant_lib.curve_history import CURVE_BUILDERS
+
+    with profiling.tracing(args.trace) if args.trace else contextlib.nullcontext():
+        with evaluation_date(args.date):
+            table = node_table(CURVE_BUILDERS[args.curve](args.date))
+
+    if args.output:
+        table.to_csv(args.output)
+    else:
+        print(table.to_string())
+
+    if args.plot:
+        from quant_lib import report
+        column = table.columns[0]
+        report.plot_series(table[column], '{} {} curve {}'.format(args.curve, column, args.date))
+        report.show()
+    return 0
+
+
+def run_eod(args):
+    if args.source:
+        os.environ['QUANT_LIB_MARKET_DATA'] = os.path.abspath(args.source)
+
+    from quant_lib import eod, profiling
+
+    def progress(chunk, trades, rate):
+        print('chunk {} done: {} trades, {:.0f} trades/s'.format(chunk, trades, rate))
+
+    with profiling.tracing(args.trace) if args.trace else contextlib.nullcontext():
+        report = eod.run_eod(args.trades, args.date, args.output, args.chunk_size, args.format, progress=progress)
+    print('{trades} trades in {seconds:.1f}s ({trades_per_second:.0f} trades/s), '
+          '{resumed_chunks} of {chunks} chunks from the checkpoint'.format(**report))
+    return 0
+
+
+def run_server(args):
+    if args.source:
+        os.environ['QUANT_LIB_MARKET_DATA'] = os.path.abspath(args.source)
+
+    import asyncio
+    from quant_lib import server
+
+    print('pricing server for {} on {}'.format(args.date, args.socket or '{}:{}'.format(args.host, args.port)))
+    asyncio.run(server.serve(args.date, args.host, args.port, args.socket, fx_spot=args.fx_spot,
+                             max_workers=args.workers, batch_window=args.batch_window / 1e3))
+    return 0
+
+
+def import_time(modules=None, repeat=3):
+    # best wall time of a fresh interpreter importing `modules`, and the heavy modules it loaded
+    modules = modules or CORE_MODULES
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "{}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(elapsed, ','.join(m for m in {!r} if m in sys.modules))\n"
+    ).format('\n'.join('import {}'.format(module) for module in modules), HEAVY_MODULES)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    best, heavy = None, []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', script], env=env, check=True,
+                                capture_output=True, text=True).stdout.split()
+        seconds = float(output[0])
+        heavy = output[1].split(',') if len(output) > 1 else []
+        best = seconds if best is None else min(best, seconds)
+    return best, heavy
+
+
+def check_import_time(args):
+    seconds, heavy = import_time(args.modules, args.repeat)
+    print('import of {} modules: {:.3f}s (budget {:.3f}s)'.format(len(args.modules or CORE_MODULES),
+                                                                  seconds, args.budget))
+    if heavy:
+        print('core imports pulled in: {}'.format(', '.join(heavy)))
+    return 0 if seconds <= args.budget and not heavy else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m quant_lib')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build-curve', help='bootstrap one curve from the market data workbooks')
+    build.add_argument('--date', type=_date, required=True, help='curve date, YYYY-MM-DD')
+    build.add_argument('--curve', choices=CURVES, default='swap')
+    build.add_argument('--source', help='market data directory holding the workbooks')
+    build.add_argument('--output', help='write the node table to this CSV instead of printing it')
+    build.add_argument('--trace', help='write a profiling trace (.json Chrome trace, else JSON lines)')
+    build.add_argument('--plot', action='store_true')
+    build.set_defaults(handler=build_curve)
+
+    batch = commands.add_parser('eod', help='price and risk a trade file chunk by chunk, resuming a failed run')
+    batch.add_argument('--date', type=_date, required=True, help='valuation date, YYYY-MM-DD')
+    batch.add_argument('--trades', required=True, help='trade file, .csv or .parquet')
+    batch.add_argument('--output', required=True, help='result directory, also holds the checkpoint')
+    batch.add_argument('--chunk-size', type=int, default=10000)
+    batch.add_argument('--format', choices=['parquet', 'csv'], help='result parts, parquet if pyarrow is installed')
+    batch.add_argument('--source', help='market data directory holding the workbooks')
+    batch.add_argument('--trace', help='write a profiling trace (.json Chrome trace, else JSON lines)')
+    batch.set_defaults(handler=run_eod)
+
+    serve = commands.add_parser('serve', help='keep the curves warm and price JSON-line requests')
+    serve.add_argument('--date', type=_date, required=True, help='curve date, YYYY-MM-DD')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--socket', help='listen on this Unix socket instead of TCP')
+    serve.add_argument('--workers', type=int, default=2, help='pricing processes, 0 prices in a thread')
+    serve.add_argument('--batch-window', type=float, default=1.0, help='milliseconds to coalesce requests')
+    serve.add_argument('--fx-spot', type=float, help='KRW per USD for FX forwards and CCS')
+    serve.add_argument('--source', help='market data directory holding the workbooks')
+    serve.set_defaults(handler=run_server)
+
+    imports = commands.add_parser('import-time', help='check the core import time against its budget')
+    imports.add_argument('--budget', type=float, default=IMPORT_BUDGET, help='seconds')
+    imports.add_argument('--repeat', type=int, default=3)
+    imports.add_argument('--modules', nargs='+', help='modules to import instead of the core')
+    imports.set_defaults(handler=check_import_time)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
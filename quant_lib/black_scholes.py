@@ -0,0 +1,163 @@
+import numpy as np
+
+import QuantLib as ql
+
+from quant_lib.discount_kernel import to_serials, year_fractions
+
+
+SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+# QuantLib's default bounds for implied volatility
+MIN_VOL = 1.0e-7
+MAX_VOL = 4.0
+
+
+def norm_pdf(x):
+    x = np.asarray(x, dtype=float)
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+def norm_cdf(x):
+    # Hart's double precision rational approximation (as in West, 2005), no scipy needed
+    x = np.asarray(x, dtype=float)
+    a = np.abs(x)
+    exponential = np.exp(-0.5 * a * a)
+
+    numerator = 3.52624965998911e-02 * a + 0.700383064443688
+    numerator = numerator * a + 6.37396220353165
+    numerator = numerator * a + 33.912866078383
+    numerator = numerator * a + 112.079291497871
+    numerator = numerator * a + 221.213596169931
+    numerator = numerator * a + 220.206867912376
+    denominator = 8.83883476483184e-02 * a + 1.75566716318264
+    denominator = denominator * a + 16.064177579207
+    denominator = denominator * a + 86.7807322029461
+    denominator = denominator * a + 296.564248779674
+    denominator = denominator * a + 637.333633378831
+    denominator = denominator * a + 793.826512519948
+    denominator = denominator * a + 440.413735824752
+    # continued fraction in the tails, infinite arguments (expired options) fall through to 0 or 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        central = exponential * numerator / denominator
+        fraction = a + 0.65
+        fraction = a + 4.0 / fraction
+        fraction = a + 3.0 / fraction
+        fraction = a + 2.0 / fraction
+        fraction = a + 1.0 / fraction
+        tail = exponential / fraction / SQRT_2PI
+
+    lower = np.where(a < 7.07106781186547, central, np.where(a > 37.0, 0.0, tail))
+    return np.where(x > 0.0, 1.0 - lower, lower)
+
+
+def option_times(valuation_date, expiry_dates, day_counter=None):
+    # year fractions to expiry, Actual/Actual as in the Black-Scholes notebook
+    day_counter = day_counter or ql.ActualActual()
+    return year_fractions(day_counter, valuation_date, to_serials(expiry_dates))
+
+
+def _sign(option_type):
+    # ql.Option.Call (1) / ql.Option.Put (-1), or 'call' / 'put'
+    option_type = np.asarray(option_type)
+    if option_type.dtype.kind in 'US':
+        return np.where(np.char.lower(option_type.astype(str)) == 'call', 1.0, -1.0)
+    return np.where(option_type == ql.Option.Call, 1.0, -1.0)
+
+
+def black_scholes(spot, strike, t, rate, dividend, vol, option_type=ql.Option.Call):
+    # premium and greeks of European options, every input broadcasts (e.g. strikes[:, None] x t[None, :])
+    # rate and dividend are continuous, units follow AnalyticEuropeanEngine:
+    # vega and rho per 1.0 of vol and rate, theta per year
+    spot, strike, t, rate, dividend, vol = np.broadcast_arrays(
+        *[np.asarray(value, dtype=float) for value in (spot, strike, t, rate, dividend, vol)]
+    )
+    phi = _sign(option_type)
+
+    discount = np.exp(-rate * t)
+    dividend_discount = np.exp(-dividend * t)
+    forward = spot * dividend_discount / discount
+
+    sqrt_t = np.sqrt(t)
+    stdev = vol * sqrt_t
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = np.log(forward / strike) / stdev + 0.5 * stdev
+        d2 = d1 - stdev
+    # expired or zero vol options are worth their discounted forward intrinsic value
+    dead = stdev <= 0.0
+    itm = np.where(phi * (forward - strike) > 0.0, np.inf, -np.inf)
+    d1 = np.where(dead, itm, d1)
+    d2 = np.where(dead, itm, d2)
+
+    n1 = norm_cdf(phi * d1)
+    n2 = norm_cdf(phi * d2)
+    density = np.where(dead, 0.0, norm_pdf(d1))
+
+    premium = phi * (spot * dividend_discount * n1 - strike * discount * n2)
+    delta = phi * dividend_discount * n1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gamma = np.where(dead, 0.0, dividend_discount * density / (spot * stdev))
+        decay = np.where(dead, 0.0, spot * dividend_discount * density * vol / (2.0 * sqrt_t))
+    vega = spot * dividend_discount * density * sqrt_t
+    theta = -decay + phi * (dividend * spot * dividend_discount * n1 - rate * strike * discount * n2)
+    rho = phi * strike * t * discount * n2
+
+    return {
+        'premium': premium,
+        'delta': delta,
+        'gamma': gamma,
+        'vega': vega,
+        'theta': theta,
+        'rho': rho,
+    }
+
+
+def implied_volatility(price, spot, strike, t, rate, dividend, option_type=ql.Option.Call,
+                       accuracy=1.0e-10, max_iterations=100, min_vol=MIN_VOL, max_vol=MAX_VOL):
+    # safeguarded Newton on the whole batch: a Newton step that leaves the bracket is replaced
+    # by bisection, so every quote converges; prices outside the no-arbitrage bounds give nan
+    price, spot, strike, t, rate, dividend, phi = np.broadcast_arrays(
+        *[np.asarray(value, dtype=float) for value in (price, spot, strike, t, rate, dividend)],
+        _sign(option_type)
+    )
+    # solved on flat copies, so scalars and any shape go through the same masked updates
+    shape = price.shape
+    price, spot, strike, t, rate, dividend, phi = [
+        value.ravel() for value in (price, spot, strike, t, rate, dividend, phi)
+    ]
+
+    discount = np.exp(-rate * t)
+    dividend_discount = np.exp(-dividend * t)
+    intrinsic = np.maximum(phi * (spot * dividend_discount - strike * discount), 0.0)
+    upper = np.where(phi > 0.0, spot * dividend_discount, strike * discount)
+    valid = (price > intrinsic) & (price < upper) & (t > 0.0)
+
+    low = np.full(price.shape, float(min_vol))
+    high = np.full(price.shape, float(max_vol))
+    # Brenner-Subrahmanyam guess, exact at the money forward
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol = np.clip(price * SQRT_2PI / (spot * dividend_discount * np.sqrt(t)), min_vol, max_vol)
+    vol = np.where(valid, vol, np.nan)
+    active = valid.copy()
+
+    for _ in range(max_iterations):
+        if not active.any():
+            break
+        result = black_scholes(spot[active], strike[active], t[active], rate[active], dividend[active],
+                               vol[active], phi[active])
+        diff = result['premium'] - price[active]
+
+        # premium increases with vol, so the sign of diff narrows the bracket
+        sigma = vol[active]
+        low[active] = np.where(diff < 0.0, sigma, low[active])
+        high[active] = np.where(diff > 0.0, sigma, high[active])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = sigma - diff / result['vega']
+        inside = (newton > low[active]) & (newton < high[active])
+        vol[active] = np.where(inside, newton, 0.5 * (low[active] + high[active]))
+
+        done = (np.abs(diff) < accuracy) | (high[active] - low[active] < accuracy * 1.0e-3)
+        vol[active] = np.where(done, sigma, vol[active])
+        active[active] = ~done
+
+    return vol.reshape(shape)[()]
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+import QuantLib as ql
+
+from quant_lib.irs_portfolio import schedule, to_ql_date, trade_rows
+from quant_lib.discount_kernel import CurveKernel, to_serials, period_year_fractions
+
+
+class BondBook():
+    # fixed-rate bonds (conventions of the treasury notebooks) held as padded cashflow tables
+    # (bonds x cashflows), QuantLib only builds each bond's cashflows once
+    # bonds need issue_date, maturity_date and coupon (decimal), face_value is optional
+    def __init__(self, bonds, settlement_days=1, face_value=100):
+        self.tenor = ql.Period(ql.Semiannual)
+        self.calendar = ql.UnitedStates()
+        self.convention = ql.ModifiedFollowing
+        self.day_counter = ql.ActualActual()
+        self.settlement_days = settlement_days
+        self.face_value = face_value
+
+        self.bonds = trade_rows(bonds)
+        self._tables([self._cashflows(bond) for bond in self.bonds])
+
+    def __len__(self):
+        return len(self.bonds)
+
+    def settlement_dates(self, today):
+        # as ql.Bond.settlementDate, the same for every bond of the book
+        today = to_ql_date(today)
+        settlement = self.calendar.advance(today, self.settlement_days, ql.Days).serialNumber()
+        return np.full(len(self), settlement, dtype=np.int64)
+
+    def accrued(self, today):
+        # accrued interest per 100 face
+        settlement = self.settlement_dates(today)[:, None]
+        accruing = self.coupon_flags & (self.accrual_starts < settlement) & (self.payment_dates > settlement)
+        fractions = period_year_fractions(self.day_counter, self.accrual_starts,
+                                          np.minimum(settlement, self.accrual_ends))
+        accrued = np.sum(np.where(accruing, self.coupons[:, None] * fractions, 0.0), axis=1)
+        return accrued * 100.0
+
+    def dirty_price(self, curve, today=None):
+        # curve (or CurveKernel) settlement value per 100 face, as DiscountingBondEngine
+        kernel = curve if isinstance(curve, CurveKernel) else CurveKernel.from_curve(curve)
+        today = kernel.reference_date if today is None else today
+        settlement = self.settlement_dates(today)
+
+        alive = self.payment_dates > settlement[:, None]
+        discounts = kernel.discount(self.payment_dates)
+        values = np.sum(np.where(alive, self.amounts * discounts, 0.0), axis=1) / kernel.discount(settlement)
+        return values * 100.0 / self.face_values
+
+    def clean_price(self, curve, today=None):
+        kernel = curve if isinstance(curve, CurveKernel) else CurveKernel.from_curve(curve)
+        today = kernel.reference_date if today is None else today
+        return self.dirty_price(kernel, today) - self.accrued(today)
+
+    def npv(self, curve):
+        # discounted to the curve reference date, as ql.Bond.NPV
+        kernel = curve if isinstance(curve, CurveKernel) else CurveKernel.from_curve(curve)
+        alive = self.payment_dates > int(to_serials(kernel.reference_date))
+        return np.sum(np.where(alive, self.amounts * kernel.discount(self.payment_dates), 0.0), axis=1)
+
+    def yield_to_maturity(self, clean_prices, today, compounding=ql.Compounded, frequency=ql.Semiannual,
+                          accuracy=1.0e-10, max_iterations=100):
+        # bond-equivalent yields for the whole book, as ql.Bond.bondYield
+        # safeguarded Newton: a step that leaves the bracket is replaced by bisection
+        target = (np.asarray(clean_prices, dtype=float) + self.accrued(today)) * self.face_values / 100.0
+        times, alive = self._yield_times(today)
+
+        low = np.full(len(self), -0.99 * (frequency if compounding == ql.Compounded else 1.0))
+        high = np.full(len(self), 1.0)
+        ytm = np.clip(self.coupons, low, high)
+        active = np.ones(len(self), dtype=bool)
+
+        for _ in range(max_iterations):
+            if not active.any():
+                break
+            price, slope, _ = self._yield_value(ytm, times, alive, compounding, frequency, active)
+            diff = price - target[active]
+
+            # price decreases with yield
+            rate = ytm[active]
+            low[active] = np.where(diff > 0.0, rate, low[active])
+            high[active] = np.where(diff < 0.0, rate, high[active])
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                newton = rate - diff / slope
+            inside = (newton > low[active]) & (newton < high[active])
+            ytm[active] = np.where(inside, newton, 0.5 * (low[active] + high[active]))
+
+            done = (np.abs(diff) < accuracy) | (high[active] - low[active] < accuracy)
+            ytm[active] = np.where(done, rate, ytm[active])
+            active[active] = ~done
+
+        return ytm
+
+    def duration(self, ytm, today, compounding=ql.Compounded, frequency=ql.Semiannual):
+        # modified duration, as ql.BondFunctions.duration with the default Duration.Modified
+        times, alive = self._yield_times(today)
+        price, slope, _ = self._yield_value(np.asarray(ytm, dtype=float), times, alive, compounding, frequency)
+        return -slope / price
+
+    def convexity(self, ytm, today, compounding=ql.Compounded, frequency=ql.Semiannual):
+        times, alive = self._yield_times(today)
+        price, _, curvature = self._yield_value(np.asarray(ytm, dtype=float), times, alive, compounding, frequency)
+        return curvature / price
+
+    def analytics(self, curve, today=None):
+        # curve prices and the yield measures implied by them, one row per bond
+        kernel = curve if isinstance(curve, CurveKernel) else CurveKernel.from_curve(curve)
+        today = kernel.reference_date if today is None else today
+        clean = self.clean_price(kernel, today)
+        ytm = self.yield_to_maturity(clean, today)
+        return pd.DataFrame({
+            'clean_price': clean,
+            'dirty_price': self.dirty_price(kernel, today),
+            'accrued': self.accrued(today),
+            'ytm': ytm,
+            'duration': self.duration(ytm, today),
+            'convexity': self.convexity(ytm, today),
+        })
+
+    def _yield_times(self, today):
+        # QuantLib discounts yield cashflows step by step from the settlement date
+        settlement = self.settlement_dates(today)[:, None]
+        alive = self.payment_dates > settlement
+        previous = np.concatenate([settlement, self.payment_dates[:, :-1]], axis=1)
+        steps = period_year_fractions(self.day_counter, np.maximum(previous, settlement), self.payment_dates)
+        return np.cumsum(np.where(alive, steps, 0.0), axis=1), alive
+
+    def _yield_value(self, ytm, times, alive, compounding, frequency, rows=slice(None)):
+        # price, first and second derivative in yield of the live cashflows
+        rate = ytm[rows][:, None]
+        times, amounts = times[rows], np.where(alive[rows], self.amounts[rows], 0.0)
+        if compounding == ql.Compounded:
+            base = 1.0 + rate / frequency
+            discounts = base ** (-frequency * times)
+            slopes = -times * discounts / base
+            curvatures = times * (times + 1.0 / frequency) * discounts / base ** 2
+        elif compounding == ql.Continuous:
+            discounts = np.exp(-rate * times)
+            slopes = -times * discounts
+            curvatures = times ** 2 * discounts
+        else:
+            raise ValueError("unsupported compounding {}".format(compounding))
+        return (
+            np.sum(amounts * discounts, axis=1),
+            np.sum(amounts * slopes, axis=1),
+            np.sum(amounts * curvatures, axis=1)
+        )
+
+    def _cashflows(self, bond):
+        issue_date = to_ql_date(bond['issue_date'])
+        maturity_date = to_ql_date(bond['maturity_date'])
+        face_value = bond.get('face_value', self.face_value)
+
+        bondSchedule = schedule(issue_date, maturity_date, self.tenor, self.calendar, self.convention)
+        fixedRateBond = ql.FixedRateBond(self.settlement_days, face_value, bondSchedule,
+                                         [bond['coupon']], self.day_counter)
+
+        rows = []
+        for cf in fixedRateBond.cashflows():
+            coupon = ql.as_fixed_rate_coupon(cf)
+            if coupon is None:
+                # redemption
+                rows.append((cf.date().serialNumber(), cf.amount(), cf.date().serialNumber(),
+                             cf.date().serialNumber(), False))
+            else:
+                rows.append((cf.date().serialNumber(), cf.amount(), coupon.accrualStartDate().serialNumber(),
+                             coupon.accrualEndDate().serialNumber(), True))
+        return face_value, bond['coupon'], rows
+
+    def _tables(self, cashflows):
+        width = max(len(rows) for _, _, rows in cashflows) if cashflows else 0
+        shape = (len(cashflows), width)
+
+        self.face_values = np.array([face for face, _, _ in cashflows], dtype=float)
+        self.coupons = np.array([coupon for _, coupon, _ in cashflows], dtype=float)
+
+        # padding repeats the last payment date with a zero amount, so it never contributes
+        self.payment_dates = np.zeros(shape, dtype=np.int64)
+        self.amounts = np.zeros(shape)
+        self.accrual_starts = np.zeros(shape, dtype=np.int64)
+        self.accrual_ends = np.zeros(shape, dtype=np.int64)
+        self.coupon_flags = np.zeros(shape, dtype=bool)
+        for i, (_, _, rows) in enumerate(cashflows):
+            payment, amount, start, end, flag = (np.array(column) for column in zip(*rows))
+            n = len(rows)
+            self.payment_dates[i, :n], self.payment_dates[i, n:] = payment, payment[-1]
+            self.accrual_starts[i, :n], self.accrual_starts[i, n:] = start, payment[-1]
+            self.accrual_ends[i, :n], self.accrual_ends[i, n:] = end, payment[-1]
+            self.amounts[i, :n] = amount
+            self.coupon_flags[i, :n] = flag
+
+
+def bond_analytics(bonds, curve, today=None):
+    return BondBook(bonds).analytics(curve, today)
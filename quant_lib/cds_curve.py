@@ -1,41 +1,45 @@
 import os
-import datetime
-import numpy as np
-import pandas as pd
-
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 import QuantLib as ql
 
+from quant_lib.market_data import MARKET_DATA_DIR, read_sheet, sheet_names
+from quant_lib.quote import preprocess_quote, as_quote_record, simple_quote, tenor_period
+from quant_lib.curve_cache import CurveRegistry
+from quant_lib.credit_kernel import probability_surface
+from quant_lib.evaluation import curve_reference
+from quant_lib.profiling import traced, bootstrapped
+from quant_lib import report
 
-def get_irs_quote(today):
-    quote = pd.read_excel(os.path.join("/mnt/c/workspace/project_FICC_Quant/market_data/cds_data.xlsx"),index_col='Tenor',sheet_name='USDIRS')
-    # pre-processing dataframe
-    quote['DaysToMaturity'] = np.nan
-    quote['Maturity'] = pd.to_datetime(quote['Maturity']).dt.date
 
-    for tenor in quote.index:
-        quote.loc[tenor, 'DaysToMaturity'] = (quote.loc[tenor, 'Maturity'] - today).days
-    return quote
+# conventions of the CDS helpers, the Jacobian reprices the helpers with the same ones
+CDS_CALENDAR = ql.UnitedStates()
+CDS_CONVENTION = ql.ModifiedFollowing
+RECOVERY_RATE = 0.4
 
-def get_cds_quote(today):
-    quote = pd.read_excel(os.path.join("/mnt/c/workspace/project_FICC_Quant/market_data/cds_data.xlsx"),index_col='Tenor',sheet_name='ROKCDS')
+
+@traced
+def get_irs_quote(today):
+    quote = read_sheet(os.path.join(MARKET_DATA_DIR, "cds_data.xlsx"), index_col='Tenor', sheet_name='USDIRS')
     # pre-processing dataframe
-    quote['DaysToMaturity'] = np.nan
-    quote['Maturity'] = pd.to_datetime(quote['Maturity']).dt.date
+    return preprocess_quote(quote, today)
 
-    for tenor in quote.index:
-        quote.loc[tenor, 'DaysToMaturity'] = (quote.loc[tenor, 'Maturity'] - today).days
-    return quote
+@traced
+def get_cds_quote(today, name='ROKCDS'):
+    if name not in cds_names():
+        raise KeyError("no CDS quotes for {} in cds_data.xlsx".format(name))
+    quote = read_sheet(os.path.join(MARKET_DATA_DIR, "cds_data.xlsx"), index_col='Tenor', sheet_name=name)
+    # pre-processing dataframe
+    return preprocess_quote(quote, today)
 
 # construct IRS curve
-def swap_curve(today, quote):
+@traced
+def swap_curve(today, quote, quotes=None, floating=False, helper_list=None):
 
-    # divide dataframe into 3 parts
-    depo = quote[quote['InstType'] == 'CASH']
-    futures = quote[quote['InstType'] == 'FUTURES']
-    swap = quote[quote['InstType'] == 'SWAP']
+    # divide quotes into 3 parts
+    quote = as_quote_record(quote, today)
+    depo = quote.select('CASH')
+    futures = quote.select('FUTURES')
+    swap = quote.select('SWAP')
 
     # Set evaluation date
     todays_date = ql.Date(today.day, today.month, today.year)
@@ -53,7 +57,7 @@ def swap_curve(today, quote):
     # 1_Deposit rate helper
     depositHelpers = [
         ql.DepositRateHelper(
-            ql.QuoteHandle(ql.SimpleQuote(rate/100)),
+            ql.QuoteHandle(simple_quote(quotes, tenor, rate/100)),
             ql.Period(int(day), ql.Days),
             settlementDays,
             calendar,
@@ -61,20 +65,14 @@ def swap_curve(today, quote):
             False,
             dayCounter
         )
-        for day, rate in zip(depo['DaysToMaturity'], depo['Market.Mid'])
+        for tenor, day, rate in zip(depo.tenors, depo.days, depo.mids)
     ]
 
     # 2_ Futures rate helper
     futuresHelpers = []
-    for i, price in enumerate(futures['Market.Mid']):
-        iborStartDate = ql.Date(
-            futures['Maturity'][i].day,
-            futures['Maturity'][i].month,
-            futures['Maturity'][i].year
-        )
-        
-        futuresHelpers = ql.FuturesRateHelper(
-            ql.QuoteHandle(ql.SimpleQuote(price)),
+    for tenor, iborStartDate, price in zip(futures.tenors, futures.maturity_dates(), futures.mids):
+        futuresHelper = ql.FuturesRateHelper(
+            ql.QuoteHandle(simple_quote(quotes, tenor, price)),
             iborStartDate,
             3,
             calendar,
@@ -82,11 +80,11 @@ def swap_curve(today, quote):
             False,
             dayCounter
         )
-        futuresHelpers.append(futuresHelpers)
+        futuresHelpers.append(futuresHelper)
 
     # 3_ Swap rate helper
     swapHelpers = [ql.SwapRateHelper(
-        ql.QuoteHandle(ql.SimpleQuote(rate/100)),
+        ql.QuoteHandle(simple_quote(quotes, tenor, rate/100)),
         ql.Period(int(day), ql.Days),
         calendar,
         frequency,
@@ -94,44 +92,43 @@ def swap_curve(today, quote):
         dayCounter,
         ql.Euribor3M()
         )
-        for day, rate in zip(swap['DaysToMaturity'], swap['Market.Mid'])
+        for tenor, day, rate in zip(swap.tenors, swap.days, swap.mids)
     ]
 
     # Combine 1_2_3 with Piece wise linear zero method
     # Curve construction
     helpers = depositHelpers + futuresHelpers + swapHelpers
-    depoFuturesSwapCurve = ql.PiecewiseLinearZero(todays_date, helpers, dayCounter)
+    if helper_list is not None:
+        helper_list.extend(helpers)
+    depoFuturesSwapCurve = ql.PiecewiseLinearZero(*curve_reference(todays_date, floating), helpers, dayCounter)
+
+    return bootstrapped(depoFuturesSwapCurve, 'cds_curve.swap_curve', helpers=len(helpers))
 
-    return depoFuturesSwapCurve
+@traced
+def cds_curve(today, quote, discount_curve, quotes=None, floating=False, helper_list=None):
+    quote = as_quote_record(quote, today)
 
-def cds_curve(today, quote, discount_curve):
     # Set Evaluation Date
     todays_date = ql.Date(today.day, today.month, today.year)
     ql.Settings.instance().evaluationDate = todays_date
 
     # Tenor
-    tenors = [
-        ql.Period(6, ql.Months),
-        ql.Period(1, ql.Years),
-        ql.Period(2, ql.Years),
-        ql.Period(3, ql.Years),
-        ql.Period(4, ql.Years),
-        ql.Period(5, ql.Years),
-        ql.Period(7, ql.Years),
-        ql.Period(10, ql.Years)
-    ]
+    tenors = [tenor_period(label) for label in quote.tenors]
 
     # Market Conventions
     settlement_days = 2
-    calendar = ql.UnitedStates()
-    recovery_rate = 0.4
+    calendar = CDS_CALENDAR
+    recovery_rate = RECOVERY_RATE
     frequency = ql.Quarterly
-    convention = ql.ModifiedFollowing
+    convention = CDS_CONVENTION
     date_generation = ql.DateGeneration.CDS
     day_count = ql.Actual360()
 
+    # one discount handle shared by every helper
+    discount_handle = ql.YieldTermStructureHandle(discount_curve)
+
     cdsHelpers = [
-        ql.SpreadCdsHelper(ql.QuoteHandle(ql.SimpleQuote(spread/10000)),
+        ql.SpreadCdsHelper(ql.QuoteHandle(simple_quote(quotes, label, spread/10000)),
         tenor,
         settlement_days,
         calendar,
@@ -140,19 +137,51 @@ def cds_curve(today, quote, discount_curve):
         date_generation,
         day_count,
         recovery_rate,
-        ql.YieldTermStructureHandle(discount_curve)
+        discount_handle
         )
-    for spread, tenor in zip(quote['Market.Mid'], tenors)]
+    for label, spread, tenor in zip(quote.tenors, quote.mids, tenors)]
+    if helper_list is not None:
+        helper_list.extend(cdsHelpers)
     
-    cds_curve = ql.PiecewiseFlatHazardRate(todays_date, cdsHelpers, day_count)
+    cds_curve = ql.PiecewiseFlatHazardRate(*curve_reference(todays_date, floating), cdsHelpers, day_count)
 
-    return cds_curve
+    return bootstrapped(cds_curve, 'cds_curve', helpers=len(cdsHelpers))
 
+def cds_names():
+    # every sheet of cds_data.xlsx except the USD IRS discounting quotes is a reference entity
+    path = os.path.join(MARKET_DATA_DIR, "cds_data.xlsx")
+    return [name for name in sheet_names(path) if name != 'USDIRS']
+
+class CreditCurveManager():
+    # one USD IRS discount curve per date, shared by the hazard curves of every reference entity
+    def __init__(self, registry=None, maxsize=1024):
+        self.registry = registry or CurveRegistry(maxsize=maxsize)
+
+    def discount_curve(self, today):
+        return self.registry.get(swap_curve, today, get_irs_quote(today))
+
+    def hazard_curve(self, today, name='ROKCDS'):
+        return self.hazard_curves(today, [name])[name]
+
+    def hazard_curves(self, today, names=None):
+        # all names in one pass over the workbook against the same discount curve
+        names = names or cds_names()
+        discount_curve = self.discount_curve(today)
+        return {
+            name: self.registry.get(cds_curve, today, get_cds_quote(today, name), discount_curve)
+            for name in names
+        }
+
+    def invalidate(self, today=None):
+        return self.registry.invalidate(today=today)
+
+@traced
 def default_prob(date, curve):
     date = ql.Date(date.day, date.month, date.year)
     default_prob = curve.defaultProbability(date)
     return default_prob
 
+@traced
 def survival_prob(date, curve):
     date = ql.Date(date.day, date.month, date.year)
     survival_prob = curve.survivalProbability(date)
@@ -161,6 +190,8 @@ def survival_prob(date, curve):
 
 
 if __name__ == "__main__":
+    import datetime
+
     todays_date = datetime.date(2020,12,11)
 
     irs_quote = get_irs_quote(today=todays_date)
@@ -168,29 +199,14 @@ if __name__ == "__main__":
 
     discount_curve = swap_curve(today=todays_date, quote=irs_quote)
     hazard_curve = cds_curve(today=todays_date, quote=cds_quote, discount_curve=discount_curve)
+    cds_quote = cds_quote.to_frame()
 
-    cds_quote['default prob'] = np.nan
-    cds_quote['survival prob'] = np.nan
-
-    for tenor, date in zip(cds_quote.index, cds_quote['Maturity']):
-        cds_quote.loc[tenor, 'default prob'] = default_prob(date, hazard_curve)
-        cds_quote.loc[tenor, 'survival prob'] = survival_prob(date, hazard_curve)
+    cds_quote['default prob'] = probability_surface([hazard_curve], cds_quote['Maturity'], 'default')[0]
+    cds_quote['survival prob'] = probability_surface([hazard_curve], cds_quote['Maturity'], 'survival')[0]
 
 
 
     print(cds_quote[['default prob', 'survival prob']])
 
     # plot the result
-    plt.figure(figsize=(16,8))
-    plt.plot(cds_quote['default prob'], 'b-', label='Default Probability')
-    plt.title('Default Probability', loc='center')
-    plt.xlabel('maturity')
-    plt.ylabel('%')
-
-
-    # plot the result
-    plt.figure(figsize=(16,8))
-    plt.plot(cds_quote['survival prob'], 'g-', label='Survival Probability')
-    plt.title('Survival Probability', loc='center')
-    plt.xlabel('maturity')
-    plt.ylabel('%')
\ No newline at end of file
+    report.plot_probabilities(cds_quote)
@@ -0,0 +1,107 @@
+import numpy as np
+
+import QuantLib as ql
+
+from quant_lib.irs_portfolio import schedule, to_ql_date, trade_rows
+from quant_lib.live_curve import LiveCurve
+from quant_lib.risk import bucket_deltas
+from quant_lib.profiling import traced
+
+
+class CdsPortfolio():
+    # CDS book (conventions of the CDS notebook) priced off one hazard and one discount handle
+    # IMM schedules are shared across trades, engines are shared per recovery rate
+    # trade spreads are running spreads in bp, as quoted in cds_data.xlsx
+    def __init__(self, trades, curve=None, discount_curve=None, recovery_rate=0.4):
+        self.tenor = ql.Period(3, ql.Months)
+        self.calendar = ql.UnitedStates()
+        self.convention = ql.ModifiedFollowing
+        self.date_generation = ql.DateGeneration.CDS
+        self.day_counter = ql.Actual360()
+        self.recovery_rate = recovery_rate
+
+        # relinking either handle reprices the whole book
+        self.curve_handle = ql.RelinkableDefaultProbabilityTermStructureHandle()
+        self.discount_handle = ql.RelinkableYieldTermStructureHandle()
+        self.engines = {}
+
+        self.trades = trade_rows(trades)
+        self.contracts = [self._contract(trade) for trade in self.trades]
+
+        if curve is not None:
+            self.link(curve)
+        if discount_curve is not None:
+            self.link_discount(discount_curve)
+
+    def __len__(self):
+        return len(self.contracts)
+
+    def link(self, curve):
+        # the hazard curve, so risk.bucket_deltas can bump it like any other live curve
+        self.curve_handle.linkTo(curve)
+
+    def link_discount(self, discount_curve):
+        self.discount_handle.linkTo(discount_curve)
+
+    @traced
+    def npv(self, curve=None):
+        if curve is not None:
+            self.link(curve)
+        return np.array([cds.NPV() for cds in self.contracts])
+
+    @traced
+    def fair_spread(self, curve=None):
+        # par running spread in bp
+        if curve is not None:
+            self.link(curve)
+        return np.array([cds.fairSpread() for cds in self.contracts]) * 10000
+
+    def premium_leg(self):
+        return np.array([cds.couponLegNPV() for cds in self.contracts])
+
+    def protection_leg(self):
+        return np.array([cds.defaultLegNPV() for cds in self.contracts])
+
+    def _engine(self, recovery_rate):
+        engine = self.engines.get(recovery_rate)
+        if engine is None:
+            engine = ql.MidPointCdsEngine(self.curve_handle, recovery_rate, self.discount_handle)
+            self.engines[recovery_rate] = engine
+        return engine
+
+    def _contract(self, trade):
+        pricing_date = to_ql_date(trade['pricing_date'])
+        maturity_date = to_ql_date(trade['maturity_date'])
+
+        if trade['position'] == 'long':
+            position = ql.Protection.Buyer
+        else:
+            position = ql.Protection.Seller
+
+        cdsSchedule = schedule(pricing_date, maturity_date, self.tenor, self.calendar, self.convention,
+                               self.date_generation)
+
+        cds = ql.CreditDefaultSwap(position,
+                                   trade['notional'],
+                                   trade['spread']/10000,
+                                   cdsSchedule,
+                                   self.convention,
+                                   self.day_counter
+                )
+        cds.setPricingEngine(self._engine(trade.get('recovery', self.recovery_rate)))
+        return cds
+
+
+def price_cds(trades, curve, discount_curve):
+    return CdsPortfolio(trades, curve, discount_curve).npv()
+
+
+@traced
+def cs01_ladder(trades, builder, today, quote, discount_curve, basis_point=1.0, central=False):
+    # trades x CDS tenors matrix of PV change for a `basis_point` bp bump of each par spread
+    # one hazard re-bootstrap per bucket, no contract is rebuilt
+    import pandas as pd
+    live = LiveCurve(builder, today, quote, discount_curve)
+    portfolio = CdsPortfolio(trades, discount_curve=discount_curve)
+    deltas = bucket_deltas(portfolio, live, live.tenors, basis_point, central)
+    return pd.DataFrame(deltas, columns=live.tenors)
@@ -0,0 +1,99 @@
+import numpy as np
+from numpy.lib.format import open_memmap
+
+import QuantLib as ql
+
+from quant_lib.discount_kernel import to_serials, year_fractions
+
+
+class HazardKernel():
+    # NumPy copy of a bootstrapped PiecewiseFlatHazardRate: hazard rates backward flat between
+    # node times, the last hazard rate extrapolated flat (as QuantLib's InterpolatedHazardRateCurve)
+    def __init__(self, reference_date, day_counter, times, hazard_rates):
+        self.reference_date = reference_date
+        self.day_counter = day_counter
+        self.times = np.asarray(times, dtype=float)
+        self.hazard_rates = np.asarray(hazard_rates, dtype=float)
+
+        self._reference = int(to_serials(reference_date))
+        # integrated hazard at each node
+        self._primitive = np.concatenate([[0.0], np.cumsum(self.hazard_rates[1:] * np.diff(self.times))])
+
+    @classmethod
+    def from_curve(cls, curve):
+        nodes = curve.nodes()
+        return cls(
+            curve.referenceDate(),
+            curve.dayCounter(),
+            curve.times(),
+            [rate for _, rate in nodes]
+        )
+
+    def time(self, dates):
+        return year_fractions(self.day_counter, self._reference, to_serials(dates))
+
+    def hazard_rate_t(self, t):
+        # a node time belongs to the segment on its left
+        t = np.asarray(t, dtype=float)
+        i = np.clip(np.searchsorted(self.times, t, side='left'), 0, len(self.times) - 1)
+        return self.hazard_rates[i]
+
+    def cumulative_hazard(self, t):
+        t = np.maximum(np.asarray(t, dtype=float), 0.0)
+        i = np.clip(np.searchsorted(self.times, t, side='left'), 1, len(self.times) - 1)
+        return self._primitive[i - 1] + self.hazard_rates[i] * (t - self.times[i - 1])
+
+    def survival_t(self, t):
+        return np.exp(-self.cumulative_hazard(t))
+
+    def survival(self, dates):
+        return self.survival_t(self.time(dates))
+
+    def default(self, dates):
+        return 1.0 - self.survival(dates)
+
+    def hazard_rate(self, dates):
+        return self.hazard_rate_t(self.time(dates))
+
+    def default_density(self, dates):
+        t = self.time(dates)
+        return self.hazard_rate_t(t) * self.survival_t(t)
+
+
+SURFACES = {
+    'survival': HazardKernel.survival,
+    'default': HazardKernel.default,
+    'hazard': HazardKernel.hazard_rate,
+    'density': HazardKernel.default_density,
+}
+
+
+def monthly_dates(reference_date, years=30):
+    # serial numbers of the reference date plus every month out to `years`, unadjusted
+    if not isinstance(reference_date, ql.Date):
+        reference_date = ql.Date(reference_date.day, reference_date.month, reference_date.year)
+    return np.array([(reference_date + ql.Period(k, ql.Months)).serialNumber() for k in range(12 * years + 1)])
+
+
+def probability_surface(curves, dates, kind='survival', path=None):
+    # (names x dates) surface of one of SURFACES for {name: hazard curve} or a list of curves
+    # node data is read from each curve once, and with `path` the result is a .npy memory map
+    if kind not in SURFACES:
+        raise ValueError("unknown surface {}, expected one of {}".format(kind, list(SURFACES)))
+    curves = list(curves.values()) if isinstance(curves, dict) else list(curves)
+    serials = to_serials(dates)
+    shape = (len(curves), len(serials))
+
+    if path is None:
+        surface = np.empty(shape)
+    else:
+        surface = open_memmap(path, mode='w+', dtype=np.float64, shape=shape)
+
+    evaluate = SURFACES[kind]
+    for i, curve in enumerate(curves):
+        kernel = curve if isinstance(curve, HazardKernel) else HazardKernel.from_curve(curve)
+        surface[i] = evaluate(kernel, serials)
+
+    if path is not None:
+        surface.flush()
+    return surface
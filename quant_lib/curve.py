@@ -1,17 +1,47 @@
+import os
+import json
+import warnings
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 import datetime
-import requests
+import functools
 
-from bs4 import BeautifulSoup
 import QuantLib as ql
 
-def get_date():
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    req = requests.get('https://www.wsj.com/market-data/bonds', headers=headers)
-    html = req.text
-    soup = BeautifulSoup(html, 'html.parser')
+from quant_lib.profiling import traced, bootstrapped
+
+TENORS = ['01M', '03M', '06M', '01Y', '02Y', '03Y','05Y','07Y','10Y','30Y']
+
+# knots (in years) of the cubic B-spline fit, as in QuantLib's fitted bond curve tests
+BSPLINE_KNOTS = [-30.0, -20.0, 0.0, 5.0, 10.0, 15.0, 20.0, 25.0, 30.0, 40.0, 50.0]
+
+
+# the scraping stack (requests, BeautifulSoup) is only imported once quotes are fetched
+# pages are cached per date under page_fetch.PAGE_CACHE_DIR, pass a fetcher to replay or skip the cache
+@functools.lru_cache(maxsize=None)
+def default_fetcher():
+    from quant_lib.page_fetch import PageFetcher, PAGE_CACHE_DIR
+    return PageFetcher(cache_dir=PAGE_CACHE_DIR)
+
+@functools.lru_cache(maxsize=None)
+def _soup_factory():
+    from bs4 import BeautifulSoup, SoupStrainer
+    try:
+        import lxml
+        parser = 'lxml'
+    except ImportError:
+        parser = 'html.parser'
+
+    # only <span> elements carry the quotes, skip building the rest of the page tree
+    spans = SoupStrainer('span')
+    return lambda html: BeautifulSoup(html, parser, parse_only=spans)
+
+def parse_page(html):
+    return _soup_factory()(html)
+
+def get_date(fetcher=None):
+    fetcher = fetcher or default_fetcher()
+    html = fetcher.fetch('bonds', 'https://www.wsj.com/market-data/bonds')
+    soup = parse_page(html)
     data = soup.find("span", class_ = "WSJBase--card__timestamp--3F2HxyAE")
     
     # JS path
@@ -21,55 +51,49 @@ def get_date():
     date = datetime.datetime.strptime(date, "%m/%d/%y").date()
     return date
 
-def get_quote(reference_date):
-    tenors = ['01M', '03M', '06M', '01Y', '02Y', '03Y','05Y','07Y','10Y','30Y']
-
-    # create empty lists
-    maturities = []
-    days = []
-    prices = []
-    coupons = []
-    headers = {'User-Agent': 'Mozilla/5.0'}
-
-    # get market informations
-    for i, tenor in enumerate(tenors):
-        url = "https://www.wsj.com/market-data/quotes/bond/BX/TMUBMUSD"+tenor+"?mod=md_bond_overview_quote"
-        req = requests.get(url, headers=headers)
-        html = req.text
-        soup = BeautifulSoup(html, 'html.parser')
-
-        # Price 
-        data_src = soup.find("span", id="quote_val") 
-        price = data_src.text
-        price = float(price[:-1])
-    
-        data_src2 = soup.find_all("span", class_="data_data")
-
-        # Coupon
-        coupon = data_src2[2].text
-        if coupon != '':
-            coupon = float(coupon[:-1])
-        else:
-            coupon = 0.0
-        
-        # Maturity Date
-        maturity = data_src2[3].text
-        maturity = datetime.datetime.strptime(maturity, '%m/%d/%y').date()
-
-        # Send to lists
-        days.append((maturity - reference_date).days)
-        prices.append(price)
-        coupons.append(coupon)
-        maturities.append(maturity)
+def parse_quote(html, reference_date):
+    soup = parse_page(html)
+
+    # Price 
+    data_src = soup.find("span", id="quote_val") 
+    price = data_src.text
+    price = float(price[:-1])
+
+    data_src2 = soup.find_all("span", class_="data_data")
+
+    # Coupon
+    coupon = data_src2[2].text
+    if coupon != '':
+        coupon = float(coupon[:-1])
+    else:
+        coupon = 0.0
     
+    # Maturity Date
+    maturity = data_src2[3].text
+    maturity = datetime.datetime.strptime(maturity, '%m/%d/%y').date()
+
+    return maturity, (maturity - reference_date).days, price, coupon
+
+@traced
+def get_quote(reference_date, fetcher=None):
+    import pandas as pd
+    fetcher = fetcher or default_fetcher()
+
+    # get market informations, all tenors in one parallel batch
+    urls = {
+        "TMUBMUSD" + tenor: "https://www.wsj.com/market-data/quotes/bond/BX/TMUBMUSD" + tenor + "?mod=md_bond_overview_quote"
+        for tenor in TENORS
+    }
+    pages = fetcher.fetch_many(urls, reference_date)
+    rows = [parse_quote(pages[key], reference_date) for key in urls]
+
     # create dataframe
-    df = pd.DataFrame([maturities, days, prices, coupons]).transpose()
-    headers = ['maturity', 'days', 'price', 'coupon']
-    df.columns = headers
+    df = pd.DataFrame(rows, columns=['maturity', 'days', 'price', 'coupon'])
     df.set_index('maturity', inplace=True)
 
     return df
 
+@traced
 def treasury_curve(date, quote):
     
     # Divide Quotes
@@ -126,15 +150,124 @@ def treasury_curve(date, quote):
     # Build Curve
     yc_linearzero = ql.PiecewiseLinearZero(eval_date, rate_helper, day_counter)
     
-    return yc_linearzero
+    return bootstrapped(yc_linearzero, 'treasury_curve', helpers=len(rate_helper))
+
+def fitting_method(method='svensson', knots=None):
+    if method == 'svensson':
+        return ql.SvenssonFitting()
+    if method == 'nelson_siegel':
+        return ql.NelsonSiegelFitting()
+    if method == 'cubic_bspline':
+        return ql.CubicBSplinesFitting(knots or BSPLINE_KNOTS)
+    raise ValueError("unknown fitting method {}".format(method))
+
+@traced
+def fitted_treasury_curve(date, bonds, method='svensson', guess=None, knots=None,
+                          accuracy=1.0e-10, max_evaluations=10000):
+    # bonds: one row per issue, index or column 'maturity', columns coupon (%) and clean price,
+    # optional issue_date; bills are simply bonds with a zero coupon
+    import pandas as pd
+    bonds = bonds.reset_index() if 'maturity' not in bonds.columns else bonds
+
+    # Set Evaluation Date
+    eval_date = ql.Date(date.day, date.month, date.year)
+    ql.Settings.instance().evaluationDate = eval_date
+
+    # Set Market Conventions (as treasury_curve)
+    calendar = ql.UnitedStates()
+    convention = ql.ModifiedFollowing
+    day_counter = ql.ActualActual()
+    end_of_month = False
+    fixing_days = 1
+    face_amount = 100
+    coupon_frequency = ql.Period(ql.Semiannual)
+
+    bond_helpers = []
+    for row in bonds.itertuples(index=False):
+        maturity = row.maturity
+        issue = getattr(row, 'issue_date', None)
+        issue_date = eval_date if issue is None or pd.isna(issue) else ql.Date(issue.day, issue.month, issue.year)
+        schedule = ql.Schedule(issue_date,
+                               ql.Date(maturity.day, maturity.month, maturity.year),
+                               coupon_frequency,
+                               calendar,
+                               convention,
+                               convention,
+                               ql.DateGeneration.Backward,
+                               end_of_month)
+        bond_helpers.append(ql.FixedRateBondHelper(ql.QuoteHandle(ql.SimpleQuote(row.price)),
+                                                   fixing_days,
+                                                   face_amount,
+                                                   schedule,
+                                                   [row.coupon/100.0],
+                                                   day_counter,
+                                                   convention))
+
+    guess = ql.Array(list(guess)) if guess is not None else ql.Array()
+    curve = ql.FittedBondDiscountCurve(eval_date, bond_helpers, day_counter, fitting_method(method, knots),
+                                       accuracy, max_evaluations, guess)
+    return bootstrapped(curve, 'fitted_treasury_curve', method=method, helpers=len(bond_helpers))
+
+class TreasuryCurveFitter():
+    # fitted treasury curves day after day: each fit starts from the parameters of the
+    # latest earlier date, and the parameters of every date are cached (in cache_dir if given)
+    def __init__(self, method='svensson', knots=None, cache_dir=None, accuracy=1.0e-10, max_evaluations=10000):
+        self.method = method
+        self.knots = knots
+        self.cache_dir = cache_dir
+        self.accuracy = accuracy
+        self.max_evaluations = max_evaluations
+        self.parameters = self._load()
+        self.iterations = {}
+
+    def fit(self, date, bonds):
+        curve = fitted_treasury_curve(date, bonds, self.method, self.guess(date), self.knots,
+                                      self.accuracy, self.max_evaluations)
+        results = curve.fitResults()
+        self.parameters[date] = np.array(list(results.solution()))
+        self.iterations[date] = results.numberOfIterations()
+        self._save()
+        return curve
+
+    def guess(self, date):
+        # this date's own parameters when refitting, otherwise the latest earlier date's
+        earlier = [d for d in self.parameters if d <= date]
+        return self.parameters[max(earlier)] if earlier else None
+
+    def _path(self):
+        return os.path.join(self.cache_dir, "fitted_{}.json".format(self.method))
+
+    def _load(self):
+        if self.cache_dir is None or not os.path.exists(self._path()):
+            return {}
+        try:
+            with open(self._path()) as f:
+                stored = json.load(f)
+            return {datetime.date.fromisoformat(d): np.array(p, dtype=float) for d, p in stored.items()}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            # an unreadable cache only costs the warm start, fits begin from the default guess
+            warnings.warn("discarding fitted curve cache {}: {}".format(self._path(), e), RuntimeWarning)
+            return {}
+
+    def _save(self):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path()
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump({d.isoformat(): p.tolist() for d, p in sorted(self.parameters.items())}, f)
+        os.replace(tmp_path, path)
+
 
+@traced
 def discount_factor(date, curve):
     # returns discount factors of each day
     # use quantlib date type
-    print(date)
     date = ql.Date(date.day, date.month, date.year)
     return curve.discount(date)
 
+@traced
 def zero_rate(date, curve):
     date = ql.Date(date.day, date.month, date.year)
     day_counter = ql.ActualActual()
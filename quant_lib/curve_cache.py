@@ -0,0 +1,115 @@
+import hashlib
+import datetime
+import threading
+import collections
+
+import QuantLib as ql
+
+from quant_lib.quote import QuoteRecord, as_quote_record
+
+
+class CurveRegistry():
+    # bootstrapped curves memoized by a content hash of
+    # (builder, evaluation date, quote snapshot, extra inputs)
+    # conventions are fixed inside each builder, so the builder identifies them
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = collections.OrderedDict()
+        self._keys = {}
+        self._lock = threading.RLock()
+
+    def get(self, builder, today, quote, *args):
+        with self._lock:
+            key = self.key(builder, today, quote, *args)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                # builders set the evaluation date, keep that side effect on a hit
+                ql.Settings.instance().evaluationDate = ql.Date(today.day, today.month, today.year)
+                return entry['curve']
+
+            # bootstrap under the lock so each curve is built exactly once
+            self.misses += 1
+            curve = builder(today, quote, *args)
+            self._entries[key] = {
+                'builder': _builder_name(builder),
+                'today': today,
+                'curve': curve,
+                'args': args,
+            }
+            self._keys[id(curve)] = key
+            while len(self._entries) > self.maxsize:
+                self._evict(next(iter(self._entries)))
+            return curve
+
+    def key(self, builder, today, quote, *args):
+        digest = hashlib.sha1()
+        digest.update(_builder_name(builder).encode())
+        digest.update(str(today).encode())
+        digest.update(quote_fingerprint(quote, today).encode())
+        for arg in args:
+            digest.update(self._fingerprint(arg).encode())
+        return digest.hexdigest()
+
+    def invalidate(self, today=None, builder=None):
+        # drop every curve matching the given date and/or builder, all curves if neither is given
+        with self._lock:
+            name = _builder_name(builder) if builder is not None else None
+            stale = [
+                key for key, entry in self._entries.items()
+                if (today is None or entry['today'] == today)
+                and (name is None or entry['builder'] == name)
+            ]
+            for key in stale:
+                self._evict(key)
+            return len(stale)
+
+    def clear(self):
+        return self.invalidate()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, curve):
+        return id(curve) in self._keys
+
+    def _evict(self, key):
+        entry = self._entries.pop(key)
+        self._keys.pop(id(entry['curve']), None)
+
+    def _fingerprint(self, value):
+        # curves built by this registry are identified by their own key
+        if id(value) in self._keys:
+            return self._keys[id(value)]
+        if value is None or isinstance(value, (str, int, float, datetime.date)):
+            return repr(value)
+        if isinstance(value, (tuple, list)):
+            return '({})'.format(','.join(self._fingerprint(v) for v in value))
+        # anything else is kept alive by the entry, so its id cannot be reused
+        return '{}@{}'.format(type(value).__name__, id(value))
+
+
+def quote_fingerprint(quote, today):
+    if isinstance(quote, QuoteRecord) or 'Market.Mid' in quote.columns:
+        return as_quote_record(quote, today).fingerprint()
+
+    # other quote tables, e.g. the treasury quotes of curve.get_quote
+    import pandas as pd
+    digest = hashlib.sha1(str(list(quote.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(quote, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _builder_name(builder):
+    return '{}.{}'.format(builder.__module__, builder.__qualname__)
+
+
+curve_registry = CurveRegistry()
+
+
+def cached_curve(builder, today, quote, *args):
+    return curve_registry.get(builder, today, quote, *args)
@@ -0,0 +1,233 @@
+import os
+import json
+import datetime
+import numpy as np
+import pandas as pd
+
+import QuantLib as ql
+
+from quant_lib.discount_kernel import EPOCH, CurveKernel, to_serials, year_fractions
+from quant_lib.credit_kernel import HazardKernel
+from quant_lib.evaluation import evaluation_date
+from quant_lib import swap_curve, fx_swap_curve, cds_curve
+
+
+# day counters of the stored curves by QuantLib name, built when a curve is read back
+DAY_COUNTERS = {
+    'Actual/360': ql.Actual360,
+    'Actual/365 (Fixed)': ql.Actual365Fixed,
+    'Actual/Actual (ISDA)': ql.ActualActual,
+}
+
+
+def _cds_hazard_curve(today):
+    discount_curve = cds_curve.swap_curve(today, cds_curve.get_irs_quote(today))
+    return cds_curve.cds_curve(today, cds_curve.get_cds_quote(today), discount_curve)
+
+
+# name -> callable(today) bootstrapping that date's curve from the market data workbooks
+CURVE_BUILDERS = {
+    'swap': lambda today: swap_curve.swap_curve(today, swap_curve.get_quote(today)),
+    'usdirs': lambda today: fx_swap_curve.usdirs_curve(today, fx_swap_curve.get_quote(today, 'USD')),
+    'krwccs': lambda today: fx_swap_curve.krwccs_curve(today, fx_swap_curve.get_quote(today, 'KRW')),
+    'cds': _cds_hazard_curve,
+}
+
+
+def business_days(start, end, calendar=None):
+    calendar = calendar or ql.UnitedStates()
+    days = []
+    day = start
+    while day <= end:
+        if calendar.isBusinessDay(ql.Date(day.day, day.month, day.year)):
+            days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+class _Column():
+    # fixed width rows appended to a raw binary file, read back as a memory map
+    def __init__(self, path, dtype, width=None):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.width = width
+
+    def append(self, rows):
+        with open(self.path, 'ab') as f:
+            f.write(np.ascontiguousarray(rows, dtype=self.dtype).tobytes())
+
+    def truncate(self, rows):
+        # drops anything written after the last committed row
+        size = rows * self.dtype.itemsize * (self.width or 1)
+        if os.path.exists(self.path) and os.path.getsize(self.path) != size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(size)
+
+    def view(self, rows):
+        shape = (rows, self.width) if self.width else (rows,)
+        if rows == 0:
+            return np.empty(shape, dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode='r', shape=shape)
+
+
+class CurveHistory():
+    # append-only store of bootstrapped curves, one directory per curve name:
+    # dates, node counts, node dates and zero (or hazard) rates as dates x max_nodes matrices
+    # the row count in meta.json is only advanced once every column has been written
+    def __init__(self, path, max_nodes=64):
+        self.path = path
+        self.max_nodes = max_nodes
+        self._views = {}
+
+    def names(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name for name in os.listdir(self.path) if os.path.exists(self._meta_path(name)))
+
+    def meta(self, name):
+        path = self._meta_path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def dates(self, name):
+        return EPOCH + self._arrays(name)['dates']
+
+    def last_date(self, name):
+        if self.meta(name) is None:
+            return None
+        dates = self.dates(name)
+        return dates[-1].astype(datetime.date) if len(dates) else None
+
+    def append(self, name, today, curve):
+        # stores the curve's nodes, dates must be strictly increasing per name
+        nodes = curve.nodes()
+        kind = 'hazard' if isinstance(curve, ql.DefaultProbabilityTermStructure) else 'zero'
+        meta = self.meta(name) or {
+            'kind': kind,
+            'day_counter': curve.dayCounter().name(),
+            'max_nodes': self.max_nodes,
+            'rows': 0,
+        }
+        if meta['kind'] != kind:
+            raise ValueError("{} stores {} curves, got a {} curve".format(name, meta['kind'], kind))
+        if len(nodes) > meta['max_nodes']:
+            raise ValueError("{} has {} nodes, the store keeps {}".format(name, len(nodes), meta['max_nodes']))
+
+        serial = int(to_serials(today))
+        last = self.last_date(name)
+        if last is not None and serial <= int(to_serials(last)):
+            raise ValueError("{} already holds curves up to {}".format(name, last))
+
+        node_dates = np.zeros(meta['max_nodes'], dtype=np.int64)
+        values = np.full(meta['max_nodes'], np.nan)
+        node_dates[:len(nodes)] = [date.serialNumber() for date, _ in nodes]
+        values[:len(nodes)] = [value for _, value in nodes]
+
+        os.makedirs(os.path.join(self.path, name), exist_ok=True)
+        columns = self._columns(name, meta['max_nodes'])
+        for column in columns.values():
+            column.truncate(meta['rows'])
+        columns['dates'].append([serial])
+        columns['counts'].append([len(nodes)])
+        columns['nodes'].append(node_dates[None, :])
+        columns['values'].append(values[None, :])
+
+        meta['rows'] += 1
+        self._write_meta(name, meta)
+        self._views.pop(name, None)
+
+    def update(self, name, dates, builder=None):
+        # bootstraps and appends every date after the last stored one, returns the dates added
+        builder = builder or CURVE_BUILDERS[name]
+        last = self.last_date(name)
+        added = []
+        for today in sorted(dates):
+            if last is not None and today <= last:
+                continue
+            with evaluation_date(today):
+                self.append(name, today, builder(today))
+            added.append(today)
+        return added
+
+    def nodes(self, name, today):
+        # (node dates as ql.Date, rates) stored for one date
+        arrays = self._arrays(name)
+        i = self._row(name, today)
+        count = arrays['counts'][i]
+        return [ql.Date(int(serial)) for serial in arrays['nodes'][i, :count]], arrays['values'][i, :count].tolist()
+
+    def curve(self, name, today):
+        # rehydrated QuantLib curve, identical to the bootstrapped one on and between nodes
+        meta = self.meta(name)
+        dates, values = self.nodes(name, today)
+        day_counter = DAY_COUNTERS[meta['day_counter']]()
+        if meta['kind'] == 'hazard':
+            return ql.HazardRateCurve(dates, values, day_counter)
+        return ql.ZeroCurve(dates, values, day_counter)
+
+    def kernel(self, name, today):
+        # NumPy kernel of a stored curve, without going through QuantLib
+        meta = self.meta(name)
+        dates, values = self.nodes(name, today)
+        serials = to_serials(dates)
+        day_counter = DAY_COUNTERS[meta['day_counter']]()
+        times = year_fractions(day_counter, serials[0], serials)
+        kernel_class = HazardKernel if meta['kind'] == 'hazard' else CurveKernel
+        return kernel_class(dates[0], day_counter, times, values)
+
+    def matrix(self, name, start=None, end=None):
+        # dates x max_nodes views (no copy) of node dates and rates between start and end inclusive
+        arrays = self._arrays(name)
+        lo, hi = self._slice(name, start, end)
+        return EPOCH + arrays['dates'][lo:hi], arrays['nodes'][lo:hi], arrays['values'][lo:hi]
+
+    def frame(self, name, start=None, end=None):
+        dates, _, values = self.matrix(name, start, end)
+        frame = pd.DataFrame(np.asarray(values), index=pd.DatetimeIndex(dates, name='date'))
+        return frame.dropna(axis=1, how='all')
+
+    def _slice(self, name, start, end):
+        dates = self._arrays(name)['dates']
+        lo = 0 if start is None else np.searchsorted(dates, int(to_serials(start)), side='left')
+        hi = len(dates) if end is None else np.searchsorted(dates, int(to_serials(end)), side='right')
+        return lo, hi
+
+    def _row(self, name, today):
+        dates = self._arrays(name)['dates']
+        serial = int(to_serials(today))
+        i = np.searchsorted(dates, serial)
+        if i == len(dates) or dates[i] != serial:
+            raise KeyError("no {} curve stored for {}".format(name, today))
+        return i
+
+    def _arrays(self, name):
+        meta = self.meta(name)
+        if meta is None:
+            raise KeyError("no curve history for {}".format(name))
+        cached = self._views.get(name)
+        if cached is None or cached[0] != meta['rows']:
+            columns = self._columns(name, meta['max_nodes'])
+            cached = (meta['rows'], {key: column.view(meta['rows']) for key, column in columns.items()})
+            self._views[name] = cached
+        return cached[1]
+
+    def _columns(self, name, max_nodes):
+        directory = os.path.join(self.path, name)
+        return {
+            'dates': _Column(os.path.join(directory, 'dates.bin'), np.int64),
+            'counts': _Column(os.path.join(directory, 'counts.bin'), np.int64),
+            'nodes': _Column(os.path.join(directory, 'nodes.bin'), np.int64, max_nodes),
+            'values': _Column(os.path.join(directory, 'values.bin'), np.float64, max_nodes),
+        }
+
+    def _meta_path(self, name):
+        return os.path.join(self.path, name, 'meta.json')
+
+    def _write_meta(self, name, meta):
+        path = self._meta_path(name)
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
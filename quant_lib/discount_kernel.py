@@ -0,0 +1,217 @@
+import math
+import datetime
+import numpy as np
+
+import QuantLib as ql
+
+
+# QuantLib date serial numbers count days from 30 December 1899
+EPOCH = np.datetime64('1899-12-30', 'D')
+
+# day counters whose year fraction is a plain day count ratio
+DAYS_PER_YEAR = {
+    'Actual/360': 360.0,
+    'Actual/365 (Fixed)': 365.0,
+}
+
+# ql.ActualActual() in QuantLib 1.27, used by the treasury curve and bonds
+ISDA = 'Actual/Actual (ISDA)'
+
+# QuantLib's step for zero rates at the reference date and instantaneous forwards
+DT = 0.0001
+
+# the C library exp QuantLib calls, NumPy's vectorized exp can differ from it by one ulp
+# and the instantaneous forward divides that by DT
+_libm_exp = np.frompyfunc(math.exp, 1, 1)
+
+
+def to_serials(dates):
+    # datetime.date / ql.Date / datetime64 (scalar or array) to QuantLib serial numbers
+    if isinstance(dates, ql.Date):
+        return np.int64(dates.serialNumber())
+    if isinstance(dates, datetime.date):
+        return np.int64((np.datetime64(dates, 'D') - EPOCH).astype(np.int64))
+
+    values = np.asarray(dates)
+    if values.dtype.kind == 'M':
+        return (values.astype('datetime64[D]') - EPOCH).astype(np.int64)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64)
+
+    flat = values.ravel()
+    if len(flat) and isinstance(flat[0], ql.Date):
+        serials = np.fromiter((date.serialNumber() for date in flat), dtype=np.int64, count=len(flat))
+    else:
+        serials = (flat.astype('datetime64[D]') - EPOCH).astype(np.int64)
+    return serials.reshape(values.shape)
+
+
+def _calendar_years(serials):
+    # (year, serial of 1 January, days in year) of each serial, from a table over the date range
+    if serials.size == 0:
+        return serials, serials, serials.astype(float)
+    first = serials.min()
+    years = (EPOCH + np.arange(first, serials.max() + 1)).astype('datetime64[Y]')
+    starts = (years.astype('datetime64[D]') - EPOCH).astype(np.int64)
+    lengths = ((years + 1).astype('datetime64[D]') - EPOCH).astype(np.int64) - starts
+    index = serials - first
+    return years.astype(np.int64)[index], starts[index], lengths[index].astype(float)
+
+
+def actual_actual_isda(start, end):
+    # days falling in each calendar year over that year's length, as ql.ActualActual(ISDA)
+    start, end = np.broadcast_arrays(np.asarray(start, dtype=np.int64), np.asarray(end, dtype=np.int64))
+    sign = np.where(end < start, -1.0, 1.0)
+    first = np.minimum(start, end)
+    last = np.maximum(start, end)
+
+    first_year, first_start, first_length = _calendar_years(first)
+    last_year, last_start, last_length = _calendar_years(last)
+
+    same_year = (last - first) / first_length
+    spanning = (
+        (first_start + first_length - first) / first_length
+        + (last_year - first_year - 1)
+        + (last - last_start) / last_length
+    )
+    return sign * np.where(first_year == last_year, same_year, spanning)
+
+
+def year_fractions(day_counter, start, serials):
+    start = int(to_serials(start))
+    serials = np.asarray(serials, dtype=np.int64)
+
+    basis = DAYS_PER_YEAR.get(day_counter.name())
+    if basis is not None:
+        return (serials - start) / basis
+    if day_counter.name() == ISDA:
+        return actual_actual_isda(start, serials)
+
+    # other day counters are evaluated once per distinct date
+    unique, inverse = np.unique(serials, return_inverse=True)
+    start_date = ql.Date(start)
+    fractions = np.array([day_counter.yearFraction(start_date, ql.Date(int(s))) for s in unique])
+    return fractions[inverse].reshape(serials.shape)
+
+
+def period_year_fractions(day_counter, start, end):
+    start = np.asarray(to_serials(start), dtype=np.int64)
+    end = np.asarray(to_serials(end), dtype=np.int64)
+
+    basis = DAYS_PER_YEAR.get(day_counter.name())
+    if basis is not None:
+        return (end - start) / basis
+    if day_counter.name() == ISDA:
+        return actual_actual_isda(start, end)
+
+    start, end = np.broadcast_arrays(start, end)
+    pairs, inverse = np.unique(np.stack([start.ravel(), end.ravel()], axis=1), axis=0, return_inverse=True)
+    fractions = np.array([day_counter.yearFraction(ql.Date(int(s)), ql.Date(int(e))) for s, e in pairs])
+    return fractions[inverse.ravel()].reshape(start.shape)
+
+
+def implied_rate(compound, t, compounding, frequency):
+    # vectorized ql.InterestRate.impliedRate
+    compound = np.asarray(compound, dtype=float)
+    t = np.asarray(t, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if compounding == ql.Simple:
+            rate = (compound - 1.0) / t
+        elif compounding == ql.Continuous:
+            rate = np.log(compound) / t
+        elif compounding == ql.Compounded:
+            rate = (compound ** (1.0 / (frequency * t)) - 1.0) * frequency
+        elif compounding == ql.SimpleThenCompounded:
+            rate = np.where(
+                t <= 1.0 / frequency,
+                (compound - 1.0) / t,
+                (compound ** (1.0 / (frequency * t)) - 1.0) * frequency
+            )
+        else:
+            raise ValueError("unknown compounding {}".format(compounding))
+    return np.where(compound == 1.0, 0.0, rate)
+
+
+class CurveKernel():
+    # NumPy copy of a bootstrapped PiecewiseLinearZero: continuous zero rates on the node
+    # times, linear in time, flat forward beyond the last node (as QuantLib's InterpolatedZeroCurve)
+    def __init__(self, reference_date, day_counter, times, zero_rates):
+        self.reference_date = reference_date
+        self.day_counter = day_counter
+        self.times = np.asarray(times, dtype=float)
+        self.zero_rates = np.asarray(zero_rates, dtype=float)
+
+        self._reference = int(to_serials(reference_date))
+        self._slopes = np.diff(self.zero_rates) / np.diff(self.times)
+
+    @classmethod
+    def from_curve(cls, curve):
+        nodes = curve.nodes()
+        return cls(
+            curve.referenceDate(),
+            curve.dayCounter(),
+            curve.times(),
+            [rate for _, rate in nodes]
+        )
+
+    def time(self, dates):
+        return year_fractions(self.day_counter, self._reference, to_serials(dates))
+
+    def zero_yield(self, t):
+        # continuous zero rate on the curve's own time axis
+        t = np.asarray(t, dtype=float)
+        t_max, z_max = self.times[-1], self.zero_rates[-1]
+
+        # same arithmetic as QuantLib's LinearInterpolation, to keep results bit-compatible
+        i = np.clip(np.searchsorted(self.times[:-1], t, side='right') - 1, 0, len(self.times) - 2)
+        inside = self.zero_rates[i] + (t - self.times[i]) * self._slopes[i]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            forward_max = z_max + t_max * self._slopes[-1]
+            outside = (z_max * t_max + forward_max * (t - t_max)) / t
+        return np.where(t <= t_max, inside, outside)
+
+    def discount_t(self, t):
+        t = np.asarray(t, dtype=float)
+        return np.where(t == 0.0, 1.0, np.exp(-self.zero_yield(t) * t))
+
+    def discount(self, dates):
+        return self.discount_t(self.time(dates))
+
+    def _libm_discount_t(self, t):
+        t = np.asarray(t, dtype=float)
+        return np.where(t == 0.0, 1.0, np.asarray(_libm_exp(-self.zero_yield(t) * t), dtype=float))
+
+    def zero_rate(self, dates, day_counter=None, compounding=ql.Compounded, frequency=ql.Semiannual):
+        # defaults reproduce swap_curve.zero_rate, which passes ql.Continuous (== 2) as the
+        # frequency, i.e. semiannual compounding on Actual/360
+        day_counter = day_counter or ql.Actual360()
+        serials = to_serials(dates)
+
+        at_reference = serials == self._reference
+        t_curve = np.where(at_reference, DT, self.time(serials))
+        t_result = np.where(at_reference, DT, year_fractions(day_counter, self._reference, serials))
+        return implied_rate(1.0 / self.discount_t(t_curve), t_result, compounding, frequency)
+
+    def forward_rate(self, start, end=None, day_counter=None, compounding=ql.Compounded, frequency=ql.Semiannual):
+        # end=None gives the instantaneous forward of swap_curve.forward_rate(date, date, ...)
+        day_counter = day_counter or ql.Actual360()
+        start = to_serials(start)
+
+        if end is None:
+            t1 = np.maximum(self.time(start) - DT / 2.0, 0.0)
+            t2 = t1 + DT
+            compound = self._libm_discount_t(t1) / self._libm_discount_t(t2)
+            return implied_rate(compound, np.full(np.shape(t1), DT), compounding, frequency)
+
+        end = to_serials(end)
+        compound = self.discount(start) / self.discount(end)
+        t = period_year_fractions(day_counter, start, end)
+        return implied_rate(compound, t, compounding, frequency)
+
+    def present_value(self, dates, amounts):
+        # amounts may be a vector or a (trades x cashflows) matrix padded with zeros
+        amounts = np.asarray(amounts, dtype=float)
+        discounts = self.discount(dates)
+        if amounts.ndim == 1 and discounts.ndim == 1:
+            return amounts @ discounts
+        return np.sum(amounts * discounts, axis=-1)
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+
+from quant_lib import swap_curve, cds_curve
+from quant_lib.cds_curve import CreditCurveManager
+from quant_lib.cds_portfolio import CdsPortfolio
+from quant_lib.curve_cache import curve_registry
+from quant_lib.evaluation import evaluation_date
+from quant_lib.irs_portfolio import SwapPortfolio
+from quant_lib.jacobian import bootstrap_jacobian
+from quant_lib.profiling import span
+
+
+# trade columns read as dates
+DATE_COLUMNS = ['pricing_date', 'maturity_date']
+
+# trades without a product column are IRS, CDS trades without a name are on ROKCDS
+DEFAULT_PRODUCT = 'irs'
+DEFAULT_NAME = 'ROKCDS'
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def read_trades(path, chunk_size=10000):
+    # the book in chunks of `chunk_size` rows from a CSV or Parquet file, never all of it at once
+    import pandas as pd
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size))
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_size)
+
+    for chunk in chunks:
+        for column in DATE_COLUMNS:
+            if column in chunk.columns:
+                chunk[column] = pd.to_datetime(chunk[column]).dt.date
+        yield chunk
+
+
+class EodCurves():
+    # the curves of one run date and their bootstrap Jacobians, built on first use and kept for the run
+    # discount curves come from the shared registry, so other books priced that day reuse them
+    def __init__(self, today, registry=None):
+        self.today = today
+        self.credit = CreditCurveManager(registry or curve_registry)
+        self._jacobians = {}
+
+    def swap(self):
+        if 'swap' not in self._jacobians:
+            self._jacobians['swap'] = bootstrap_jacobian(
+                swap_curve.swap_curve, self.today, swap_curve.get_quote(self.today))
+        return self._jacobians['swap']
+
+    def hazard(self, name=DEFAULT_NAME):
+        key = ('cds', name)
+        if key not in self._jacobians:
+            self._jacobians[key] = bootstrap_jacobian(
+                cds_curve.cds_curve, self.today, cds_curve.get_cds_quote(self.today, name),
+                self.credit.discount_curve(self.today))
+        return self._jacobians[key]
+
+
+def _ladder(jacobian, portfolio, prefix):
+    deltas = jacobian.par_deltas(jacobian.node_sensitivities(portfolio))
+    deltas.columns = ['{}_{}'.format(prefix, tenor) for tenor in deltas.columns]
+    return deltas
+
+
+def price_chunk(chunk, curves):
+    # {product: result frame} of one chunk of trades: NPV, par rate or spread and the par-quote ladder
+    import pandas as pd
+    products = chunk['product'] if 'product' in chunk.columns else pd.Series(DEFAULT_PRODUCT, index=chunk.index)
+    unknown = set(products.unique()) - {'irs', 'cds'}
+    if unknown:
+        raise ValueError("no EOD pricing for products {}".format(sorted(unknown)))
+
+    results = {}
+    with evaluation_date(curves.today):
+        swaps = chunk[products == 'irs']
+        if len(swaps):
+            if 'spread' in swaps.columns:
+                # a mixed book shares the column with the CDS running spreads
+                swaps = swaps.assign(spread=swaps['spread'].fillna(0.0))
+            jacobian = curves.swap()
+            portfolio = SwapPortfolio(swaps, jacobian.curve)
+            frame = pd.DataFrame({
+                'trade_id': swaps['trade_id'].values,
+                'npv': portfolio.npv(),
+                'fair_rate': portfolio.fair_rate(),
+            })
+            results['irs'] = pd.concat([frame, _ladder(jacobian, portfolio, 'delta')], axis=1)
+
+        credit = chunk[products == 'cds']
+        if len(credit):
+            names = credit['name'].fillna(DEFAULT_NAME) if 'name' in credit.columns else \
+                pd.Series(DEFAULT_NAME, index=credit.index)
+            frames = []
+            for name, trades in credit.groupby(names, sort=False):
+                jacobian = curves.hazard(name)
+                portfolio = CdsPortfolio(trades, jacobian.curve, jacobian.discount_curve)
+                frame = pd.DataFrame({
+                    'trade_id': trades['trade_id'].values,
+                    'name': name,
+                    'npv': portfolio.npv(),
+                    'fair_spread': portfolio.fair_spread(),
+                })
+                frames.append(pd.concat([frame, _ladder(jacobian, portfolio, 'cs01')], axis=1))
+            results['cds'] = pd.concat(frames, ignore_index=True)
+    return results
+
+
+def write_part(frame, path, fmt):
+    # next to the target and swapped in, so a crash never leaves a partial part behind
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    if fmt == 'parquet':
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+class Checkpoint():
+    # chunks a run has written, saved after every chunk so a failed run resumes where it stopped
+    # a checkpoint only resumes the same run: same date, trade file (unchanged), chunk size and format
+    def __init__(self, path, run):
+        self.path = path
+        self.run = run
+        self.done = set()
+        self.trades = 0
+        self.seconds = 0.0
+
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state['run'] != run:
+                raise ValueError("checkpoint {} belongs to another run: {}".format(path, state['run']))
+            self.done = set(state['done'])
+            self.trades = state['trades']
+            self.seconds = state['seconds']
+
+    def mark(self, chunk, trades, seconds):
+        self.done.add(chunk)
+        self.trades += trades
+        self.seconds += seconds
+        state = {'run': self.run, 'done': sorted(self.done), 'trades': self.trades, 'seconds': self.seconds}
+        tmp_path = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+
+def run_eod(trades_path, today, output_dir, chunk_size=10000, fmt=None, curves=None, progress=None):
+    # prices the book in `trades_path` as of `today` chunk by chunk into
+    # output_dir/<product>/part-<chunk>.<fmt>, one part per chunk and product
+    # fmt defaults to parquet when pyarrow is installed, csv otherwise
+    # progress(chunk, trades, trades_per_second) is called after every chunk
+    fmt = fmt or ('parquet' if parquet_available() else 'csv')
+    curves = curves or EodCurves(today)
+    os.makedirs(output_dir, exist_ok=True)
+    # the trade file is identified by its path, size and modification time, a rewritten book starts afresh
+    stat = os.stat(trades_path)
+    run = {'date': str(today), 'trades': os.path.abspath(trades_path), 'size': stat.st_size,
+           'mtime_ns': stat.st_mtime_ns, 'chunk_size': chunk_size, 'format': fmt}
+    checkpoint = Checkpoint(os.path.join(output_dir, 'checkpoint.json'), run)
+    resumed = len(checkpoint.done)
+
+    # throughput counts reading and writing as well as pricing
+    offset, start = 0, time.perf_counter()
+    for index, chunk in enumerate(read_trades(trades_path, chunk_size)):
+        size = len(chunk)
+        if 'trade_id' not in chunk.columns:
+            # row numbers of the file, stable across resumed runs
+            chunk['trade_id'] = range(offset, offset + size)
+        offset += size
+        if index in checkpoint.done:
+            start = time.perf_counter()
+            continue
+
+        with span('eod.chunk', chunk=index, trades=size):
+            for product, frame in price_chunk(chunk, curves).items():
+                directory = os.path.join(output_dir, product)
+                os.makedirs(directory, exist_ok=True)
+                write_part(frame, os.path.join(directory, 'part-{:05d}.{}'.format(index, fmt)), fmt)
+        now = time.perf_counter()
+        checkpoint.mark(index, size, now - start)
+        start = now
+
+        if progress is not None:
+            progress(index, checkpoint.trades, checkpoint.trades / checkpoint.seconds)
+
+    return {
+        'trades': checkpoint.trades,
+        'chunks': len(checkpoint.done),
+        'resumed_chunks': resumed,
+        'seconds': checkpoint.seconds,
+        'trades_per_second': checkpoint.trades / checkpoint.seconds if checkpoint.seconds else 0.0,
+    }
+
+
+def read_results(output_dir, product='irs'):
+    # all parts of one product back as a single frame
+    import pandas as pd
+    directory = os.path.join(output_dir, product)
+    parts = sorted(name for name in os.listdir(directory) if name.startswith('part-') and not name.endswith('.tmp'))
+    frames = [pd.read_parquet(os.path.join(directory, name)) if name.endswith('.parquet')
+              else pd.read_csv(os.path.join(directory, name)) for name in parts]
+    return pd.concat(frames, ignore_index=True)
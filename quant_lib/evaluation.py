@@ -0,0 +1,49 @@
+import datetime
+import threading
+import contextlib
+
+import QuantLib as ql
+
+
+# ql.Settings.evaluationDate is process global, code that moves it temporarily holds this lock
+evaluation_lock = threading.RLock()
+
+
+@contextlib.contextmanager
+def evaluation_date(date):
+    if isinstance(date, datetime.date):
+        date = ql.Date(date.day, date.month, date.year)
+
+    with evaluation_lock:
+        settings = ql.Settings.instance()
+        previous = settings.evaluationDate
+        # every assignment notifies all observers, even of the same date, and makes
+        # every curve in memory recalculate, so leave an unchanged date alone
+        if date != previous:
+            settings.evaluationDate = date
+        try:
+            yield date
+        finally:
+            if settings.evaluationDate != previous:
+                settings.evaluationDate = previous
+
+
+def roll_down(value, today, days=1):
+    # the theta convention of the library, every pricer uses it: constant-tenor roll-down
+    # quotes are unchanged and keep their tenors, so floating curves (see curve_reference) slide
+    # forward with the evaluation date while the book's cash flows stay where they are
+    # value(date) prices the book as of `date`, theta is value(today + days) - value(today)
+    later = today + datetime.timedelta(days=days)
+    with evaluation_date(today):
+        before = value(today)
+        with evaluation_date(later):
+            after = value(later)
+    return after - before
+
+
+def curve_reference(todays_date, floating=False):
+    # reference date arguments of a piecewise curve: fixed at todays_date,
+    # or following ql.Settings.evaluationDate (used by floating live curves)
+    if floating:
+        return (0, ql.NullCalendar())
+    return (todays_date,)
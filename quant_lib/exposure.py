@@ -0,0 +1,285 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+import QuantLib as ql
+
+from quant_lib.discount_kernel import CurveKernel, period_year_fractions
+from quant_lib.credit_kernel import HazardKernel
+from quant_lib.irs_portfolio import SwapPortfolio, schedule, to_ql_date, trade_rows
+from quant_lib.profiling import traced, span
+
+
+class HullWhite():
+    # one-factor Hull-White fitted to the initial curve, r(t) = x(t) + alpha(t) with
+    # dx = -a x dt + sigma dW, x(0) = 0; x and its integral are simulated exactly on the grid
+    def __init__(self, mean_reversion=0.03, volatility=0.01):
+        self.a = mean_reversion
+        self.sigma = volatility
+
+    def bond_factor(self, t, maturities):
+        # B(t, T)
+        return (1.0 - np.exp(-self.a * (maturities - t))) / self.a
+
+    def x_variance(self, t):
+        return self.sigma ** 2 / (2 * self.a) * (1.0 - np.exp(-2 * self.a * t))
+
+    def integral_variance(self, t):
+        # variance of the integral of x over [0, t]
+        a = self.a
+        return self.sigma ** 2 / a ** 2 * (t - 2 * (1.0 - np.exp(-a * t)) / a + (1.0 - np.exp(-2 * a * t)) / (2 * a))
+
+    def bond_terms(self, t, maturities):
+        # P(t, T) = P(0, T) / P(0, t) * exp(-B x(t) - convexity)
+        b = self.bond_factor(t, maturities)
+        drift = self.sigma ** 2 / (2 * self.a ** 2) * (1.0 - np.exp(-self.a * t)) ** 2
+        return b, 0.5 * b ** 2 * self.x_variance(t) + b * drift
+
+    def simulate(self, times, paths, rng):
+        # (paths x times) x and integral of x, exact joint Gaussian steps
+        a, sigma = self.a, self.sigma
+        x = np.zeros((paths, len(times)))
+        integral = np.zeros((paths, len(times)))
+        for k, h in enumerate(np.diff(times), start=1):
+            decay = np.exp(-a * h)
+            var_x = self.x_variance(h)
+            var_i = self.integral_variance(h)
+            cov = sigma ** 2 / (2 * a ** 2) * (1.0 - decay) ** 2
+            z1, z2 = rng.standard_normal((2, paths))
+            shock_x = np.sqrt(var_x) * z1
+            shock_i = cov / np.sqrt(var_x) * z1 + np.sqrt(max(var_i - cov ** 2 / var_x, 0.0)) * z2
+            x[:, k] = x[:, k - 1] * decay + shock_x
+            integral[:, k] = integral[:, k - 1] + x[:, k - 1] * (1.0 - decay) / a + shock_i
+        return x, integral
+
+    def deflators(self, times, discounts, integral):
+        # exp(-integral of r) on each path, averaging to the initial curve's discount factors
+        return discounts * np.exp(-integral - 0.5 * self.integral_variance(times))
+
+
+def exposure_grid(reference_date, last_date, monthly_years=1, step_months=3):
+    # serials of the reference date, every month for `monthly_years`, then every `step_months` to last_date
+    reference_date = to_ql_date(reference_date)
+    last = to_ql_date(last_date).serialNumber()
+    serials, months = [reference_date.serialNumber()], 0
+    while serials[-1] < last:
+        months += 1 if months < 12 * monthly_years else step_months
+        serials.append(min((reference_date + ql.Period(months, ql.Months)).serialNumber(), last))
+    return np.array(serials, dtype=np.int64)
+
+
+# value dates of Libor fixings on accrual dates, shared across books
+_value_dates = {}
+
+
+def _value_date(index, serial):
+    # the accrual date moved back to its fixing and forward to the fixing's value date (fixing calendar)
+    key = (index.name(), serial)
+    if key not in _value_dates:
+        calendar, days = index.fixingCalendar(), index.fixingDays()
+        fixing = calendar.advance(ql.Date(int(serial)), -days, ql.Days)
+        _value_dates[key] = calendar.advance(fixing, days, ql.Days).serialNumber()
+    return _value_dates[key]
+
+
+class _Book():
+    # cashflows of an IRS netting set as flat NumPy arrays (picklable for worker processes)
+    # fixed coupons pay `amount` on `pay`; Libor coupons are par coupons projected over their
+    # index period [start, end], worth notional * (P(t, start) - P(t, end)) * P(0, pay) / P(0, end)
+    # plus the spread before they fix (exact when paid at the index end, as almost all are)
+    def __init__(self, trades, kernel):
+        conventions = SwapPortfolio([])
+        index = conventions.float_index
+        reference = kernel.reference_date.serialNumber()
+        fixed, floating = [], []
+
+        for trade in trades:
+            start, end = to_ql_date(trade['pricing_date']), to_ql_date(trade['maturity_date'])
+            # payer (long) pays fixed and receives Libor
+            sign = 1.0 if trade['position'] == 'long' else -1.0
+            notional = trade['notional']
+
+            dates = np.array([d.serialNumber() for d in schedule(start, end, conventions.fixed_tenor,
+                                                                  conventions.calendar, conventions.convention)])
+            fractions = period_year_fractions(conventions.day_counter, dates[:-1], dates[1:])
+            fixed.append(np.column_stack([dates[1:], -sign * notional * trade['irs_rate'] * fractions]))
+
+            dates = np.array([d.serialNumber() for d in schedule(start, end, conventions.float_tenor,
+                                                                  conventions.calendar, conventions.convention)])
+            values = np.array([_value_date(index, serial) for serial in dates])
+            starts, ends = values[:-1], np.maximum(values[1:], values[:-1] + 1)
+            fractions = period_year_fractions(conventions.day_counter, dates[:-1], dates[1:])
+            spanning = period_year_fractions(index.dayCounter(), starts, ends)
+            rows = np.column_stack([
+                starts, ends, dates[1:], sign * notional * fractions / spanning,
+                sign * notional * trade.get('spread', 0.0) * fractions,
+            ])
+            if np.any((rows[:, 0] < reference) & (rows[:, 2] > reference)):
+                raise ValueError("a Libor coupon fixed before {}, exposure needs trades starting "
+                                 "on or after the curve date".format(kernel.reference_date))
+            floating.append(rows)
+
+        fixed = np.vstack(fixed) if fixed else np.empty((0, 2))
+        floating = np.vstack(floating) if floating else np.empty((0, 5))
+        fixed = fixed[fixed[:, 0] > reference]
+        floating = floating[floating[:, 2] > reference]
+
+        # every date a cashflow depends on, with its curve time and initial discount factor
+        self.serials, position = np.unique(
+            np.concatenate([fixed[:, 0], floating[:, 0], floating[:, 1], floating[:, 2]]).astype(np.int64),
+            return_inverse=True)
+        self.times = kernel.time(self.serials)
+        self.discounts = kernel.discount_t(self.times)
+
+        n_fixed, n_float = len(fixed), len(floating)
+        self.fixed_pay = position[:n_fixed]
+        self.fixed_amount = fixed[:, 1]
+        self.float_start, self.float_end, self.float_pay = \
+            position[n_fixed:].reshape(3, n_float) if n_float else (position[:0],) * 3
+        self.float_notional = floating[:, 3]
+        self.float_spread = floating[:, 4]
+        # payment date discounting relative to the index end, 1 unless the two differ
+        self.float_scale = self.discounts[self.float_pay] / self.discounts[self.float_end]
+        self.maturity = int(self.serials[-1]) if len(self.serials) else reference
+
+    def weights(self, t):
+        # weights on P(t, date) of what is known at t: cashflows still to be paid, coupons not yet
+        # fixed, and the spread less the notional of coupons fixed before t and paid after it
+        times, size = self.times, len(self.times)
+        pending = times[self.fixed_pay] > t
+        weights = np.bincount(self.fixed_pay[pending], self.fixed_amount[pending], minlength=size)
+
+        future = times[self.float_start] >= t
+        scaled = self.float_notional[future] * self.float_scale[future]
+        weights += np.bincount(self.float_start[future], scaled, minlength=size)
+        weights -= np.bincount(self.float_end[future], scaled, minlength=size)
+
+        pending = times[self.float_pay] > t
+        weights += np.bincount(self.float_pay[pending], self.float_spread[pending], minlength=size)
+        fixed = pending & ~future
+        weights -= np.bincount(self.float_pay[fixed], self.float_notional[fixed], minlength=size)
+        return weights
+
+    def fixed_coupons(self, t):
+        # (start, end, pay) of the coupons fixed before t and paid after it, with their summed
+        # notionals: these pay notional * P(t_fix, start) / P(t_fix, end) at `pay`
+        times = self.times
+        fixed = (times[self.float_start] < t) & (times[self.float_pay] > t)
+        periods, group = np.unique(
+            np.column_stack([self.float_start[fixed], self.float_end[fixed], self.float_pay[fixed]]),
+            axis=0, return_inverse=True)
+        return periods.T, np.bincount(group.ravel(), self.float_notional[fixed], minlength=len(periods))
+
+
+class SwapExposure():
+    # Monte Carlo exposure of an IRS netting set (SwapPortfolio trade layout) under Hull-White:
+    # the book is revalued analytically from the model's discount bonds on every path and grid date
+    # Libor coupons fix on the last grid date on or before their start
+    def __init__(self, trades, curve, model=None, grid=None):
+        self.kernel = curve if isinstance(curve, CurveKernel) else CurveKernel.from_curve(curve)
+        self.model = model or HullWhite()
+        self.book = _Book(trade_rows(trades), self.kernel)
+
+        reference = self.kernel.reference_date
+        self.grid = exposure_grid(reference, ql.Date(self.book.maturity)) if grid is None else np.asarray(grid)
+        self.dates = [ql.Date(int(serial)).to_date() for serial in self.grid]
+        self.times = self.kernel.time(self.grid)
+        self.discounts = self.kernel.discount_t(self.times)
+
+    def values(self, x, integral):
+        # (paths x grid) netting set values and deflators of simulated model states
+        return _values(self.model, self.book, self.times, self.discounts, x, integral)
+
+    @traced
+    def simulate(self, paths=10000, seed=0, block_size=1000, max_workers=1):
+        # blocks of `block_size` paths bound memory, each block draws from its own seed so the result
+        # does not depend on the number of workers; the model and book must be picklable then
+        seeds = np.random.SeedSequence(seed).spawn((paths + block_size - 1) // block_size)
+        blocks = [(start, min(block_size, paths - start), seeds[i])
+                  for i, start in enumerate(range(0, paths, block_size))]
+        values = np.empty((paths, len(self.grid)))
+        deflators = np.empty((paths, len(self.grid)))
+
+        initargs = (self.model, self.book, self.times, self.discounts)
+        if max_workers == 1:
+            _init_worker(*initargs)
+            _collect((_run_block(*block) for block in blocks), values, deflators)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=initargs) as executor:
+                futures = [executor.submit(_run_block, *block) for block in blocks]
+                _collect((future.result() for future in futures), values, deflators)
+        return values, deflators
+
+    def profile(self, paths=10000, seed=0, block_size=1000, max_workers=1, quantile=0.95):
+        values, deflators = self.simulate(paths, seed, block_size, max_workers)
+        return exposure_profile(values, deflators, self.dates, quantile)
+
+
+def _values(model, book, times, discounts, x, integral):
+    values = np.zeros(x.shape)
+    for k, t in enumerate(times):
+        weights = book.weights(t)
+        alive = np.nonzero(weights)[0]
+        if len(alive):
+            b, convexity = model.bond_terms(t, book.times[alive])
+            scaled = weights[alive] * book.discounts[alive] / discounts[k] * np.exp(-convexity)
+            values[:, k] = np.exp(-np.outer(x[:, k], b)) @ scaled
+
+        (starts, ends, pays), notionals = book.fixed_coupons(t)
+        if len(notionals):
+            # fixing ratio P(t_g, start) / P(t_g, end) on the fixing grid date g of each coupon
+            g = np.searchsorted(times, book.times[starts], side='right') - 1
+            b_start, c_start = model.bond_terms(times[g], book.times[starts])
+            b_end, c_end = model.bond_terms(times[g], book.times[ends])
+            ratio = book.discounts[starts] / book.discounts[ends] \
+                * np.exp(-(b_start - b_end) * x[:, g] - (c_start - c_end))
+            b_pay, c_pay = model.bond_terms(t, book.times[pays])
+            pay = book.discounts[pays] / discounts[k] * np.exp(-b_pay * x[:, k:k + 1] - c_pay)
+            values[:, k] += (ratio * pay) @ notionals
+
+    return values, model.deflators(times, discounts, integral)
+
+
+def _collect(results, values, deflators):
+    for start, block_values, block_deflators in results:
+        values[start:start + len(block_values)] = block_values
+        deflators[start:start + len(block_deflators)] = block_deflators
+
+
+# state of each worker process: the model, the book and the grid
+_worker = {}
+
+
+def _init_worker(model, book, times, discounts):
+    _worker.update(model=model, book=book, times=times, discounts=discounts)
+
+
+def _run_block(start, paths, seed):
+    model, book, times, discounts = _worker['model'], _worker['book'], _worker['times'], _worker['discounts']
+    with span('exposure.block', paths=paths):
+        x, integral = model.simulate(times, paths, np.random.default_rng(seed))
+        values, deflators = _values(model, book, times, discounts, x, integral)
+    return start, values, deflators
+
+
+def exposure_profile(values, deflators, dates, quantile=0.95):
+    # expected positive / negative exposure and potential future exposure per grid date,
+    # plus the discounted expected exposures CVA integrates
+    values, deflators = np.asarray(values), np.asarray(deflators)
+    positive, negative = np.maximum(values, 0.0), np.minimum(values, 0.0)
+    return pd.DataFrame({
+        'epe': positive.mean(axis=0),
+        'ene': negative.mean(axis=0),
+        'pfe': np.quantile(values, quantile, axis=0),
+        'discounted_epe': (positive * deflators).mean(axis=0),
+        'discounted_ene': (negative * deflators).mean(axis=0),
+    }, index=pd.Index(dates, name='date'))
+
+
+def cva(profile, hazard_curve, recovery_rate=0.4):
+    # (1 - R) * sum of discounted EPE times the counterparty's default probability over each grid period
+    kernel = hazard_curve if isinstance(hazard_curve, HazardKernel) else HazardKernel.from_curve(hazard_curve)
+    survival = kernel.survival(np.array([ql.Date(d.day, d.month, d.year).serialNumber() for d in profile.index]))
+    defaults = -np.diff(survival)
+    return (1.0 - recovery_rate) * float(np.sum(profile['discounted_epe'].values[1:] * defaults))
+
@@ -1,35 +1,41 @@
 import os
 import datetime
+import functools
 import numpy as np
-import pandas as pd
-
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 import QuantLib as ql
 
+from quant_lib.market_data import MARKET_DATA_DIR, read_sheet
+from quant_lib.quote import preprocess_quote, as_quote_record, simple_quote
+from quant_lib.evaluation import curve_reference, evaluation_date, roll_down
+from quant_lib.curve_cache import curve_registry
+from quant_lib.profiling import traced, bootstrapped
+from quant_lib import report
+from quant_lib.discount_kernel import CurveKernel, period_year_fractions
+from quant_lib.irs_portfolio import schedule, to_ql_date, trade_rows
+
 
 
+@traced
 def get_quote(today, ticker):
 
     if ticker in ['USD', 'usd']:
-        curve = pd.read_excel(os.path.join("/mnt/c/workspace/project_FICC_Quant/market_data/fx_swap_data.xlsx"),index_col='Tenor', sheet_name='USDIRS')
+        curve = read_sheet(os.path.join(MARKET_DATA_DIR, "fx_swap_data.xlsx"), index_col='Tenor', sheet_name='USDIRS')
     elif ticker in ['KRW', 'krw']:
-        curve = pd.read_excel(os.path.join("/mnt/c/workspace/project_FICC_Quant/market_data/fx_swap_data.xlsx"),index_col='Tenor', sheet_name='KRWCCS')
+        curve = read_sheet(os.path.join(MARKET_DATA_DIR, "fx_swap_data.xlsx"), index_col='Tenor', sheet_name='KRWCCS')
+    else:
+        raise ValueError("unknown ticker {}".format(ticker))
 
     # pre-processing dataframe
-    curve['DaysToMaturity'] = np.nan
-    curve['Maturity'] = pd.to_datetime(quote['Maturity']).dt.date
-
-    for tenor in curve.index:
-        curve.loc[tenor, 'DaysToMaturity'] = (curve.loc[tenor, 'Maturity'] - today).days
-    return curve
+    return preprocess_quote(curve, today)
 
-def usdirs_curve(today, quote):
-    # Divide DataFrame into 3 Parts
-    depo = quote[quote['InstType'] == 'CASH']
-    futures = quote[quote['InstType'] == 'FUTURE']
-    swap = quote[quote['InstType'] == 'SWAP']
+@traced
+def usdirs_curve(today, quote, quotes=None, floating=False, helper_list=None):
+    # Divide Quotes into 3 Parts
+    quote = as_quote_record(quote, today)
+    depo = quote.select('CASH')
+    futures = quote.select('FUTURE')
+    swap = quote.select('SWAP')
 
     # Set Evaluation Date
     todays_date = ql.Date(today.day, today.month, today.year)
@@ -44,23 +50,19 @@ def usdirs_curve(today, quote):
         
     # Build Rate Helpers
     # 1. Deposit Rate Helper
-    depositHelpers = [ql.DepositRateHelper(ql.QuoteHandle(ql.SimpleQuote(rate / 100)),
+    depositHelpers = [ql.DepositRateHelper(ql.QuoteHandle(simple_quote(quotes, tenor, rate / 100)),
                                            ql.Period(int(day), ql.Days),
                                            settlementDays,
                                            calendar,
                                            convention,
                                            False,
                                            dayCounter)
-                      for day, rate in zip(depo['DaysToMaturity'], depo['Market.Mid'])]
+                      for tenor, day, rate in zip(depo.tenors, depo.days, depo.mids)]
     
     # 2. Futures Rate Helper
     futuresHelpers = []
-    for i, price in enumerate(futures['Market.Mid']):
-        iborStartDate = ql.Date(futures['Maturity'][i].day,
-                                futures['Maturity'][i].month,
-                                futures['Maturity'][i].year)
-        
-        futuresHelper = ql.FuturesRateHelper(ql.QuoteHandle(ql.SimpleQuote(price)),
+    for tenor, iborStartDate, price in zip(futures.tenors, futures.maturity_dates(), futures.mids):
+        futuresHelper = ql.FuturesRateHelper(ql.QuoteHandle(simple_quote(quotes, tenor, price)),
                                              iborStartDate,
                                              3,
                                              calendar,
@@ -70,26 +72,30 @@ def usdirs_curve(today, quote):
         futuresHelpers.append(futuresHelper)
     
     # 3. Swap Rate Helper
-    swapHelpers = [ql.SwapRateHelper(ql.QuoteHandle(ql.SimpleQuote(rate / 100)),
+    swapHelpers = [ql.SwapRateHelper(ql.QuoteHandle(simple_quote(quotes, tenor, rate / 100)),
                                      ql.Period(int(day), ql.Days),
                                      calendar,
                                      frequency,
                                      convention,
                                      dayCounter,
                                      ql.Euribor3M())
-                   for day, rate in zip(swap['DaysToMaturity'], swap['Market.Mid'])]
+                   for tenor, day, rate in zip(swap.tenors, swap.days, swap.mids)]
     
     # Curve Construction
     helpers = depositHelpers + futuresHelpers + swapHelpers
-    depoFuturesSwapCurve = ql.PiecewiseLinearZero(todays_date, helpers, dayCounter)
+    if helper_list is not None:
+        helper_list.extend(helpers)
+    depoFuturesSwapCurve = ql.PiecewiseLinearZero(*curve_reference(todays_date, floating), helpers, dayCounter)
         
-    return depoFuturesSwapCurve
+    return bootstrapped(depoFuturesSwapCurve, 'usdirs_curve', helpers=len(helpers))
 
-def krwccs_curve(today, quote):
+@traced
+def krwccs_curve(today, quote, quotes=None, floating=False, helper_list=None):
     
-    # Divide DataFrame into 3 Parts
-    depo = quote[quote['InstType'] == 'CASH']
-    swap = quote[quote['InstType'] == 'SWAP']
+    # Divide Quotes into 2 Parts
+    quote = as_quote_record(quote, today)
+    depo = quote.select('CASH')
+    swap = quote.select('SWAP')
 
     # Set Evaluation Date
     todays_date = ql.Date(today.day, today.month, today.year)
@@ -104,37 +110,221 @@ def krwccs_curve(today, quote):
         
     # Build Rate Helpers
     # 1. Deposit Rate Helper
-    depositHelpers = [ql.DepositRateHelper(ql.QuoteHandle(ql.SimpleQuote(rate / 100)),
+    depositHelpers = [ql.DepositRateHelper(ql.QuoteHandle(simple_quote(quotes, tenor, rate / 100)),
                                            ql.Period(int(day), ql.Days),
                                            settlementDays,
                                            calendar,
                                            convention,
                                            False,
                                            dayCounter)
-                      for day, rate in zip(depo['DaysToMaturity'], depo['Market.Mid'])]
+                      for tenor, day, rate in zip(depo.tenors, depo.days, depo.mids)]
     
     # 2. Swap Rate Helper
-    swapHelpers = [ql.SwapRateHelper(ql.QuoteHandle(ql.SimpleQuote(rate / 100)),
+    swapHelpers = [ql.SwapRateHelper(ql.QuoteHandle(simple_quote(quotes, tenor, rate / 100)),
                                      ql.Period(int(day), ql.Days),
                                      calendar,
                                      frequency,
                                      convention,
                                      dayCounter,
                                      ql.Euribor3M())
-                   for day, rate in zip(swap['DaysToMaturity'], swap['Market.Mid'])]
+                   for tenor, day, rate in zip(swap.tenors, swap.days, swap.mids)]
     
     # Curve Construction
     helpers = depositHelpers + swapHelpers
-    depoFuturesSwapCurve = ql.PiecewiseLinearZero(todays_date, helpers, dayCounter)
+    if helper_list is not None:
+        helper_list.extend(helpers)
+    depoFuturesSwapCurve = ql.PiecewiseLinearZero(*curve_reference(todays_date, floating), helpers, dayCounter)
         
-    return depoFuturesSwapCurve
+    return bootstrapped(depoFuturesSwapCurve, 'krwccs_curve', helpers=len(helpers))
+ 
+# calendar of the CCS legs, payment dates are cached per (date, lag, convention) across engines and books
+CCS_CALENDAR = ql.JointCalendar(ql.SouthKorea(), ql.UnitedStates())
+
+
+@functools.lru_cache(maxsize=100000)
+def payment_date(serial, lag, convention):
+    return CCS_CALENDAR.advance(ql.Date(serial), lag, ql.Days, convention).serialNumber()
+
+
+class CrossCurrencyEngine():
+    # KRW/USD FX forwards and fix(KRW)/float(USD) CCS priced in bulk off one USD IRS and one
+    # KRW CCS curve per date, with the conventions of the FX forward and CCS notebooks
+    # values are in KRW, sensitivities as in the notebooks: FX delta for a 1% spot move,
+    # IR deltas for a 1bp parallel zero spread (ZeroSpreadedTermStructure), theta over `theta_days`
+    # under the roll-down convention of evaluation.roll_down
+    def __init__(self, today, fx_spot, registry=None, usd_curve=None, krw_curve=None):
+        self.today = today
+        self.fx_spot = fx_spot
+        self.registry = registry or curve_registry
+
+        # curves are bootstrapped once per date and shared through the registry,
+        # unless the caller holds its own (e.g. the floating curves of rolled or a server's live curves)
+        self.usd_curve = usd_curve or self.registry.get(usdirs_curve, today, get_quote(today, 'USD'))
+        self.krw_curve = krw_curve or self.registry.get(krwccs_curve, today, get_quote(today, 'KRW'))
+        self.usd = CurveKernel.from_curve(self.usd_curve)
+        self.krw = CurveKernel.from_curve(self.krw_curve)
+        self.reference = self.usd.reference_date.serialNumber()
+
+        # CCS conventions
+        self.calendar = CCS_CALENDAR
+        self.convention = ql.ModifiedFollowing
+        self.tenor = ql.Period(6, ql.Months)
+        self.payment_lag = 2
+        self.fixed_day_count = ql.Actual365Fixed()
+        self.float_day_count = ql.Actual360()
+        self._floating = None
+
+    def rolled(self, days=1):
+        # this engine's market `days` later, rolled down as in evaluation.roll_down
+        today = self.today + datetime.timedelta(days=days)
+        with evaluation_date(today):
+            return self._floating_engine(today)
+
+    def _floating_engine(self, today):
+        # engine on floating copies of the curves as of the current evaluation date
+        if self._floating is None:
+            with evaluation_date(self.today):
+                self._floating = (usdirs_curve(self.today, get_quote(self.today, 'USD'), floating=True),
+                                  krwccs_curve(self.today, get_quote(self.today, 'KRW'), floating=True))
+        return CrossCurrencyEngine(today, self.fx_spot, self.registry, *self._floating)
+
+    def forward_rates(self, maturity_dates):
+        # covered interest parity: KRW per USD for delivery on each date
+        return self.fx_spot * self.usd.discount(maturity_dates) / self.krw.discount(maturity_dates)
+
+    @traced
+    def price_fx_forwards(self, trades, theta_days=1):
+        # trades: maturity_date, fx_forward (contract rate), usd_notional, position ('long' buys USD)
+        trades = trade_rows(trades)
+        maturities = np.array([to_ql_date(trade['maturity_date']).serialNumber() for trade in trades])
+        usd_notional = np.array([trade['usd_notional'] for trade in trades], dtype=float)
+        krw_notional = usd_notional * np.array([trade['fx_forward'] for trade in trades], dtype=float)
+        sign = np.array([1.0 if trade['position'] == 'long' else -1.0 for trade in trades])
+
+        def value(engine, spot=None, usd_shift=0.0, krw_shift=0.0):
+            alive = maturities > engine.reference
+            usd_leg = usd_notional * engine._discount(engine.usd, maturities, usd_shift)
+            krw_leg = krw_notional * engine._discount(engine.krw, maturities, krw_shift)
+            return np.where(alive, sign * (usd_leg * (engine.fx_spot if spot is None else spot) - krw_leg), 0.0)
+
+        return self._sensitivities(value, theta_days)
+
+    @traced
+    def price_ccs(self, trades, theta_days=1):
+        # trades: effective_date, maturity_date, ccs_rate, usd_notional, position ('long' pays KRW fixed),
+        # optional spread on USD Libor 6M, fx_rate of the notional exchange (defaults to spot) and
+        # fixing of a USD coupon that has already started
+        trades = trade_rows(trades)
+        legs = self._ccs_legs(trades)
+
+        def value(engine, spot=None, usd_shift=0.0, krw_shift=0.0):
+            krw_value = engine._leg_value(engine.krw, legs['krw_dates'], legs['krw_amounts'], krw_shift)
+            usd_value = engine._leg_value(engine.usd, legs['usd_dates'], legs['usd_amounts'], usd_shift)
+            usd_value = usd_value + engine._float_value(legs, usd_shift)
+            return krw_value + usd_value * (engine.fx_spot if spot is None else spot)
+
+        return self._sensitivities(value, theta_days)
+
+    def _sensitivities(self, value, theta_days):
+        import pandas as pd
+        basis_point = 0.0001
+        percentage = 0.01
+        npv = value(self)
+        result = pd.DataFrame({
+            'npv': npv,
+            'fx_delta': (value(self, self.fx_spot * (1 + percentage)) - value(self, self.fx_spot * (1 - percentage))) / 2,
+            'usd_ir_delta': (value(self, usd_shift=basis_point) - value(self, usd_shift=-basis_point)) / 2,
+            'krw_ir_delta': (value(self, krw_shift=basis_point) - value(self, krw_shift=-basis_point)) / 2,
+        })
+        if theta_days:
+            result['theta'] = roll_down(lambda date: value(self._floating_engine(date)), self.today, theta_days)
+        return result
+
+    def _discount(self, kernel, serials, shift=0.0):
+        # discount factors under a parallel continuous zero spread
+        discounts = kernel.discount(serials)
+        if shift:
+            discounts = discounts * np.exp(-shift * kernel.time(serials))
+        return discounts
+
+    def _leg_value(self, kernel, serials, amounts, shift=0.0):
+        alive = serials > self.reference
+        return np.sum(np.where(alive, amounts * self._discount(kernel, serials, shift), 0.0), axis=1)
+
+    def _float_value(self, legs, shift=0.0):
+        # USD Libor coupons projected over their accrual period on the USD curve (par coupons)
+        starts, ends, pays = legs['float_starts'], legs['float_ends'], legs['float_pays']
+        alive = pays > self.reference
+        started = alive & (starts < self.reference)
+        fixings = legs['fixings'][:, None]
+        if np.any(started & np.isnan(fixings)):
+            raise ValueError("a USD coupon fixed before {}, pass the trade's fixing".format(self.today))
+
+        projected = self._discount(self.usd, np.maximum(starts, self.reference), shift) \
+            / self._discount(self.usd, ends, shift) - 1.0
+        fixed = fixings * legs['float_fractions']
+        interest = np.where(started, fixed, projected) + legs['spreads'][:, None] * legs['float_fractions']
+        amounts = np.where(alive, legs['float_notionals'] * interest, 0.0)
+        return np.sum(amounts * self._discount(self.usd, pays, shift), axis=1)
+
+    def _payment_date(self, date):
+        return payment_date(date.serialNumber(), self.payment_lag, self.convention)
+
+    def _ccs_legs(self, trades):
+        # padded (trades x cashflows) tables, signed from the book's point of view
+        krw_rows, usd_rows, float_rows = [], [], []
+        for trade in trades:
+            dates = list(schedule(to_ql_date(trade['effective_date']), to_ql_date(trade['maturity_date']),
+                                  self.tenor, self.calendar, self.convention))
+            usd_notional = trade['usd_notional']
+            krw_notional = usd_notional * trade.get('fx_rate', self.fx_spot)
+            # the KRW fixed leg is paid when long, the USD float leg received
+            krw_sign = -1.0 if trade['position'] == 'long' else 1.0
+            usd_sign = -krw_sign
+
+            start, end = self._payment_date(dates[0]), self._payment_date(dates[-1])
+            starts, ends = np.array([d.serialNumber() for d in dates[:-1]]), np.array([d.serialNumber() for d in dates[1:]])
+            pays = np.array([self._payment_date(d) for d in dates[1:]])
+
+            fixed_fractions = period_year_fractions(self.fixed_day_count, starts, ends)
+            krw_rows.append((
+                np.concatenate([[start], pays, [end]]),
+                krw_sign * np.concatenate([[-krw_notional], krw_notional * trade['ccs_rate'] * fixed_fractions, [krw_notional]])
+            ))
+            usd_rows.append((np.array([start, end]), usd_sign * np.array([-usd_notional, usd_notional])))
+            float_rows.append((starts, ends, pays, period_year_fractions(self.float_day_count, starts, ends),
+                               usd_sign * usd_notional))
+
+        legs = {
+            'krw_dates': _padded([dates for dates, _ in krw_rows], np.int64),
+            'krw_amounts': _padded([amounts for _, amounts in krw_rows]),
+            'usd_dates': _padded([dates for dates, _ in usd_rows], np.int64),
+            'usd_amounts': _padded([amounts for _, amounts in usd_rows]),
+            'float_starts': _padded([row[0] for row in float_rows], np.int64),
+            'float_ends': _padded([row[1] for row in float_rows], np.int64),
+            'float_pays': _padded([row[2] for row in float_rows], np.int64),
+            'float_fractions': _padded([row[3] for row in float_rows]),
+        }
+        legs['float_notionals'] = np.array([n for _, _, _, _, n in float_rows])[:, None]
+        legs['spreads'] = np.array([trade.get('spread', 0.0) for trade in trades], dtype=float)
+        legs['fixings'] = np.array([trade.get('fixing', np.nan) for trade in trades], dtype=float)
+        return legs
+
+def _padded(rows, dtype=float):
+    # one row per trade, zero padded: zero dates never count as future cashflows
+    table = np.zeros((len(rows), max((len(row) for row in rows), default=0)), dtype=dtype)
+    for i, row in enumerate(rows):
+        table[i, :len(row)] = row
+    return table
  
 # use curve to compute discount factor and zero rate
 # the curve is calcualted with module used while pricing treasury
+@traced
 def discount_factor(date, curve):
     date = ql.Date(date.day, date.month, date.year)
     return curve.discount(date)
 
+@traced
 def zero_rate(date, curve):
     date = ql.Date(date.day, date.month, date.year)
     day_counter = ql.Actual360()
@@ -150,6 +340,7 @@ def zero_rate(date, curve):
     return zero_rate
 
 # cacualte forward rate
+@traced
 def forward_rate(date, curve):
     date = ql.Date(date.day, date.month, date.year)
     day_counter = ql.Actual360()
@@ -169,33 +360,12 @@ def forward_rate(date, curve):
 
 if __name__ == "__main__":
     today = datetime.date(2020,10,9)
-    quote = get_quote(today=today)
-    curve = usdirs_curve(today=today, curve=quote)
+    quote = get_quote(today=today, ticker='USD')
+    curve = usdirs_curve(today=today, quote=quote)
 
     # calculate discount factor/ zero rate/ forward rate
-    quote['discount_factor'], quote['zero_rate'], quote['forward_rate'] = np.nan, np.nan, np.nan
-
-    for tenor, date in zip(quote.index, quote['Maturity']):
-        quote.loc[tenor, 'discount_factor'] = discount_factor(date, curve)
-        quote.loc[tenor, 'zero_rate'] = zero_rate(date, curve) * 100
-        quote.loc[tenor, 'forward_rate'] = forward_rate(date, curve) * 100
-
+    quote = report.curve_table(quote, curve, discount_factor, zero_rate, forward_rate)
     print(quote[['discount_factor', 'zero_rate', 'forward_rate']])
 
     # plot the result
-    plt.figure(figsize=(16,8))
-    plt.plot(quote['zero_rate'], 'b-', label='zero curve')
-    plt.plot(quote['forward_rate'], 'g-', label='forward curve')
-    plt.title('zero and forward curve', loc='center')
-    plt.legend()
-    plt.xlabel('maturity')
-    plt.ylabel('interst rate')
-
-
-    # plot the result
-    plt.figure(figsize=(16,8))
-    plt.plot(quote['discount_factor'], 'r-', label='discount curve')
-    plt.title('discount curve', loc='center')
-    plt.legend()
-    plt.xlabel('maturity')
-    plt.ylabel('discount factor')
\ No newline at end of file
+    report.plot_curve(quote)
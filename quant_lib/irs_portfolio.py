@@ -0,0 +1,115 @@
+import sys
+import numpy as np
+
+import QuantLib as ql
+
+from quant_lib.profiling import traced
+
+
+# schedules shared across trades and portfolios, dropped once there are more than
+# SCHEDULE_CACHE_SIZE so streaming a large book does not grow memory without bound
+_schedules = {}
+SCHEDULE_CACHE_SIZE = 100000
+
+
+def to_ql_date(date):
+    if isinstance(date, ql.Date):
+        return date
+    return ql.Date(date.day, date.month, date.year)
+
+
+def schedule(start, end, tenor, calendar, convention, rule=ql.DateGeneration.Backward):
+    key = (start.serialNumber(), end.serialNumber(), str(tenor), calendar.name(), convention, rule)
+    cached = _schedules.get(key)
+    if cached is None:
+        cached = ql.Schedule(start, # effectiveDate
+                             end, # terminationDate
+                             tenor, # tenor
+                             calendar, # calendar
+                             convention, # convention
+                             convention, # terminationDateConvention
+                             rule, # rule
+                             False # endOfMonth
+                    )
+        if len(_schedules) >= SCHEDULE_CACHE_SIZE:
+            _schedules.clear()
+        _schedules[key] = cached
+    return cached
+
+
+def trade_rows(trades):
+    # trades as a DataFrame or a list of dicts, a DataFrame means pandas is already loaded
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(trades, pd.DataFrame):
+        return trades.to_dict('records')
+    return list(trades)
+
+
+class SwapPortfolio():
+    # vanilla USD IRS book (conventions of the IRS notebook) priced off one curve handle
+    # index, engine and schedules are shared by every trade
+    def __init__(self, trades, curve=None):
+        self.calendar = ql.UnitedStates()
+        self.convention = ql.ModifiedPreceding
+        self.day_counter = ql.Actual360()
+
+        self.fixed_tenor = ql.Period(1, ql.Years)
+        self.float_tenor = ql.Period(3, ql.Months)
+
+        # relinking the handle reprices the whole book against another curve
+        self.curve_handle = ql.RelinkableYieldTermStructureHandle()
+        self.float_index = ql.USDLibor(ql.Period(3, ql.Months), self.curve_handle)
+        self.engine = ql.DiscountingSwapEngine(self.curve_handle)
+
+        self.trades = trade_rows(trades)
+        self.swaps = [self._swap(trade) for trade in self.trades]
+
+        if curve is not None:
+            self.link(curve)
+
+    def __len__(self):
+        return len(self.swaps)
+
+    def link(self, curve):
+        self.curve_handle.linkTo(curve)
+
+    @traced
+    def npv(self, curve=None):
+        if curve is not None:
+            self.link(curve)
+        return np.array([swap.NPV() for swap in self.swaps])
+
+    @traced
+    def fair_rate(self, curve=None):
+        if curve is not None:
+            self.link(curve)
+        return np.array([swap.fairRate() for swap in self.swaps])
+
+    def _swap(self, trade):
+        pricing_date = to_ql_date(trade['pricing_date'])
+        maturity_date = to_ql_date(trade['maturity_date'])
+
+        if trade['position'] == 'long':
+            position = ql.VanillaSwap.Payer
+        else:
+            position = ql.VanillaSwap.Receiver
+
+        fixedSchedule = schedule(pricing_date, maturity_date, self.fixed_tenor, self.calendar, self.convention)
+        floatingSchedule = schedule(pricing_date, maturity_date, self.float_tenor, self.calendar, self.convention)
+
+        irs = ql.VanillaSwap(position,
+                             trade['notional'],
+                             fixedSchedule,
+                             trade['irs_rate'],
+                             self.day_counter,
+                             floatingSchedule,
+                             self.float_index,
+                             trade.get('spread', 0.0),
+                             self.day_counter
+                )
+        irs.setPricingEngine(self.engine)
+        return irs
+
+
+def price_swaps(trades, curve):
+    return SwapPortfolio(trades, curve).npv()
@@ -0,0 +1,399 @@
+import collections
+import numpy as np
+
+import QuantLib as ql
+
+from quant_lib.quote import as_quote_record
+from quant_lib.evaluation import evaluation_date
+from quant_lib.discount_kernel import CurveKernel, to_serials
+from quant_lib.credit_kernel import HazardKernel
+from quant_lib.irs_portfolio import SwapPortfolio
+from quant_lib.cds_portfolio import CdsPortfolio
+from quant_lib.cds_curve import CDS_CALENDAR, CDS_CONVENTION, RECOVERY_RATE
+
+
+# the bootstrap sets the first node (at the reference date) equal to the second one,
+# so a curve with n helpers has n free nodes: 1..n
+
+
+class _ZeroNodes():
+    # discount factors of a PiecewiseLinearZero and their derivatives in the free zero rates
+    def __init__(self, curve):
+        self.kernel = CurveKernel.from_curve(curve)
+        self.size = len(self.kernel.times) - 1
+
+    @property
+    def values(self):
+        return self.kernel.zero_rates[1:]
+
+    def discount(self, serials):
+        # (discounts, d discounts / d nodes) for flat arrays of serials
+        kernel = self.kernel
+        t = kernel.time(serials)
+        discounts = kernel.discount_t(t)
+        return discounts, -(t * discounts)[:, None] * self._weights(t)
+
+    def _weights(self, t):
+        # d zero_yield(t) / d node values, following CurveKernel.zero_yield
+        times = self.kernel.times
+        n = len(times)
+        weights = np.zeros((len(t), n))
+        rows = np.arange(len(t))
+
+        i = np.clip(np.searchsorted(times[:-1], t, side='right') - 1, 0, n - 2)
+        u = (t - times[i]) / (times[i + 1] - times[i])
+        inside = t <= times[-1]
+        weights[rows[inside], i[inside]] += 1.0 - u[inside]
+        weights[rows[inside], i[inside] + 1] += u[inside]
+
+        # flat forward beyond the last node
+        outside = ~inside
+        t_max, step = times[-1], times[-1] - times[-2]
+        beyond = t[outside] - t_max
+        weights[rows[outside], n - 1] += (t_max + beyond * (1.0 + t_max / step)) / t[outside]
+        weights[rows[outside], n - 2] -= beyond * t_max / (step * t[outside])
+
+        weights[:, 1] += weights[:, 0]
+        return weights[:, 1:]
+
+
+class _HazardNodes():
+    # survival probabilities of a PiecewiseFlatHazardRate and their derivatives in the free hazard rates
+    def __init__(self, curve):
+        self.kernel = HazardKernel.from_curve(curve)
+        self.size = len(self.kernel.times) - 1
+
+    @property
+    def values(self):
+        return self.kernel.hazard_rates[1:]
+
+    def survival(self, serials):
+        kernel = self.kernel
+        t = np.maximum(kernel.time(serials), 0.0)
+        survival = kernel.survival_t(t)
+
+        # time spent in each backward flat segment, the last one extends forever
+        times = kernel.times
+        exposure = np.clip(t[:, None] - times[None, :-1], 0.0, None)
+        exposure[:, :-1] = np.minimum(exposure[:, :-1], np.diff(times)[None, :-1])
+        return survival, -survival[:, None] * exposure
+
+
+class _Flows():
+    # cashflows of many instruments flattened into one table, `owner` maps rows to instruments
+    def __init__(self):
+        self.rows = collections.defaultdict(list)
+        # forward periods of Ibor coupons, shared by the trades of a book
+        self.periods = {}
+
+    def add(self, kind, owner, *values):
+        self.rows[kind].append((owner,) + values)
+
+    def table(self, kind, width):
+        rows = self.rows.get(kind)
+        if not rows:
+            return np.empty((0, width))
+        return np.array(rows, dtype=float)
+
+
+def _serial(date):
+    return float(date.serialNumber())
+
+
+def _forward_period(coupon, at_par):
+    # value date, end date and index year fraction of the forward an Ibor coupon pays
+    index = coupon.index()
+    calendar = index.fixingCalendar()
+    value_date = calendar.advance(coupon.fixingDate(), index.fixingDays(), ql.Days)
+    if at_par and not coupon.isInArrears():
+        next_fixing = calendar.advance(coupon.accrualEndDate(), -coupon.fixingDays(), ql.Days)
+        end_date = max(calendar.advance(next_fixing, index.fixingDays(), ql.Days), value_date + 1)
+    else:
+        end_date = index.maturityDate(value_date)
+    return _serial(value_date), _serial(end_date), index.dayCounter().yearFraction(value_date, end_date)
+
+
+def _swap_flows(flows, owner, swap, signs):
+    # fixed coupons as plain cashflows, Ibor coupons still to be fixed as forwards over the
+    # par coupon period (ql.IborCoupon default), coupons already fixed as plain cashflows
+    # signs per leg (fixed, floating), None leaves a leg out
+    today = ql.Settings.instance().evaluationDate.serialNumber()
+    at_par = ql.IborCoupon.usingAtParCoupons()
+    periods = flows.periods
+    for leg, sign in enumerate(signs):
+        if sign is None:
+            continue
+        for cf in swap.leg(leg):
+            coupon = ql.as_floating_rate_coupon(cf)
+            fixing = coupon.fixingDate().serialNumber() if coupon is not None else None
+            if fixing is None or fixing < today:
+                flows.add('fixed', owner, _serial(cf.date()), sign * cf.amount())
+                continue
+            key = (coupon.index().name(), fixing, coupon.accrualEndDate().serialNumber(), coupon.fixingDays())
+            period = periods.get(key)
+            if period is None:
+                period = periods[key] = _forward_period(coupon, at_par)
+            value_date, end_date, spanning = period
+            accrual = sign * coupon.nominal() * coupon.accrualPeriod()
+            flows.add('float', owner, _serial(cf.date()), value_date, end_date,
+                      accrual * coupon.gearing() / spanning, accrual * coupon.spread())
+
+
+def _annuity_flows(flows, owner, swap):
+    # fixed leg value per unit of rate
+    for cf in swap.leg(0):
+        coupon = ql.as_fixed_rate_coupon(cf)
+        flows.add('fixed', owner, _serial(cf.date()), coupon.nominal() * coupon.accrualPeriod())
+
+
+def _yield_value(nodes, flows, owners):
+    # values (owners,) and gradients (owners x nodes) of fixed and float flows on a zero curve
+    value = np.zeros(owners)
+    gradient = np.zeros((owners, nodes.size))
+
+    fixed = flows.table('fixed', 3)
+    if len(fixed):
+        owner = fixed[:, 0].astype(int)
+        discounts, slopes = nodes.discount(fixed[:, 1].astype(np.int64))
+        np.add.at(value, owner, fixed[:, 2] * discounts)
+        np.add.at(gradient, owner, fixed[:, 2, None] * slopes)
+
+    floating = flows.table('float', 6)
+    if len(floating):
+        owner = floating[:, 0].astype(int)
+        pay, pay_slope = nodes.discount(floating[:, 1].astype(np.int64))
+        start, start_slope = nodes.discount(floating[:, 2].astype(np.int64))
+        end, end_slope = nodes.discount(floating[:, 3].astype(np.int64))
+        factor, spread = floating[:, 4], floating[:, 5]
+
+        amount = factor * (start / end - 1.0) + spread
+        amount_slope = factor[:, None] * (start_slope / end[:, None] - (start / end ** 2)[:, None] * end_slope)
+        np.add.at(value, owner, amount * pay)
+        np.add.at(gradient, owner, amount_slope * pay[:, None] + amount[:, None] * pay_slope)
+
+    return value, gradient
+
+
+def _yield_helper_quotes(nodes, helpers, day_counter):
+    # implied quotes of deposit, futures and swap helpers with their gradients in the nodes
+    n = len(helpers)
+    quotes = np.zeros(n)
+    gradient = np.zeros((n, nodes.size))
+
+    swaps, forward_rows = [], []
+    for j, helper in enumerate(helpers):
+        swap = helper.swap() if hasattr(helper, 'swap') else None
+        if swap is not None:
+            swaps.append((j, swap))
+        else:
+            forward_rows.append(j)
+
+    for j in forward_rows:
+        # deposit: simple forward over the helper period, futures: 100 * (1 - forward)
+        helper = helpers[j]
+        start, end = helper.earliestDate(), helper.maturityDate()
+        tau = day_counter.yearFraction(start, end)
+        discounts, slopes = nodes.discount(np.array([start.serialNumber(), end.serialNumber()]))
+        forward = (discounts[0] / discounts[1] - 1.0) / tau
+        forward_slope = (slopes[0] / discounts[1] - discounts[0] * slopes[1] / discounts[1] ** 2) / tau
+        if isinstance(helper, ql.FuturesRateHelper):
+            quotes[j], gradient[j] = 100.0 * (1.0 - forward), -100.0 * forward_slope
+        else:
+            quotes[j], gradient[j] = forward, forward_slope
+
+    if swaps:
+        # par rate: float leg value over the fixed leg annuity
+        flows, annuities = _Flows(), _Flows()
+        for k, (_, swap) in enumerate(swaps):
+            _swap_flows(flows, k, swap, (None, 1.0))
+            _annuity_flows(annuities, k, swap)
+
+        float_value, float_slope = _yield_value(nodes, flows, len(swaps))
+        annuity, annuity_slope = _yield_value(nodes, annuities, len(swaps))
+        rows = [j for j, _ in swaps]
+        quotes[rows] = float_value / annuity
+        gradient[rows] = (float_slope - quotes[rows, None] * annuity_slope) / annuity[:, None]
+
+    return quotes, gradient
+
+
+def _cds_flows(flows, owner, cds, recovery_rate, discount_curve, sign=1.0):
+    # MidPointCdsEngine terms of one contract, discount factors are fixed (only hazard risk)
+    today = ql.Settings.instance().evaluationDate
+    settlement = discount_curve.referenceDate()
+    protection_start = cds.protectionStartDate()
+    notional = cds.notional()
+    spread = cds.runningSpread()
+
+    for i, cf in enumerate(cds.coupons()):
+        if cf.date() <= settlement:
+            continue
+        coupon = ql.as_fixed_rate_coupon(cf)
+        start = protection_start if i == 0 else coupon.accrualStartDate()
+        end = coupon.accrualEndDate()
+        effective_start = today if start <= today <= end else start
+        default_date = effective_start + (end - effective_start) // 2
+
+        # per unit of running spread, so the same rows give the fair spread
+        flows.add('premium', owner, _serial(cf.date()), sign * coupon.amount() / spread,
+                  discount_curve.discount(cf.date()))
+        flows.add('default', owner, _serial(effective_start), _serial(end),
+                  sign * coupon.accruedAmount(default_date) / spread,
+                  sign * (1.0 - recovery_rate) * notional,
+                  discount_curve.discount(default_date))
+
+    rebate = cds.accrualRebate()
+    if rebate is not None and rebate.date() > settlement:
+        flows.add('rebate', owner, sign * rebate.amount() / spread * discount_curve.discount(rebate.date()))
+    return spread
+
+
+def _cds_legs(nodes, flows, owners):
+    # (premium per unit spread, protection, rebate per unit spread) values and gradients
+    premium, premium_slope = np.zeros(owners), np.zeros((owners, nodes.size))
+    protection, protection_slope = np.zeros(owners), np.zeros((owners, nodes.size))
+    rebate = np.zeros(owners)
+
+    rows = flows.table('premium', 4)
+    if len(rows):
+        owner = rows[:, 0].astype(int)
+        survival, slope = nodes.survival(rows[:, 1].astype(np.int64))
+        np.add.at(premium, owner, rows[:, 2] * survival * rows[:, 3])
+        np.add.at(premium_slope, owner, (rows[:, 2] * rows[:, 3])[:, None] * slope)
+
+    rows = flows.table('default', 7)
+    if len(rows):
+        owner = rows[:, 0].astype(int)
+        start, start_slope = nodes.survival(rows[:, 1].astype(np.int64))
+        end, end_slope = nodes.survival(rows[:, 2].astype(np.int64))
+        probability, probability_slope = start - end, start_slope - end_slope
+        accrued, claim, discount = rows[:, 3], rows[:, 4], rows[:, 5]
+        np.add.at(premium, owner, accrued * probability * discount)
+        np.add.at(premium_slope, owner, (accrued * discount)[:, None] * probability_slope)
+        np.add.at(protection, owner, claim * probability * discount)
+        np.add.at(protection_slope, owner, (claim * discount)[:, None] * probability_slope)
+
+    rows = flows.table('rebate', 2)
+    if len(rows):
+        np.add.at(rebate, rows[:, 0].astype(int), rows[:, 1])
+
+    return (premium, premium_slope), (protection, protection_slope), rebate
+
+
+def _cds_helper_quotes(nodes, helpers, discount_curve, recovery_rate, day_counter, calendar, convention,
+                       settlement_days=2):
+    # fair spreads of the CDS the SpreadCdsHelpers price, as built by QuantLib's CdsHelper:
+    # protection from evaluation date + settlement (calendar) days, IMM schedule from there
+    # to the unadjusted twentieth the helper matures on
+    flows = _Flows()
+    today = ql.Settings.instance().evaluationDate
+    protection_start = today + settlement_days
+    for j, helper in enumerate(helpers):
+        maturity = helper.maturityDate()
+        schedule = ql.Schedule(protection_start, ql.Date(20, maturity.month(), maturity.year()),
+                               ql.Period(ql.Quarterly), calendar, convention, ql.Unadjusted,
+                               ql.DateGeneration.CDS, False)
+        cds = ql.CreditDefaultSwap(ql.Protection.Buyer, 1.0, helper.quote().value(), schedule, convention,
+                                   day_counter, True, True, protection_start, ql.FaceValueClaim(),
+                                   day_counter, True, today)
+        _cds_flows(flows, j, cds, recovery_rate, discount_curve)
+
+    (premium, premium_slope), (protection, protection_slope), rebate = _cds_legs(nodes, flows, len(helpers))
+    annuity = premium - rebate
+    quotes = protection / annuity
+    gradient = (protection_slope - quotes[:, None] * premium_slope) / annuity[:, None]
+    return quotes, gradient
+
+
+class CurveJacobian():
+    # node sensitivities of a bootstrapped curve to its quotes, from the implicit function theorem:
+    # every helper reprices its quote exactly, q = f(z), so dz/dq = (df/dz)^-1
+    # trade sensitivities to the nodes then map to par-quote deltas with one matrix product
+    def __init__(self, curve, tenors, helpers, scales, basis_points, discount_curve=None, recovery_rate=RECOVERY_RATE):
+        self.curve = curve
+        self.tenors = list(tenors)
+        self.helpers = helpers
+        self.discount_curve = discount_curve
+        self.recovery_rate = recovery_rate
+        # helper units moved by a one basis point bump of each market quote
+        self.bump_sizes = np.asarray(scales, dtype=float) * np.asarray(basis_points, dtype=float)
+
+        if isinstance(curve, ql.DefaultProbabilityTermStructure):
+            self.kind = 'hazard'
+            self.nodes = _HazardNodes(curve)
+            self.quotes, self.dq_dz = _cds_helper_quotes(
+                self.nodes, helpers, discount_curve, recovery_rate, curve.dayCounter(),
+                CDS_CALENDAR, CDS_CONVENTION
+            )
+        else:
+            self.kind = 'zero'
+            self.nodes = _ZeroNodes(curve)
+            self.quotes, self.dq_dz = _yield_helper_quotes(self.nodes, helpers, curve.dayCounter())
+
+        # the repricing must reproduce QuantLib before it can be differentiated
+        implied = np.array([helper.impliedQuote() for helper in helpers])
+        error = np.max(np.abs(self.quotes - implied) / np.maximum(np.abs(implied), 1.0))
+        if error > 1.0e-8:
+            raise ValueError("helper repricing is off by {:.2e}, unsupported helper conventions".format(error))
+
+        self.dz_dq = np.linalg.inv(self.dq_dz)
+        self.node_dates = [date for date, _ in curve.nodes()][1:]
+
+    def node_jacobian(self, basis_point=1.0):
+        # change of each node (zero or hazard rate) for a `basis_point` bump of each quote
+        import pandas as pd
+        return pd.DataFrame(self.dz_dq * self.bump_sizes[None, :] * basis_point,
+                            index=pd.Index(self.node_dates, name='node'), columns=self.tenors)
+
+    def par_deltas(self, node_sensitivities, basis_point=1.0):
+        # (trades x nodes) d PV / d node -> (trades x quotes) PV change per `basis_point` bump
+        import pandas as pd
+        deltas = np.atleast_2d(node_sensitivities) @ self.dz_dq * self.bump_sizes[None, :] * basis_point
+        return pd.DataFrame(deltas, columns=self.tenors)
+
+    def node_sensitivities(self, portfolio):
+        # d PV / d node of every trade of a SwapPortfolio (zero curves) or CdsPortfolio (hazard curves)
+        flows = _Flows()
+        if self.kind == 'zero' and isinstance(portfolio, SwapPortfolio):
+            for k, swap in enumerate(portfolio.swaps):
+                payer = swap.type() == ql.VanillaSwap.Payer
+                _swap_flows(flows, k, swap, (-1.0, 1.0) if payer else (1.0, -1.0))
+            return _yield_value(self.nodes, flows, len(portfolio))[1]
+
+        if self.kind == 'hazard' and isinstance(portfolio, CdsPortfolio):
+            for k, (trade, cds) in enumerate(zip(portfolio.trades, portfolio.contracts)):
+                sign = 1.0 if cds.side() == ql.Protection.Buyer else -1.0
+                recovery_rate = trade.get('recovery', portfolio.recovery_rate)
+                spread = _cds_flows(flows, k, cds, recovery_rate, self.discount_curve, sign)
+                flows.add('spread', k, spread)
+            spreads = flows.table('spread', 2)[:, 1]
+            (_, premium_slope), (_, protection_slope), _ = _cds_legs(self.nodes, flows, len(portfolio))
+            return protection_slope - spreads[:, None] * premium_slope
+
+        raise TypeError("no node sensitivities of {} on a {} curve".format(type(portfolio).__name__, self.kind))
+
+
+def bootstrap_jacobian(builder, today, quote, *args, recovery_rate=RECOVERY_RATE):
+    # one bootstrap with the builder's helpers kept, e.g. bootstrap_jacobian(cds_curve, today, quote, discount_curve)
+    record = as_quote_record(quote, today)
+    quotes, helpers = collections.OrderedDict(), []
+    curve = builder(today, record, *args, quotes=quotes, helper_list=helpers)
+
+    scales = dict(zip(record.tenors.tolist(), record.scales()))
+    basis_points = dict(zip(record.tenors.tolist(), record.basis_points()))
+    tenors = list(quotes)
+    discount_curve = args[0] if args else None
+    with evaluation_date(today):
+        return CurveJacobian(curve, tenors, helpers, [scales[tenor] for tenor in tenors],
+                             [basis_points[tenor] for tenor in tenors], discount_curve, recovery_rate)
+
+
+def jacobian_ladder(trades, builder, today, quote, *args, portfolio_class=SwapPortfolio, basis_point=1.0):
+    # trades x tenors par-quote deltas as key_rate_ladder / cs01_ladder, from a single bootstrap
+    jacobian = bootstrap_jacobian(builder, today, quote, *args)
+    with evaluation_date(today):
+        if portfolio_class is CdsPortfolio:
+            portfolio = CdsPortfolio(trades, jacobian.curve, jacobian.discount_curve)
+        else:
+            portfolio = portfolio_class(trades, jacobian.curve)
+        return jacobian.par_deltas(jacobian.node_sensitivities(portfolio), basis_point)
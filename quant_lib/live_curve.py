@@ -0,0 +1,68 @@
+import contextlib
+import collections
+import numpy as np
+
+from quant_lib.quote import as_quote_record
+
+
+class LiveCurve():
+    # bootstrapped curve which keeps the SimpleQuote behind every helper
+    # setting a quote lets QuantLib's observers re-bootstrap lazily on the next query
+    # a floating curve's reference date follows ql.Settings.evaluationDate, so it can be rolled
+    def __init__(self, builder, today, quote, *args, floating=False):
+        self.today = today
+        self.floating = floating
+        self.record = as_quote_record(quote, today)
+        self.quotes = collections.OrderedDict()
+        self.curve = builder(today, self.record, *args, quotes=self.quotes, floating=floating)
+
+        # only the tenors the builder actually used are live
+        scales = dict(zip(self.record.tenors.tolist(), self.record.scales()))
+        basis_points = dict(zip(self.record.tenors.tolist(), self.record.basis_points()))
+        self.scales = collections.OrderedDict((tenor, scales[tenor]) for tenor in self.quotes)
+        self.basis_points = collections.OrderedDict((tenor, basis_points[tenor]) for tenor in self.quotes)
+
+    @property
+    def tenors(self):
+        return list(self.quotes)
+
+    def value(self, tenor):
+        # current quote in market units (same as Market.Mid)
+        return self.quotes[tenor].value() / self.scales[tenor]
+
+    def values(self):
+        return np.array([self.value(tenor) for tenor in self.quotes])
+
+    def update(self, tenor, value):
+        if tenor not in self.quotes:
+            raise KeyError("tenor {} is not a live quote of this curve".format(tenor))
+        self.quotes[tenor].setValue(value * self.scales[tenor])
+
+    def update_many(self, values):
+        # accepts a mapping or (tenor, value) pairs, e.g. a pandas Series
+        items = values.items() if hasattr(values, 'items') else values
+        for tenor, value in items:
+            self.update(tenor, value)
+
+    @contextlib.contextmanager
+    def bumped(self, tenor, size=1.0):
+        # shift one quote by `size` basis points of rate (or spread), restored on exit
+        quote = self.quotes[tenor]
+        original = quote.value()
+        self.update(tenor, self.value(tenor) + size * self.basis_points[tenor])
+        try:
+            yield self
+        finally:
+            quote.setValue(original)
+
+    def snapshot(self):
+        # quote record with the current live values, e.g. to rebuild or persist the curve
+        mids = self.record.mids.copy()
+        for i, tenor in enumerate(self.record.tenors):
+            if tenor in self.quotes:
+                mids[i] = self.value(tenor)
+        return self.record.with_mids(mids)
+
+
+def live_curve(builder, today, quote, *args, floating=False):
+    return LiveCurve(builder, today, quote, *args, floating=floating)
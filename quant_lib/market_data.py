@@ -0,0 +1,160 @@
+import os
+import zipfile
+import hashlib
+import warnings
+import threading
+import collections
+import numpy as np
+
+from quant_lib.profiling import span, traced
+
+
+# default location of market data workbooks, QUANT_LIB_MARKET_DATA overrides it
+# (read when the curve modules are first imported)
+MARKET_DATA_DIR = os.environ.get('QUANT_LIB_MARKET_DATA', "/mnt/c/workspace/project_FICC_Quant/market_data")
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MarketDataStore():
+    # Excel workbooks are parsed once per (file hash, sheet)
+    # parsed sheets are kept on disk as columnar npz files and in memory as LRU
+    def __init__(self, cache_dir=None, maxsize=32):
+        self.cache_dir = cache_dir
+        self.maxsize = maxsize
+
+        self._frames = collections.OrderedDict()
+        self._sheet_names = {}
+        self._hashes = {}
+        self._lock = threading.RLock()
+
+    def read_sheet(self, path, sheet_name=0, index_col=None):
+        path = os.path.abspath(path)
+        key = (self._file_hash(path), str(sheet_name))
+
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+            else:
+                frame = self._load(path, sheet_name, key)
+                self._frames[key] = frame
+                while len(self._frames) > self.maxsize:
+                    self._frames.popitem(last=False)
+
+        # callers are free to mutate the returned frame
+        frame = frame.copy()
+        if index_col is not None:
+            frame = frame.set_index(index_col)
+        return frame
+
+    def sheet_names(self, path):
+        import pandas as pd
+        path = os.path.abspath(path)
+        digest = self._file_hash(path)
+        with self._lock:
+            names = self._sheet_names.get(digest)
+            if names is None:
+                names = pd.ExcelFile(path).sheet_names
+                self._sheet_names[digest] = names
+            return list(names)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._sheet_names.clear()
+            self._hashes.clear()
+
+    def _file_hash(self, path):
+        # re-hash the workbook only when it has been touched
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._hashes.get(path)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+        digest = file_hash(path)
+        with self._lock:
+            self._hashes[path] = (signature, digest)
+        return digest
+
+    def _cache_path(self, path, key):
+        cache_dir = self.cache_dir or os.path.join(os.path.dirname(path), '.cache')
+        name = "{}_{}.npz".format(key[0], hashlib.sha1(key[1].encode()).hexdigest()[:12])
+        return os.path.join(cache_dir, name)
+
+    def _load(self, path, sheet_name, key):
+        import pandas as pd
+        cache_path = self._cache_path(path, key)
+        if os.path.exists(cache_path):
+            try:
+                with span('market_data.load_frame', sheet=key[1]):
+                    return load_frame(cache_path)
+            except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile) as e:
+                # a truncated or incompatible cache file is dropped and rebuilt from the workbook
+                warnings.warn("discarding market data cache {}: {}".format(cache_path, e), RuntimeWarning)
+                try:
+                    os.remove(cache_path)
+                except OSError:
+                    pass
+
+        with span('market_data.read_excel', path=os.path.basename(path), sheet=key[1]):
+            frame = pd.read_excel(path, sheet_name=sheet_name)
+        try:
+            save_frame(frame, cache_path)
+        except OSError:
+            # read-only market data directory, keep the in-memory copy only
+            pass
+        return frame
+
+
+def save_frame(frame, path):
+    import pandas as pd
+    arrays = {'columns': np.array([str(c) for c in frame.columns])}
+    for i, column in enumerate(frame.columns):
+        values = frame[column]
+        if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            # fixed-width unicode plus a missing mask, object arrays would need pickle to load
+            arrays['mask_{}'.format(i)] = values.isna().to_numpy()
+            arrays['col_{}'.format(i)] = values.astype(object).where(values.notna(), '').to_numpy(dtype=str)
+        else:
+            arrays['col_{}'.format(i)] = values.to_numpy()
+
+    # write next to the target and swap in, so readers never see a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_frame(path):
+    import pandas as pd
+    with np.load(path, allow_pickle=False) as data:
+        columns = [str(c) for c in data['columns']]
+        frame = {}
+        for i, column in enumerate(columns):
+            values = data['col_{}'.format(i)]
+            if 'mask_{}'.format(i) in data.files:
+                values = values.astype(object)
+                values[data['mask_{}'.format(i)]] = np.nan
+            frame[column] = values
+    return pd.DataFrame(frame, columns=columns)
+
+
+market_data_store = MarketDataStore()
+
+
+@traced
+def read_sheet(path, sheet_name=0, index_col=None):
+    return market_data_store.read_sheet(path, sheet_name=sheet_name, index_col=index_col)
+
+
+def sheet_names(path):
+    return market_data_store.sheet_names(path)
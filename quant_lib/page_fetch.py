@@ -0,0 +1,78 @@
+import os
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# raw pages of the default fetcher (curve.get_quote / curve.get_date), QUANT_LIB_PAGE_CACHE overrides it
+PAGE_CACHE_DIR = os.environ.get('QUANT_LIB_PAGE_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'quant_lib', 'pages'))
+
+
+class PageFetcher():
+    # pooled, retrying HTTP fetches with a disk cache of raw pages
+    # with replay_dir set, pages are only served from recorded files (offline / tests), looked up by `date`
+    # live pages show the market at fetch time whatever `date` the caller asks for, so they are cached
+    # under the date they were fetched and served again only for `max_age` seconds
+    # cache_dir and replay_dir share the layout <dir>/<yyyy-mm-dd>/<key>.html, a cache replays as recorded
+    def __init__(self, cache_dir=None, replay_dir=None, timeout=10, max_workers=10, retries=3, backoff=0.5,
+                 max_age=300):
+        self.cache_dir = cache_dir
+        self.replay_dir = replay_dir
+        self.max_age = max_age
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0'})
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(total=retries, backoff_factor=backoff, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def fetch(self, key, url, date=None):
+        if self.replay_dir is not None:
+            date = date or datetime.date.today()
+            for path in (self._path(self.replay_dir, key, date), os.path.join(self.replay_dir, key + '.html')):
+                if os.path.exists(path):
+                    return self._read(path)
+            raise FileNotFoundError("no recorded page for {} on {} in {}".format(key, date, self.replay_dir))
+
+        if self.cache_dir is not None:
+            path = self._path(self.cache_dir, key, datetime.date.today())
+            if os.path.exists(path) and time.time() - os.path.getmtime(path) <= self.max_age:
+                return self._read(path)
+
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        html = response.text
+
+        if self.cache_dir is not None:
+            self._write(path, html)
+        return html
+
+    def fetch_many(self, urls, date=None):
+        # {key: url} -> {key: html}, fetched as one parallel batch
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pages = {key: executor.submit(self.fetch, key, url, date) for key, url in urls.items()}
+            return {key: page.result() for key, page in pages.items()}
+
+    def _path(self, root, key, date):
+        return os.path.join(root, date.isoformat(), key + '.html')
+
+    def _read(self, path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def _write(self, path, html):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(tmp_path, path)
@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import fnmatch
+import warnings
+import functools
+import threading
+import contextlib
+
+
+# the active tracer, None when tracing is off (the default)
+_tracer = None
+
+
+class LatencyWarning(UserWarning):
+    pass
+
+
+def _warn(name, seconds, budget):
+    warnings.warn("{} took {:.1f}ms, budget {:.1f}ms".format(name, seconds * 1e3, budget * 1e3),
+                  LatencyWarning, stacklevel=4)
+
+
+class _NullSpan():
+    # returned while tracing is off, so instrumented code costs one global lookup
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span():
+    __slots__ = ('tracer', 'name', 'fields', 'start')
+
+    def __init__(self, tracer, name, fields):
+        self.tracer = tracer
+        self.name = name
+        self.fields = fields
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        seconds = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.fields['error'] = exc_type.__name__
+        self.tracer.record(self.name, self.start, seconds, self.fields)
+        return False
+
+    def set(self, **fields):
+        # extra fields (node counts, book size, ...) attached to the event
+        self.fields.update(fields)
+
+
+class Tracer():
+    # collects one event per finished span plus per-name call counts and wall times
+    # budgets map span names (or fnmatch patterns, e.g. '*.bootstrap') to seconds,
+    # a span over budget is kept in `violations` and reported to on_budget(name, seconds, budget)
+    def __init__(self, budgets=None, on_budget=None):
+        self.budgets = dict(budgets or {})
+        self.on_budget = on_budget or _warn
+        self.events = []
+        self.stats = {}
+        self.violations = []
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def span(self, name, **fields):
+        return Span(self, name, fields)
+
+    def record(self, name, start, seconds, fields):
+        event = {
+            'name': name,
+            'start': start - self.origin,
+            'seconds': seconds,
+            'thread': threading.get_ident(),
+        }
+        if fields:
+            event['fields'] = fields
+
+        budget = self.budget(name)
+        with self._lock:
+            self.events.append(event)
+            count, total, worst = self.stats.get(name, (0, 0.0, 0.0))
+            self.stats[name] = (count + 1, total + seconds, max(worst, seconds))
+            if budget is not None and seconds > budget:
+                self.violations.append(event)
+        if budget is not None and seconds > budget:
+            self.on_budget(name, seconds, budget)
+
+    def budget(self, name):
+        budget = self.budgets.get(name)
+        if budget is None:
+            for pattern, seconds in self.budgets.items():
+                if fnmatch.fnmatchcase(name, pattern):
+                    return seconds
+        return budget
+
+    def summary(self):
+        # one row per span name, slowest total first
+        import pandas as pd
+
+        rows = [
+            {'name': name, 'count': count, 'total': total, 'mean': total / count, 'max': worst,
+             'budget': self.budget(name)}
+            for name, (count, total, worst) in self.stats.items()
+        ]
+        frame = pd.DataFrame(rows, columns=['name', 'count', 'total', 'mean', 'max', 'budget'])
+        return frame.sort_values('total', ascending=False).set_index('name')
+
+    def write_jsonl(self, path):
+        with open(path, 'w') as f:
+            for event in self.events:
+                f.write(json.dumps(event, default=str))
+                f.write('\n')
+
+    def write_chrome(self, path):
+        # complete ('X') events in microseconds, loads in chrome://tracing or Perfetto
+        events = [
+            {
+                'name': event['name'],
+                'ph': 'X',
+                'ts': event['start'] * 1e6,
+                'dur': event['seconds'] * 1e6,
+                'pid': self.pid,
+                'tid': event['thread'],
+                'args': event.get('fields', {}),
+            }
+            for event in self.events
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+
+    def write(self, path):
+        # .json is written as a Chrome trace, anything else as JSON lines
+        if path.endswith('.json'):
+            self.write_chrome(path)
+        else:
+            self.write_jsonl(path)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, **fields):
+    tracer = _tracer
+    if tracer is None:
+        return NULL_SPAN
+    return tracer.span(name, **fields)
+
+
+def traced(name=None):
+    # decorator timing every call of a function, usable as @traced or @traced('stage.name')
+    def decorate(function):
+        label = name or "{}.{}".format(function.__module__.rsplit('.', 1)[-1], function.__qualname__)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return function(*args, **kwargs)
+            with tracer.span(label):
+                return function(*args, **kwargs)
+        return wrapper
+
+    if callable(name):
+        function, name = name, None
+        return decorate(function)
+    return decorate
+
+
+# curve methods which run a pending bootstrap (LazyObject::calculate) before answering
+_CALCULATING = (
+    'discount', 'zeroRate', 'forwardRate', 'nodes', 'dates', 'times', 'maxDate', 'maxTime',
+    'survivalProbability', 'defaultProbability', 'hazardRate', 'defaultDensity', 'fitResults',
+)
+
+
+def bootstrapped(curve, name, **fields):
+    # curves bootstrap lazily on first use; while tracing, the first of those calls made on the
+    # curve from Python is timed as the bootstrap stage with the node count (and iterations for
+    # fitted curves), so tracing never moves the bootstrap. A curve first used from inside a
+    # QuantLib engine bootstraps within the caller's span instead
+    if _tracer is None:
+        return curve
+    methods = [method for method in _CALCULATING if hasattr(curve, method)]
+
+    def first_call(method):
+        original = getattr(curve, method)
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            # back to the class methods before anything else, the probe only fires once
+            for probe in methods:
+                vars(curve).pop(probe, None)
+            tracer = _tracer
+            if tracer is None:
+                return original(*args, **kwargs)
+            with tracer.span("{}.bootstrap".format(name), **fields) as stage:
+                result = original(*args, **kwargs)
+                if hasattr(curve, 'fitResults'):
+                    stage.set(iterations=curve.fitResults().numberOfIterations())
+                else:
+                    stage.set(nodes=len(curve.nodes()))
+            return result
+        return wrapper
+
+    for method in methods:
+        setattr(curve, method, first_call(method))
+    return curve
+
+
+@contextlib.contextmanager
+def tracing(path=None, budgets=None, on_budget=None):
+    # turns tracing on for the block (process wide, worker processes trace on their own)
+    # and writes the trace to `path` on exit, even if the block failed
+    global _tracer
+    previous = _tracer
+    tracer = Tracer(budgets, on_budget)
+    _tracer = tracer
+    try:
+        yield tracer
+    finally:
+        _tracer = previous
+        if path is not None:
+            tracer.write(path)
@@ -0,0 +1,163 @@
+import re
+import datetime
+import hashlib
+import dataclasses
+import numpy as np
+
+import QuantLib as ql
+
+
+# size of one basis point in the unit each instrument is quoted in
+# deposit/swap rates are in %, futures are 100 - rate, cds spreads are in bp
+BASIS_POINT = {
+    'CASH': 0.01,
+    'SWAP': 0.01,
+    'FUTURE': -0.01,
+    'FUTURES': -0.01,
+}
+
+# factor from market units to the value held by the helper's SimpleQuote
+QUOTE_SCALE = {
+    'CASH': 0.01,
+    'SWAP': 0.01,
+    'FUTURE': 1.0,
+    'FUTURES': 1.0,
+    '': 0.0001,
+}
+
+# tenor label units as they appear in the market data sheets (3MO, 12M, 2W, 10Y, ...)
+TENOR_UNITS = {
+    'D': ql.Days,
+    'W': ql.Weeks,
+    'M': ql.Months,
+    'MO': ql.Months,
+    'Y': ql.Years,
+    'YR': ql.Years,
+}
+
+
+def tenor_period(label):
+    match = re.fullmatch(r'(\d+)([A-Z]+)', str(label).strip().upper())
+    if match is None or match.group(2) not in TENOR_UNITS:
+        raise ValueError("unrecognised tenor {}".format(label))
+    return ql.Period(int(match.group(1)), TENOR_UNITS[match.group(2)])
+
+
+def _frozen(values):
+    values = np.array(values)
+    values.flags.writeable = False
+    return values
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class QuoteRecord():
+    reference_date: datetime.date
+    tenors: np.ndarray          # tenor labels
+    maturities: np.ndarray      # datetime64[D]
+    inst_types: np.ndarray      # CASH/FUTURE/SWAP, '' when the sheet has no InstType
+    mids: np.ndarray            # Market.Mid in market units
+    days: np.ndarray            # days from reference date to maturity
+
+    def __post_init__(self):
+        for field in ('tenors', 'maturities', 'inst_types', 'mids', 'days'):
+            object.__setattr__(self, field, _frozen(getattr(self, field)))
+
+    def __len__(self):
+        return len(self.tenors)
+
+    def select(self, inst_type):
+        return self._take(self.inst_types == inst_type)
+
+    def partition(self):
+        return {inst_type: self.select(inst_type) for inst_type in dict.fromkeys(self.inst_types)}
+
+    def with_mids(self, mids):
+        return dataclasses.replace(self, mids=np.asarray(mids, dtype=float))
+
+    def rebase(self, today):
+        if today == self.reference_date:
+            return self
+        days = (self.maturities - np.datetime64(today, 'D')).astype(np.int64)
+        return dataclasses.replace(self, reference_date=today, days=days)
+
+    def basis_points(self):
+        return np.array([BASIS_POINT.get(inst_type, 1.0) for inst_type in self.inst_types])
+
+    def scales(self):
+        return np.array([QUOTE_SCALE[inst_type] for inst_type in self.inst_types])
+
+    def maturity_dates(self):
+        return [ql.Date(int(d), int(m), int(y)) for y, m, d in zip(*self._ymd())]
+
+    def fingerprint(self):
+        digest = hashlib.sha1(str(self.reference_date).encode())
+        for values in (self.tenors, self.maturities, self.inst_types, self.mids):
+            digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()
+
+    def to_frame(self):
+        import pandas as pd
+        frame = pd.DataFrame({
+            'Maturity': self.maturities.astype(object),
+            'InstType': self.inst_types,
+            'Market.Mid': self.mids,
+            'DaysToMaturity': self.days,
+        }, index=pd.Index(self.tenors, name='Tenor'))
+        if (self.inst_types == '').all():
+            frame = frame.drop(columns='InstType')
+        return frame
+
+    def _take(self, mask):
+        return dataclasses.replace(
+            self,
+            tenors=self.tenors[mask],
+            maturities=self.maturities[mask],
+            inst_types=self.inst_types[mask],
+            mids=self.mids[mask],
+            days=self.days[mask]
+        )
+
+    def _ymd(self):
+        years = self.maturities.astype('datetime64[Y]')
+        months = self.maturities.astype('datetime64[M]')
+        return (
+            years.astype(int) + 1970,
+            (months - years).astype(int) + 1,
+            (self.maturities - months).astype(int) + 1
+        )
+
+
+def simple_quote(quotes, tenor, value):
+    # builders keep their SimpleQuotes in `quotes` when asked to, see live_curve
+    quote = ql.SimpleQuote(value)
+    if quotes is not None:
+        quotes[str(tenor)] = quote
+    return quote
+
+
+def preprocess_quote(frame, today):
+    # one pass over the sheet: maturities, day counts and instrument types as arrays
+    import pandas as pd
+    maturities = pd.to_datetime(frame['Maturity']).to_numpy().astype('datetime64[D]')
+    days = (maturities - np.datetime64(today, 'D')).astype(np.int64)
+
+    if 'InstType' in frame.columns:
+        inst_types = frame['InstType'].to_numpy().astype(str)
+    else:
+        inst_types = np.full(len(frame), '')
+
+    return QuoteRecord(
+        reference_date=today,
+        tenors=frame.index.to_numpy().astype(str),
+        maturities=maturities,
+        inst_types=inst_types,
+        mids=frame['Market.Mid'].to_numpy(dtype=float),
+        days=days
+    )
+
+
+def as_quote_record(quote, today):
+    # builders accept either a QuoteRecord or a quote DataFrame indexed by Tenor
+    if isinstance(quote, QuoteRecord):
+        return quote.rebase(today)
+    return preprocess_quote(quote, today)
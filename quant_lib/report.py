@@ -0,0 +1,77 @@
+import numpy as np
+
+
+# plotting for the curve modules' __main__ blocks and the CLI,
+# matplotlib is only imported when a plot is actually drawn
+
+
+def _pyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def curve_table(quote, curve, discount_factor, zero_rate, forward_rate):
+    # discount factor and zero/forward rates (%) at every quote maturity,
+    # using the query functions of the module that built the curve
+    table = quote.to_frame()
+    table['discount_factor'], table['zero_rate'], table['forward_rate'] = np.nan, np.nan, np.nan
+
+    for tenor, date in zip(table.index, table['Maturity']):
+        table.loc[tenor, 'discount_factor'] = discount_factor(date, curve)
+        table.loc[tenor, 'zero_rate'] = zero_rate(date, curve) * 100
+        table.loc[tenor, 'forward_rate'] = forward_rate(date, curve) * 100
+
+    return table
+
+
+def plot_curve(table):
+    plt = _pyplot()
+
+    # plot the result
+    plt.figure(figsize=(16,8))
+    plt.plot(table['zero_rate'], 'b-', label='zero curve')
+    plt.plot(table['forward_rate'], 'g-', label='forward curve')
+    plt.title('zero and forward curve', loc='center')
+    plt.legend()
+    plt.xlabel('maturity')
+    plt.ylabel('interst rate')
+
+    # plot the result
+    plt.figure(figsize=(16,8))
+    plt.plot(table['discount_factor'], 'r-', label='discount curve')
+    plt.title('discount curve', loc='center')
+    plt.legend()
+    plt.xlabel('maturity')
+    plt.ylabel('discount factor')
+
+
+def plot_probabilities(table):
+    plt = _pyplot()
+
+    # plot the result
+    plt.figure(figsize=(16,8))
+    plt.plot(table['default prob'], 'b-', label='Default Probability')
+    plt.title('Default Probability', loc='center')
+    plt.xlabel('maturity')
+    plt.ylabel('%')
+
+    # plot the result
+    plt.figure(figsize=(16,8))
+    plt.plot(table['survival prob'], 'g-', label='Survival Probability')
+    plt.title('Survival Probability', loc='center')
+    plt.xlabel('maturity')
+    plt.ylabel('%')
+
+
+def plot_series(series, title):
+    plt = _pyplot()
+
+    plt.figure(figsize=(16,8))
+    plt.plot(series, 'b-', label=series.name)
+    plt.title(title, loc='center')
+    plt.legend()
+    plt.xlabel('maturity')
+
+
+def show():
+    _pyplot().show()
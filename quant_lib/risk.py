@@ -0,0 +1,74 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from quant_lib.quote import as_quote_record
+from quant_lib.evaluation import evaluation_date, roll_down
+from quant_lib.live_curve import LiveCurve
+from quant_lib.irs_portfolio import SwapPortfolio, trade_rows
+from quant_lib.profiling import traced
+
+
+@traced
+def bucket_deltas(portfolio, live, tenors, basis_point=1.0, central=False):
+    # one re-bootstrap per bucket (two when central): bump a quote, reprice the book, restore
+    with evaluation_date(live.today):
+        portfolio.link(live.curve)
+        base = None if central else portfolio.npv()
+
+        deltas = np.empty((len(portfolio), len(tenors)))
+        for j, tenor in enumerate(tenors):
+            with live.bumped(tenor, basis_point):
+                up = portfolio.npv()
+            if central:
+                with live.bumped(tenor, -basis_point):
+                    down = portfolio.npv()
+                deltas[:, j] = (up - down) / 2
+            else:
+                deltas[:, j] = up - base
+    return deltas
+
+
+def _ladder_worker(trades, portfolio_class, builder, today, record, args, tenors, basis_point, central):
+    # every worker process bootstraps its own curve and builds its own book once
+    live = LiveCurve(builder, today, record, *args)
+    portfolio = portfolio_class(trades)
+    return bucket_deltas(portfolio, live, tenors, basis_point, central)
+
+
+@traced
+def key_rate_ladder(trades, builder, today, quote, *args, portfolio_class=SwapPortfolio,
+                    basis_point=1.0, central=False, max_workers=1):
+    # trades x tenors matrix of PV change for a `basis_point` bump of each curve quote
+    # buckets are split across `max_workers` processes, builder and args must be picklable then
+    import pandas as pd
+    record = as_quote_record(quote, today)
+    trades = trade_rows(trades)
+
+    if max_workers == 1:
+        live = LiveCurve(builder, today, record, *args)
+        tenors = live.tenors
+        deltas = bucket_deltas(portfolio_class(trades), live, tenors, basis_point, central)
+    else:
+        tenors = LiveCurve(builder, today, record, *args).tenors
+        chunks = [chunk.tolist() for chunk in np.array_split(tenors, max_workers) if len(chunk)]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            futures = [
+                executor.submit(_ladder_worker, trades, portfolio_class, builder, today, record,
+                                args, chunk, basis_point, central)
+                for chunk in chunks
+            ]
+            deltas = np.hstack([future.result() for future in futures])
+
+    return pd.DataFrame(deltas, columns=tenors)
+
+
+@traced
+def theta(portfolio, live, days=1):
+    # theta of the whole book under evaluation.roll_down, in two bulk pricings
+    # the floating curve re-bootstraps lazily at the later date, nothing is reloaded
+    if not live.floating:
+        raise ValueError("theta needs a floating live curve, build it with floating=True")
+
+    with evaluation_date(live.today):
+        portfolio.link(live.curve)
+        return roll_down(lambda date: portfolio.npv(), live.today, days)
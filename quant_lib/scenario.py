@@ -0,0 +1,137 @@
+import numpy as np
+from multiprocessing import shared_memory, util
+from concurrent.futures import ProcessPoolExecutor
+
+from quant_lib.quote import as_quote_record
+from quant_lib.evaluation import evaluation_date
+from quant_lib.live_curve import LiveCurve
+from quant_lib.irs_portfolio import SwapPortfolio, trade_rows
+
+
+# scenario shifts are (scenarios x quotes) arrays in market units, columns in quote record order
+
+def parallel_shifts(record, sizes_bp):
+    return np.outer(sizes_bp, record.basis_points())
+
+
+def twist_shifts(record, sizes_bp, pivot_years=5.0):
+    # steepener for positive sizes: the longest quote moves by +size, the curve pivots around pivot_years
+    years = record.days / 365.0
+    if pivot_years >= years.max():
+        raise ValueError("twist pivot {} years is not before the last quote at {:.2f} years".format(
+            pivot_years, years.max()))
+    weights = np.clip((years - pivot_years) / (years.max() - pivot_years), -1.0, 1.0)
+    return np.outer(sizes_bp, weights * record.basis_points())
+
+
+def historical_shifts(record, history):
+    # date-over-date moves of a snapshot archive (quote records ordered by date), matched by tenor
+    columns = {tenor: i for i, tenor in enumerate(record.tenors.tolist())}
+    shifts = np.zeros((len(history) - 1, len(record)))
+    for k, (previous, current) in enumerate(zip(history[:-1], history[1:])):
+        moves = dict(zip(current.tenors.tolist(), current.mids - previous.mids))
+        for tenor, move in moves.items():
+            if tenor in columns:
+                shifts[k, columns[tenor]] = move
+    return shifts
+
+
+# state of each worker process: one live curve, one book and a view on the shared result
+_worker = {}
+
+
+def _init_worker(trades, portfolio_class, builder, today, record, args, shm_name, shape):
+    live = LiveCurve(builder, today, record, *args)
+    portfolio = portfolio_class(trades)
+    with evaluation_date(today):
+        portfolio.link(live.curve)
+        base = portfolio.npv()
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker.update(
+        live=live,
+        portfolio=portfolio,
+        base=base,
+        shm=shm,
+        pnl=np.ndarray(shape, dtype=np.float64, buffer=shm.buf),
+        columns=[record.tenors.tolist().index(tenor) for tenor in live.tenors],
+    )
+
+
+def _init_pool_worker(*initargs):
+    _init_worker(*initargs)
+    # pool workers leave through os._exit, which skips atexit but runs multiprocessing finalizers
+    util.Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker():
+    # the view on the buffer has to go before the handle can close
+    _worker.pop('pnl', None)
+    shm = _worker.pop('shm', None)
+    if shm is not None:
+        shm.close()
+
+
+def _run_block(start, shifts):
+    live, portfolio, pnl = _worker['live'], _worker['portfolio'], _worker['pnl']
+    columns = _worker['columns']
+    raw = [quote.value() for quote in live.quotes.values()]
+    base_mids = live.record.mids[columns]
+
+    with evaluation_date(live.today):
+        for i, shift in enumerate(shifts):
+            live.update_many(zip(live.tenors, base_mids + shift[columns]))
+            pnl[start + i] = portfolio.npv() - _worker['base']
+
+        # back to the base quotes exactly
+        for quote, value in zip(live.quotes.values(), raw):
+            quote.setValue(value)
+    return start, len(shifts)
+
+
+def run_scenarios(trades, builder, today, quote, shifts, *args, portfolio_class=SwapPortfolio,
+                  max_workers=None, block_size=32):
+    # (scenarios x trades) P&L of the book under each shifted quote set
+    # blocks of scenarios are fanned out to worker processes writing into shared memory
+    record = as_quote_record(quote, today)
+    trades = trade_rows(trades)
+    shifts = np.asarray(shifts, dtype=float)
+    shape = (len(shifts), len(trades))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(8 * shape[0] * shape[1], 1))
+    try:
+        initargs = (trades, portfolio_class, builder, today, record, args, shm.name, shape)
+        blocks = range(0, len(shifts), block_size)
+
+        if max_workers == 1:
+            _init_worker(*initargs)
+            try:
+                for start in blocks:
+                    _run_block(start, shifts[start:start + block_size])
+            finally:
+                _close_worker()
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_pool_worker,
+                                     initargs=initargs) as executor:
+                futures = [executor.submit(_run_block, start, shifts[start:start + block_size]) for start in blocks]
+                for future in futures:
+                    future.result()
+
+        pnl = np.ndarray(shape, dtype=np.float64, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    return pnl
+
+
+def value_at_risk(pnl, level=0.99):
+    # loss quantile of the book P&L (scenarios x trades, or a P&L vector)
+    pnl = np.asarray(pnl)
+    total = pnl.sum(axis=1) if pnl.ndim == 2 else pnl
+    return -np.quantile(total, 1.0 - level)
+
+
+def expected_shortfall(pnl, level=0.99):
+    pnl = np.asarray(pnl)
+    total = pnl.sum(axis=1) if pnl.ndim == 2 else pnl
+    return -total[total <= np.quantile(total, 1.0 - level)].mean()
@@ -1,33 +1,30 @@
 import os
-import datetime
-import numpy as np
-import pandas as pd
-
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 import QuantLib as ql
-import xlwings as xw
+
+from quant_lib.market_data import MARKET_DATA_DIR, read_sheet
+from quant_lib.quote import preprocess_quote, as_quote_record, simple_quote
+from quant_lib.evaluation import curve_reference
+from quant_lib.profiling import traced, bootstrapped
+from quant_lib import report
 
 
+@traced
 def get_quote(today):
-    quote = pd.read_excel(os.path.join("/mnt/c/workspace/project_FICC_Quant/market_data/swap_data.xlsx"),index_col='Tenor')
+    quote = read_sheet(os.path.join(MARKET_DATA_DIR, "swap_data.xlsx"), index_col='Tenor')
     # pre-processing dataframe
-    quote['DaysToMaturity'] = np.nan
-    quote['Maturity'] = pd.to_datetime(quote['Maturity']).dt.date
-
-    for tenor in quote.index:
-        quote.loc[tenor, 'DaysToMaturity'] = (quote.loc[tenor, 'Maturity'] - today).days
-    return quote
+    return preprocess_quote(quote, today)
 
 
 # construct IRS curve
-def swap_curve(today, quote):
+@traced
+def swap_curve(today, quote, quotes=None, floating=False, helper_list=None):
 
-    # divide dataframe into 3 parts
-    depo = quote[quote['InstType'] == 'CASH']
-    futures = quote[quote['InstType'] == 'FUTURES']
-    swap = quote[quote['InstType'] == 'SWAP']
+    # divide quotes into 3 parts
+    quote = as_quote_record(quote, today)
+    depo = quote.select('CASH')
+    futures = quote.select('FUTURES')
+    swap = quote.select('SWAP')
 
     # Set evaluation date
     todays_date = ql.Date(today.day, today.month, today.year)
@@ -45,7 +42,7 @@ def swap_curve(today, quote):
     # 1_Deposit rate helper
     depositHelpers = [
         ql.DepositRateHelper(
-            ql.QuoteHandle(ql.SimpleQuote(rate/100)),
+            ql.QuoteHandle(simple_quote(quotes, tenor, rate/100)),
             ql.Period(int(day), ql.Days),
             settlementDays,
             calendar,
@@ -53,20 +50,14 @@ def swap_curve(today, quote):
             False,
             dayCounter
         )
-        for day, rate in zip(depo['DaysToMaturity'], depo['Market.Mid'])
+        for tenor, day, rate in zip(depo.tenors, depo.days, depo.mids)
     ]
 
     # 2_ Futures rate helper
     futuresHelpers = []
-    for i, price in enumerate(futures['Market.Mid']):
-        iborStartDate = ql.Date(
-            futures['Maturity'][i].day,
-            futures['Maturity'][i].month,
-            futures['Maturity'][i].year
-        )
-        
-        futuresHelpers = ql.FuturesRateHelper(
-            ql.QuoteHandle(ql.SimpleQuote(price)),
+    for tenor, iborStartDate, price in zip(futures.tenors, futures.maturity_dates(), futures.mids):
+        futuresHelper = ql.FuturesRateHelper(
+            ql.QuoteHandle(simple_quote(quotes, tenor, price)),
             iborStartDate,
             3,
             calendar,
@@ -74,11 +65,11 @@ def swap_curve(today, quote):
             False,
             dayCounter
         )
-        futuresHelpers.append(futuresHelpers)
+        futuresHelpers.append(futuresHelper)
 
     # 3_ Swap rate helper
     swapHelpers = [ql.SwapRateHelper(
-        ql.QuoteHandle(ql.SimpleQuote(rate/100)),
+        ql.QuoteHandle(simple_quote(quotes, tenor, rate/100)),
         ql.Period(int(day), ql.Days),
         calendar,
         frequency,
@@ -86,22 +77,26 @@ def swap_curve(today, quote):
         dayCounter,
         ql.Euribor3M()
         )
-        for day, rate in zip(swap['DaysToMaturity'], swap['Market.Mid'])
+        for tenor, day, rate in zip(swap.tenors, swap.days, swap.mids)
     ]
 
     # Combine 1_2_3 with Piece wise linear zero method
     # Curve construction
     helpers = depositHelpers + futuresHelpers + swapHelpers
-    depoFuturesSwapCurve = ql.PiecewiseLinearZero(todays_date, helpers, dayCounter)
+    if helper_list is not None:
+        helper_list.extend(helpers)
+    depoFuturesSwapCurve = ql.PiecewiseLinearZero(*curve_reference(todays_date, floating), helpers, dayCounter)
 
-    return depoFuturesSwapCurve
+    return bootstrapped(depoFuturesSwapCurve, 'swap_curve', helpers=len(helpers))
 
 # use curve to compute discount factor and zero rate
 # the curve is calcualted with module used while pricing treasury
+@traced
 def discount_factor(date, curve):
     date = ql.Date(date.day, date.month, date.year)
     return curve.discount(date)
 
+@traced
 def zero_rate(date, curve):
     date = ql.Date(date.day, date.month, date.year)
     day_counter = ql.Actual360()
@@ -117,6 +112,7 @@ def zero_rate(date, curve):
     return zero_rate
 
 # cacualte forward rate
+@traced
 def forward_rate(date, curve):
     date = ql.Date(date.day, date.month, date.year)
     day_counter = ql.Actual360()
@@ -135,34 +131,15 @@ def forward_rate(date, curve):
 
 
 if __name__ == "__main__":
+    import datetime
+
     today = datetime.date(2020,10,9)
     quote = get_quote(today=today)
     curve = swap_curve(today=today, quote=quote)
 
     # calculate discount factor/ zero rate/ forward rate
-    quote['discount_factor'], quote['zero_rate'], quote['forward_rate'] = np.nan, np.nan, np.nan
-
-    for tenor, date in zip(quote.index, quote['Maturity']):
-        quote.loc[tenor, 'discount_factor'] = discount_factor(date, curve)
-        quote.loc[tenor, 'zero_rate'] = zero_rate(date, curve) * 100
-        quote.loc[tenor, 'forward_rate'] = forward_rate(date, curve) * 100
-
+    quote = report.curve_table(quote, curve, discount_factor, zero_rate, forward_rate)
     print(quote[['discount_factor', 'zero_rate', 'forward_rate']])
 
     # plot the result
-    plt.figure(figsize=(16,8))
-    plt.plot(quote['zero_rate'], 'b-', label='zero curve')
-    plt.plot(quote['forward_rate'], 'g-', label='forward curve')
-    plt.title('zero and forward curve', loc='center')
-    plt.legend()
-    plt.xlabel('maturity')
-    plt.ylabel('interst rate')
-
-
-    # plot the result
-    plt.figure(figsize=(16,8))
-    plt.plot(quote['discount_factor'], 'r-', label='discount curve')
-    plt.title('discount curve', loc='center')
-    plt.legend()
-    plt.xlabel('maturity')
-    plt.ylabel('discount factor')
\ No newline at end of file
+    report.plot_curve(quote)
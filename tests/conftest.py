@@ -0,0 +1,33 @@
+import os
+import datetime
+import pytest
+
+# the workbooks shipped with the repo, read when the curve modules are first imported
+os.environ.setdefault('QUANT_LIB_MARKET_DATA', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'market_data'))
+
+
+# dates covered by every sheet of the shipped workbooks
+SWAP_DATE = datetime.date(2020, 10, 9)
+CDS_DATE = datetime.date(2020, 12, 11)
+
+
+@pytest.fixture(scope='session')
+def swap_date():
+    return SWAP_DATE
+
+
+@pytest.fixture(scope='session')
+def cds_date():
+    return CDS_DATE
+
+
+@pytest.fixture
+def discount_curve(cds_date):
+    from quant_lib import cds_curve
+    return cds_curve.swap_curve(cds_date, cds_curve.get_irs_quote(cds_date))
+
+
+@pytest.fixture
+def hazard_curve(cds_date, discount_curve):
+    from quant_lib import cds_curve
+    return cds_curve.cds_curve(cds_date, cds_curve.get_cds_quote(cds_date), discount_curve)
@@ -0,0 +1,112 @@
+import datetime
+import numpy as np
+import pytest
+
+import QuantLib as ql
+
+from quant_lib.black_scholes import black_scholes, implied_volatility, option_times
+
+
+TODAY = datetime.date(2022, 6, 13)
+SPOT, RATE, DIVIDEND, VOL = 100.0, 0.03, 0.01, 0.25
+
+OPTIONS = [
+    (option_type, strike, days)
+    for option_type in (ql.Option.Call, ql.Option.Put)
+    for strike in (80.0, 120.0)       # in and out of the money, either way round for puts
+    for days in (7, 1825)
+]
+
+
+def _ql_option(option_type, strike, days):
+    today = ql.Date(TODAY.day, TODAY.month, TODAY.year)
+    ql.Settings.instance().evaluationDate = today
+    day_counter = ql.Actual365Fixed()
+    process = ql.BlackScholesMertonProcess(
+        ql.QuoteHandle(ql.SimpleQuote(SPOT)),
+        ql.YieldTermStructureHandle(ql.FlatForward(today, DIVIDEND, day_counter)),
+        ql.YieldTermStructureHandle(ql.FlatForward(today, RATE, day_counter)),
+        ql.BlackVolTermStructureHandle(ql.BlackConstantVol(today, ql.NullCalendar(), VOL, day_counter))
+    )
+    option = ql.VanillaOption(ql.PlainVanillaPayoff(option_type, strike), ql.EuropeanExercise(today + days))
+    option.setPricingEngine(ql.AnalyticEuropeanEngine(process))
+    return option, process, days / 365.0
+
+
+@pytest.mark.parametrize('option_type, strike, days', OPTIONS)
+def test_matches_analytic_european_engine(option_type, strike, days):
+    option, _, t = _ql_option(option_type, strike, days)
+    result = black_scholes(SPOT, strike, t, RATE, DIVIDEND, VOL, option_type)
+
+    expected = {
+        'premium': option.NPV(),
+        'delta': option.delta(),
+        'gamma': option.gamma(),
+        'vega': option.vega(),
+        'theta': option.theta(),
+        'rho': option.rho(),
+    }
+    for greek, value in expected.items():
+        assert result[greek] == pytest.approx(value, rel=1e-10, abs=1e-12), greek
+
+
+@pytest.mark.parametrize('option_type', [ql.Option.Call, ql.Option.Put])
+@pytest.mark.parametrize('strike', [80.0, 95.0, 105.0, 120.0])
+@pytest.mark.parametrize('days', [7, 1825])
+def test_implied_volatility_round_trip(option_type, strike, days):
+    option, process, t = _ql_option(option_type, strike, days)
+    price = option.NPV()
+
+    vol = implied_volatility(price, SPOT, strike, t, RATE, DIVIDEND, option_type)
+    repriced = black_scholes(SPOT, strike, t, RATE, DIVIDEND, vol, option_type)['premium']
+    assert repriced == pytest.approx(price, abs=1e-10)
+    # a week out, 20% away from the money the premium hardly depends on the vol (vega < 1e-5)
+    if option.vega() > 1e-2:
+        assert vol == pytest.approx(VOL, abs=1e-8)
+        assert vol == pytest.approx(option.impliedVolatility(price, process, 1e-12, 1000), abs=1e-8)
+
+
+def test_implied_volatility_batch():
+    strikes = np.linspace(60.0, 140.0, 41)[:, None]
+    t = np.array([0.1, 1.0, 5.0])[None, :]
+    vols = 0.15 + 0.002 * np.abs(strikes - 100.0) + 0.0 * t
+    result = black_scholes(SPOT, strikes, t, RATE, DIVIDEND, vols, 'put')
+    implied = implied_volatility(result['premium'], SPOT, strikes, t, RATE, DIVIDEND, 'put')
+
+    # the accuracy is on the premium: wherever vega vanishes the premium pins the vol down only loosely
+    repriced = black_scholes(SPOT, strikes, t, RATE, DIVIDEND, implied, 'put')['premium']
+    np.testing.assert_allclose(repriced, result['premium'], rtol=0, atol=1e-9)
+    sensitive = result['vega'] > 1e-2
+    np.testing.assert_allclose(implied[sensitive], vols[sensitive], rtol=0, atol=1e-8)
+
+
+def test_implied_volatility_outside_no_arbitrage_bounds():
+    t = 1.0
+    forward_intrinsic = SPOT * np.exp(-DIVIDEND * t) - 80.0 * np.exp(-RATE * t)
+    prices = np.array([
+        forward_intrinsic - 0.5,            # below intrinsic value
+        forward_intrinsic,                  # at intrinsic value, zero vol
+        SPOT * np.exp(-DIVIDEND * t),       # at the discounted spot, infinite vol
+        SPOT * 2.0,                         # above the discounted spot
+        -1.0,
+    ])
+    vols = implied_volatility(prices, SPOT, 80.0, t, RATE, DIVIDEND, ql.Option.Call)
+    assert np.isnan(vols).all()
+
+    # expired options have no time value to invert
+    assert np.isnan(implied_volatility(5.0, SPOT, 100.0, 0.0, RATE, DIVIDEND, ql.Option.Put))
+
+
+def test_expired_option_is_intrinsic():
+    result = black_scholes(SPOT, [80.0, 120.0], 0.0, RATE, DIVIDEND, VOL, 'call')
+    np.testing.assert_allclose(result['premium'], [20.0, 0.0])
+    np.testing.assert_allclose(result['delta'], [1.0, 0.0])
+    np.testing.assert_allclose(result['gamma'], [0.0, 0.0])
+
+
+def test_option_times_actual_actual():
+    t = option_times(TODAY, [datetime.date(2022, 12, 13), datetime.date(2024, 6, 13)])
+    day_counter = ql.ActualActual(ql.ActualActual.ISDA)
+    expected = [day_counter.yearFraction(ql.Date(13, 6, 2022), ql.Date(13, 12, 2022)),
+                day_counter.yearFraction(ql.Date(13, 6, 2022), ql.Date(13, 6, 2024))]
+    np.testing.assert_allclose(t, expected, rtol=1e-15)
@@ -0,0 +1,73 @@
+import datetime
+import numpy as np
+import pytest
+
+import QuantLib as ql
+
+from quant_lib import curve as treasury
+from quant_lib.bond_book import BondBook
+from quant_lib.discount_kernel import CurveKernel
+from benchmarks.synthetic import treasury_quote
+
+
+TODAY = datetime.date(2022, 10, 3)
+
+
+@pytest.fixture
+def curve():
+    return treasury.treasury_curve(TODAY, treasury_quote(TODAY))
+
+
+@pytest.fixture
+def bonds():
+    rng = np.random.default_rng(0)
+    bonds = []
+    for _ in range(200):
+        issue_date = datetime.date(2012, 1, 1) + datetime.timedelta(days=int(rng.integers(0, 4000)))
+        maturity_date = max(issue_date + datetime.timedelta(days=int(rng.integers(400, 10900))),
+                            TODAY + datetime.timedelta(days=int(rng.integers(30, 9000))))
+        bonds.append(dict(issue_date=issue_date, maturity_date=maturity_date,
+                          coupon=round(float(rng.uniform(0.005, 0.06)), 4)))
+    # issued after the settlement date, and the day before it
+    bonds.append(dict(issue_date=datetime.date(2022, 10, 5), maturity_date=datetime.date(2032, 10, 5), coupon=0.02))
+    bonds.append(dict(issue_date=datetime.date(2022, 10, 3), maturity_date=datetime.date(2032, 8, 15), coupon=0.0175))
+    return bonds
+
+
+def _ql_measures(bond, engine):
+    day_counter = ql.ActualActual(ql.ActualActual.ISDA)
+    schedule = ql.Schedule(ql.Date(bond['issue_date'].day, bond['issue_date'].month, bond['issue_date'].year),
+                           ql.Date(bond['maturity_date'].day, bond['maturity_date'].month, bond['maturity_date'].year),
+                           ql.Period(ql.Semiannual), ql.UnitedStates(ql.UnitedStates.Settlement), ql.ModifiedFollowing,
+                           ql.ModifiedFollowing, ql.DateGeneration.Backward, False)
+    fixed = ql.FixedRateBond(1, 100, schedule, [bond['coupon']], day_counter)
+    fixed.setPricingEngine(engine)
+
+    clean = fixed.cleanPrice()
+    # QuantLib's default solver accuracy (1e-8) would dominate the comparison
+    ytm = fixed.bondYield(clean, day_counter, ql.Compounded, ql.Semiannual, ql.Date(), 1.0e-14, 1000)
+    rate = ql.InterestRate(ytm, day_counter, ql.Compounded, ql.Semiannual)
+    return [clean, fixed.dirtyPrice(), fixed.accruedAmount(), ytm,
+            ql.BondFunctions.duration(fixed, rate), ql.BondFunctions.convexity(fixed, rate), fixed.NPV()]
+
+
+def test_analytics_match_quantlib(curve, bonds):
+    book = BondBook(bonds)
+    analytics = book.analytics(curve, TODAY)
+    analytics['npv'] = book.npv(curve)
+
+    engine = ql.DiscountingBondEngine(ql.YieldTermStructureHandle(curve))
+    expected = np.array([_ql_measures(bond, engine) for bond in bonds])
+    tolerances = {'clean_price': 1e-12, 'dirty_price': 1e-12, 'accrued': 1e-12, 'ytm': 1e-11,
+                  'duration': 1e-9, 'convexity': 1e-7, 'npv': 1e-12}
+    for j, column in enumerate(['clean_price', 'dirty_price', 'accrued', 'ytm', 'duration', 'convexity', 'npv']):
+        np.testing.assert_allclose(analytics[column].values, expected[:, j], rtol=0, atol=tolerances[column],
+                                   err_msg=column)
+
+
+def test_yield_on_zero_curve(bonds):
+    # undiscounted cashflows are worth their zero yield
+    book = BondBook(bonds)
+    flat = CurveKernel(TODAY, book.day_counter, [0.0, 50.0], [0.0, 0.0])
+    ytm = book.yield_to_maturity(book.clean_price(flat, TODAY), TODAY, accuracy=1e-12)
+    np.testing.assert_allclose(ytm, 0.0, rtol=0, atol=1e-12)
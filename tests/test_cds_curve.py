@@ -0,0 +1,77 @@
+import os
+import pandas as pd
+import pytest
+
+import QuantLib as ql
+
+from quant_lib import cds_curve
+from quant_lib.cds_curve import CreditCurveManager
+from quant_lib.curve_cache import CurveRegistry
+from quant_lib.market_data import MARKET_DATA_DIR
+from quant_lib.quote import tenor_period
+
+
+@pytest.fixture
+def two_names(tmp_path, monkeypatch):
+    # the shipped workbook plus a second reference entity 20% wider
+    sheets = pd.read_excel(os.path.join(MARKET_DATA_DIR, 'cds_data.xlsx'), sheet_name=None)
+    wider = sheets['ROKCDS'].assign(**{'Market.Mid': sheets['ROKCDS']['Market.Mid'] * 1.2})
+    with pd.ExcelWriter(tmp_path / 'cds_data.xlsx') as writer:
+        for name, frame in list(sheets.items()) + [('KDBCDS', wider)]:
+            frame.to_excel(writer, sheet_name=name, index=False)
+    monkeypatch.setattr(cds_curve, 'MARKET_DATA_DIR', str(tmp_path))
+    return ['ROKCDS', 'KDBCDS']
+
+
+def test_names_are_the_cds_sheets(two_names):
+    assert cds_curve.cds_names() == two_names
+
+
+def test_hazard_curves_share_one_discount_curve(two_names, cds_date):
+    manager = CreditCurveManager(registry=CurveRegistry())
+    curves = manager.hazard_curves(cds_date)
+    assert list(curves) == two_names
+    discount_curve = manager.discount_curve(cds_date)
+
+    entries = manager.registry._entries.values()
+    hazard_entries = [entry for entry in entries if entry['builder'].endswith('.cds_curve')]
+    assert [entry['curve'] for entry in hazard_entries] == list(curves.values())
+    assert all(entry['args'][0] is discount_curve for entry in hazard_entries)
+    # one discount curve and one hazard curve per name were bootstrapped
+    assert manager.registry.misses == 1 + len(two_names)
+
+    date = ql.Date(cds_date.day, cds_date.month, cds_date.year) + ql.Period(5, ql.Years)
+    assert curves['KDBCDS'].survivalProbability(date) < curves['ROKCDS'].survivalProbability(date)
+    assert manager.hazard_curve(cds_date, 'KDBCDS') is curves['KDBCDS']
+
+
+def test_unknown_name(cds_date):
+    with pytest.raises(KeyError):
+        cds_curve.get_cds_quote(cds_date, 'NOSUCHCDS')
+    with pytest.raises(KeyError):
+        CreditCurveManager(registry=CurveRegistry()).hazard_curve(cds_date, 'NOSUCHCDS')
+
+
+@pytest.mark.parametrize('label, period', [
+    ('6MO', ql.Period(6, ql.Months)),
+    ('12M', ql.Period(12, ql.Months)),
+    ('2W', ql.Period(2, ql.Weeks)),
+    ('10D', ql.Period(10, ql.Days)),
+    ('5Y', ql.Period(5, ql.Years)),
+    (' 10yr ', ql.Period(10, ql.Years)),
+])
+def test_tenor_period(label, period):
+    assert tenor_period(label) == period
+
+
+@pytest.mark.parametrize('label', ['', 'Y', '5', '5Q', '1.5Y'])
+def test_bad_tenor(label):
+    with pytest.raises(ValueError):
+        tenor_period(label)
+
+
+def test_workbook_tenors(cds_date):
+    quote = cds_curve.get_cds_quote(cds_date)
+    periods = [tenor_period(label) for label in quote.tenors]
+    assert periods[:2] == [ql.Period(6, ql.Months), ql.Period(1, ql.Years)]
+    assert periods[-1] == ql.Period(10, ql.Years)
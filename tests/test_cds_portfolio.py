@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import QuantLib as ql
+
+from quant_lib import cds_curve
+from quant_lib.cds_portfolio import CdsPortfolio, cs01_ladder
+from quant_lib.evaluation import evaluation_date
+from benchmarks.synthetic import cds_trades
+
+
+@pytest.fixture
+def trades(cds_date):
+    return cds_trades(20, cds_date)
+
+
+def _contract(trade, curve, discount_curve):
+    # one contract with its own schedule and engine, as in the CDS notebook
+    pricing_date = ql.Date(trade['pricing_date'].day, trade['pricing_date'].month, trade['pricing_date'].year)
+    maturity_date = ql.Date(trade['maturity_date'].day, trade['maturity_date'].month, trade['maturity_date'].year)
+    calendar = ql.UnitedStates(ql.UnitedStates.Settlement)
+    schedule = ql.Schedule(pricing_date, maturity_date, ql.Period(3, ql.Months), calendar, ql.ModifiedFollowing,
+                           ql.ModifiedFollowing, ql.DateGeneration.CDS, False)
+    side = ql.Protection.Buyer if trade['position'] == 'long' else ql.Protection.Seller
+    cds = ql.CreditDefaultSwap(side, trade['notional'], trade['spread'] / 10000, schedule, ql.ModifiedFollowing,
+                               ql.Actual360())
+    cds.setPricingEngine(ql.MidPointCdsEngine(ql.DefaultProbabilityTermStructureHandle(curve), 0.4,
+                                              ql.YieldTermStructureHandle(discount_curve)))
+    return cds
+
+
+def _per_notional(values, trades):
+    # bootstraps converge to ~1e-12 in spread, so values compare per unit of notional
+    return values / np.array([trade['notional'] for trade in trades])
+
+
+def test_portfolio_matches_single_contracts(cds_date, trades, hazard_curve, discount_curve):
+    with evaluation_date(cds_date):
+        portfolio = CdsPortfolio(trades, hazard_curve, discount_curve)
+        contracts = [_contract(trade, hazard_curve, discount_curve) for trade in trades]
+        np.testing.assert_array_equal(portfolio.npv(), [cds.NPV() for cds in contracts])
+        np.testing.assert_array_equal(portfolio.fair_spread(), [cds.fairSpread() * 10000 for cds in contracts])
+        np.testing.assert_allclose(portfolio.premium_leg() + portfolio.protection_leg(), portfolio.npv(),
+                                   rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize('central', [False, True])
+def test_cs01_ladder_matches_bump_and_rebuild(cds_date, trades, discount_curve, central):
+    record = cds_curve.get_cds_quote(cds_date)
+    ladder = cs01_ladder(trades, cds_curve.cds_curve, cds_date, record, discount_curve, central=central)
+
+    def rebuilt(mids):
+        with evaluation_date(cds_date):
+            curve = cds_curve.cds_curve(cds_date, record.with_mids(mids), discount_curve)
+            return CdsPortfolio(trades, curve, discount_curve).npv()
+
+    base = rebuilt(record.mids)
+    for tenor in ladder.columns:
+        bumped = record.mids + np.where(record.tenors == tenor, 1.0, 0.0)
+        expected = rebuilt(bumped) - base
+        if central:
+            expected = (expected + base - rebuilt(2 * record.mids - bumped)) / 2
+        np.testing.assert_allclose(_per_notional(ladder[tenor].values, trades), _per_notional(expected, trades),
+                                   rtol=0, atol=1e-11)
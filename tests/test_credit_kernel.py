@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from quant_lib.credit_kernel import HazardKernel, monthly_dates, probability_surface
+
+
+@pytest.fixture
+def dates(hazard_curve):
+    # every month to 30 years: node dates, between nodes and past the last one
+    hazard_curve.enableExtrapolation()
+    return monthly_dates(hazard_curve.referenceDate(), years=30)
+
+
+def _reference(curve, dates, method):
+    import QuantLib as ql
+    return np.array([getattr(curve, method)(ql.Date(int(serial))) for serial in dates])
+
+
+@pytest.mark.parametrize('kind, method', [
+    ('survival', 'survivalProbability'),
+    ('default', 'defaultProbability'),
+    ('hazard', 'hazardRate'),
+    ('density', 'defaultDensity'),
+])
+def test_kernel_matches_curve(hazard_curve, dates, kind, method):
+    kernel = HazardKernel.from_curve(hazard_curve)
+    values = {'survival': kernel.survival, 'default': kernel.default,
+              'hazard': kernel.hazard_rate, 'density': kernel.default_density}[kind](dates)
+    np.testing.assert_allclose(values, _reference(hazard_curve, dates, method), rtol=1e-13, atol=1e-15)
+
+
+def test_kernel_on_node_dates(hazard_curve):
+    kernel = HazardKernel.from_curve(hazard_curve)
+    nodes = [date.serialNumber() for date, _ in hazard_curve.nodes()]
+    np.testing.assert_allclose(kernel.hazard_rate(nodes), _reference(hazard_curve, nodes, 'hazardRate'), rtol=1e-15)
+    np.testing.assert_allclose(kernel.survival(nodes), _reference(hazard_curve, nodes, 'survivalProbability'),
+                               rtol=1e-14)
+
+
+def test_surface_memory_map(tmp_path, hazard_curve, dates):
+    path = str(tmp_path / 'survival.npy')
+    surface = probability_surface({'ROKCDS': hazard_curve, 'copy': hazard_curve}, dates, path=path)
+
+    assert surface.shape == (2, len(dates))
+    np.testing.assert_array_equal(np.load(path), surface)
+    np.testing.assert_allclose(surface[0], _reference(hazard_curve, dates, 'survivalProbability'), rtol=1e-13)
+
+
+def test_unknown_surface(hazard_curve, dates):
+    with pytest.raises(ValueError):
+        probability_surface([hazard_curve], dates, kind='recovery')
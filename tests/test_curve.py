@@ -0,0 +1,169 @@
+import os
+import socket
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+
+import QuantLib as ql
+
+from quant_lib import curve
+from quant_lib.page_fetch import PageFetcher
+
+
+# WSJ treasury pages of 14 October 2022, trimmed to the elements the parser reads
+RECORDED = os.path.join(os.path.dirname(__file__), 'data', 'wsj')
+RECORDED_DATE = datetime.date(2022, 10, 14)
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    def connect(*args, **kwargs):
+        raise AssertionError("network access in replay mode")
+
+    monkeypatch.setattr(socket.socket, 'connect', connect)
+    return PageFetcher(replay_dir=RECORDED)
+
+
+def test_replayed_quote(offline):
+    assert curve.get_date(offline) == RECORDED_DATE
+    quote = curve.get_quote(RECORDED_DATE, offline)
+
+    assert len(quote) == len(curve.TENORS)
+    assert quote.loc[datetime.date(2032, 8, 15)].tolist() == [3593, 4.0, 2.75]
+    assert (quote['coupon'].iloc[:4] == 0.0).all()
+
+
+def test_missing_recording_fails(offline):
+    with pytest.raises(FileNotFoundError):
+        offline.fetch('TMUBMUSD20Y', 'https://www.wsj.com/', RECORDED_DATE)
+
+
+class _Session():
+    # stands in for requests.Session, one fresh page per call
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    @property
+    def text(self):
+        return '<html>{}</html>'.format(self.calls)
+
+
+def test_cache_serves_repeat_fetches(tmp_path, offline):
+    fetcher = PageFetcher(cache_dir=str(tmp_path))
+    fetcher.session = _Session()
+    html = fetcher.fetch('TMUBMUSD10Y', 'https://www.wsj.com/', RECORDED_DATE)
+    assert fetcher.fetch('TMUBMUSD10Y', 'https://www.wsj.com/', RECORDED_DATE) == html
+    assert fetcher.session.calls == 1
+
+    # a live page is filed under the day it was fetched, where a replay finds it
+    assert os.listdir(tmp_path) == [datetime.date.today().isoformat()]
+    assert PageFetcher(replay_dir=str(tmp_path)).fetch('TMUBMUSD10Y', None) == html
+
+
+def test_cache_does_not_serve_other_days_or_stale_pages(tmp_path, offline):
+    fetcher = PageFetcher(cache_dir=str(tmp_path), max_age=60)
+    fetcher.session = _Session()
+    # a page recorded on the requested date is not what the live site shows now
+    old = fetcher._path(str(tmp_path), 'TMUBMUSD10Y', RECORDED_DATE)
+    fetcher._write(old, '<html>old</html>')
+    assert fetcher.fetch('TMUBMUSD10Y', 'https://www.wsj.com/', RECORDED_DATE) == '<html>1</html>'
+
+    path = fetcher._path(str(tmp_path), 'TMUBMUSD10Y', datetime.date.today())
+    stale = os.path.getmtime(path) - 120
+    os.utime(path, (stale, stale))
+    assert fetcher.fetch('TMUBMUSD10Y', 'https://www.wsj.com/') == '<html>2</html>'
+    assert fetcher.session.calls == 2
+
+
+def _bonds(quote, today):
+    # the quoted issues as QuantLib bonds and their clean prices at the quoted yields
+    calendar = ql.UnitedStates(ql.UnitedStates.GovernmentBond)
+    day_counter = ql.ActualActual(ql.ActualActual.ISDA)
+    issue_date = ql.Date(today.day, today.month, today.year)
+    ql.Settings.instance().evaluationDate = issue_date
+    bonds, prices = [], []
+    for maturity, row in quote.iterrows():
+        schedule = ql.Schedule(issue_date, ql.Date(maturity.day, maturity.month, maturity.year),
+                               ql.Period(ql.Semiannual), calendar, ql.ModifiedFollowing, ql.ModifiedFollowing,
+                               ql.DateGeneration.Backward, False)
+        bond = ql.FixedRateBond(1, 100, schedule, [row['coupon'] / 100], day_counter, ql.ModifiedFollowing)
+        bonds.append(bond)
+        prices.append(bond.cleanPrice(row['price'] / 100, day_counter, ql.Compounded, ql.Semiannual))
+    return bonds, np.array(prices)
+
+
+def test_treasury_curve_from_replay(offline):
+    quote = curve.get_quote(RECORDED_DATE, offline)
+    bootstrapped = curve.treasury_curve(RECORDED_DATE, quote)
+
+    assert bootstrapped.referenceDate() == ql.Date(14, 10, 2022)
+    discounts = np.array([bootstrapped.discount(ql.Date(d.day, d.month, d.year)) for d in quote.index])
+    assert ((discounts > 0.0) & (discounts < 1.0)).all()
+
+
+def test_fitted_treasury_curve_from_replay(offline):
+    quote = curve.get_quote(RECORDED_DATE, offline)
+    bonds, prices = _bonds(quote, RECORDED_DATE)
+    universe = pd.DataFrame({'maturity': quote.index, 'coupon': quote['coupon'].values, 'price': prices})
+    fitted = curve.fitted_treasury_curve(RECORDED_DATE, universe, method='svensson')
+
+    engine = ql.DiscountingBondEngine(ql.YieldTermStructureHandle(fitted))
+    for bond in bonds:
+        bond.setPricingEngine(engine)
+    # six parameters through ten issues: yields within a few basis points
+    day_counter = ql.ActualActual(ql.ActualActual.ISDA)
+    yields = [bond.bondYield(bond.cleanPrice(), day_counter, ql.Compounded, ql.Semiannual) for bond in bonds]
+    np.testing.assert_allclose(yields, quote['price'].values / 100, rtol=0, atol=10e-4)
+
+
+@pytest.fixture
+def universe(offline):
+    quote = curve.get_quote(RECORDED_DATE, offline)
+    _, prices = _bonds(quote, RECORDED_DATE)
+    return pd.DataFrame({'maturity': quote.index, 'coupon': quote['coupon'].values, 'price': prices})
+
+
+def test_fitter_warm_starts(universe, tmp_path):
+    # the next day, prices one cent higher
+    next_day = RECORDED_DATE + datetime.timedelta(days=1)
+    moved = universe.assign(price=universe['price'] + 0.01)
+
+    cold = curve.TreasuryCurveFitter()
+    cold_cost = cold.fit(next_day, moved).fitResults().minimumCostValue()
+    fitter = curve.TreasuryCurveFitter(cache_dir=str(tmp_path))
+    fitter.fit(RECORDED_DATE, universe)
+    assert fitter.guess(next_day) is fitter.parameters[RECORDED_DATE]
+    warm_curve = fitter.fit(next_day, moved)
+    # fewer simplex iterations to a fit at least as close as the cold start's
+    assert fitter.iterations[next_day] < cold.iterations[next_day]
+    assert warm_curve.fitResults().minimumCostValue() <= cold_cost
+
+    # the parameters of every date come back from the cache file
+    reopened = curve.TreasuryCurveFitter(cache_dir=str(tmp_path))
+    assert sorted(reopened.parameters) == [RECORDED_DATE, next_day]
+    for date, parameters in fitter.parameters.items():
+        np.testing.assert_array_equal(reopened.parameters[date], parameters)
+    assert reopened.guess(next_day + datetime.timedelta(days=1)) is reopened.parameters[next_day]
+
+
+def test_fitter_without_usable_cache(universe, tmp_path):
+    # no cache file yet
+    assert curve.TreasuryCurveFitter(cache_dir=str(tmp_path)).guess(RECORDED_DATE) is None
+
+    with open(tmp_path / 'fitted_svensson.json', 'w') as f:
+        f.write('{"2022-10-14": [0.01, ')
+    with pytest.warns(RuntimeWarning):
+        fitter = curve.TreasuryCurveFitter(cache_dir=str(tmp_path))
+    assert fitter.parameters == {} and fitter.guess(RECORDED_DATE) is None
+
+    # a fit from the default guess replaces the corrupt file
+    fitter.fit(RECORDED_DATE, universe)
+    assert list(curve.TreasuryCurveFitter(cache_dir=str(tmp_path)).parameters) == [RECORDED_DATE]
@@ -0,0 +1,79 @@
+import datetime
+import pytest
+
+import QuantLib as ql
+
+from quant_lib import swap_curve
+from quant_lib.curve_cache import CurveRegistry
+
+
+def _curve(today, quote):
+    # stands in for a builder, a fresh object per bootstrap
+    return object()
+
+
+def _other_curve(today, quote):
+    return object()
+
+
+@pytest.fixture
+def record(swap_date):
+    return swap_curve.get_quote(swap_date)
+
+
+def test_hit_returns_the_same_curve(record, swap_date):
+    registry = CurveRegistry()
+    curve = registry.get(swap_curve.swap_curve, swap_date, record)
+    # a reloaded quote with the same content is the same key
+    assert registry.get(swap_curve.swap_curve, swap_date, swap_curve.get_quote(swap_date)) is curve
+    assert (registry.hits, registry.misses) == (1, 1)
+    assert curve in registry
+
+
+def test_hit_sets_the_evaluation_date(record, swap_date):
+    registry = CurveRegistry()
+    registry.get(swap_curve.swap_curve, swap_date, record)
+    ql.Settings.instance().evaluationDate = ql.Date(1, 1, 2019)
+    registry.get(swap_curve.swap_curve, swap_date, record)
+    assert ql.Settings.instance().evaluationDate == ql.Date(swap_date.day, swap_date.month, swap_date.year)
+
+
+def test_changed_quote_is_another_key(record, swap_date):
+    registry = CurveRegistry()
+    mids = record.mids.copy()
+    mids[3] += 0.01
+    bumped = record.with_mids(mids)
+    assert registry.key(_curve, swap_date, record) != registry.key(_curve, swap_date, bumped)
+    assert registry.key(_curve, swap_date, record) != registry.key(_other_curve, swap_date, record)
+    assert registry.get(_curve, swap_date, record) is not registry.get(_curve, swap_date, bumped)
+    assert registry.misses == 2
+
+
+def test_invalidate_drops_matching_entries(record, swap_date):
+    registry = CurveRegistry()
+    later = swap_date + datetime.timedelta(days=1)
+    kept = registry.get(_other_curve, swap_date, record)
+    registry.get(_curve, swap_date, record)
+    other_day = registry.get(_curve, later, record)
+
+    assert registry.invalidate(swap_date, _curve) == 1
+    assert len(registry) == 2
+    assert registry.get(_other_curve, swap_date, record) is kept
+    assert registry.get(_curve, later, record) is other_day
+
+    assert registry.invalidate(today=later) == 1
+    assert registry.invalidate(builder=_other_curve) == 1
+    assert len(registry) == 0 and kept not in registry
+
+
+def test_bounded_lru(record, swap_date):
+    registry = CurveRegistry(maxsize=3)
+    dates = [swap_date + datetime.timedelta(days=k) for k in range(4)]
+    curves = [registry.get(_curve, today, record) for today in dates[:3]]
+    # touching the oldest entry makes the second one the next to go
+    assert registry.get(_curve, dates[0], record) is curves[0]
+    registry.get(_curve, dates[3], record)
+
+    assert len(registry) == 3
+    assert curves[1] not in registry
+    assert curves[0] in registry and curves[2] in registry
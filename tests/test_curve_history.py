@@ -0,0 +1,96 @@
+import datetime
+import numpy as np
+import pytest
+
+import QuantLib as ql
+
+from quant_lib.curve_history import CURVE_BUILDERS, CurveHistory
+from quant_lib.discount_kernel import CurveKernel
+from quant_lib.credit_kernel import HazardKernel, monthly_dates
+from quant_lib.evaluation import evaluation_date
+
+
+DATES = [datetime.date(2020, 10, 7), datetime.date(2020, 10, 8), datetime.date(2020, 10, 9)]
+
+
+def _between_nodes(curve):
+    # every month to 30 years plus the node dates themselves
+    nodes = [date.serialNumber() for date, _ in curve.nodes()]
+    return [ql.Date(int(serial)) for serial in np.union1d(monthly_dates(curve.referenceDate(), years=30), nodes)]
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = CurveHistory(str(tmp_path / 'history'))
+    history.update('swap', DATES)
+    return history
+
+
+def test_rehydrated_zero_curve_matches_bootstrap(history):
+    for today in DATES:
+        with evaluation_date(today):
+            fresh = CURVE_BUILDERS['swap'](today)
+            stored = history.curve('swap', today)
+            fresh.enableExtrapolation()
+            stored.enableExtrapolation()
+            dates = _between_nodes(fresh)
+
+            assert stored.referenceDate() == fresh.referenceDate()
+            assert stored.dayCounter() == fresh.dayCounter()
+            np.testing.assert_allclose([stored.discount(date) for date in dates],
+                                       [fresh.discount(date) for date in dates], rtol=1e-15)
+
+            kernel = history.kernel('swap', today)
+            np.testing.assert_allclose(kernel.discount(dates), CurveKernel.from_curve(fresh).discount(dates),
+                                       rtol=1e-15)
+
+
+def test_rehydrated_hazard_curve_matches_bootstrap(tmp_path, cds_date, hazard_curve):
+    history = CurveHistory(str(tmp_path / 'history'))
+    with evaluation_date(cds_date):
+        history.append('cds', cds_date, hazard_curve)
+        stored = history.curve('cds', cds_date)
+        stored.enableExtrapolation()
+        hazard_curve.enableExtrapolation()
+        dates = _between_nodes(hazard_curve)
+
+        np.testing.assert_allclose([stored.survivalProbability(date) for date in dates],
+                                   [hazard_curve.survivalProbability(date) for date in dates], rtol=1e-15)
+        kernel = history.kernel('cds', cds_date)
+        assert isinstance(kernel, HazardKernel)
+        np.testing.assert_allclose(kernel.survival(dates), HazardKernel.from_curve(hazard_curve).survival(dates),
+                                   rtol=1e-15)
+
+
+def test_update_is_incremental(history):
+    assert history.names() == ['swap']
+    assert history.last_date('swap') == DATES[-1]
+    assert history.update('swap', DATES) == []
+    assert history.update('swap', DATES + [datetime.date(2020, 10, 13)]) == [datetime.date(2020, 10, 13)]
+
+    dates, nodes, values = history.matrix('swap', start=DATES[1], end=DATES[2])
+    np.testing.assert_array_equal(dates, np.array(DATES[1:], dtype='datetime64[D]'))
+    assert nodes.shape == values.shape == (2, history.max_nodes)
+    assert list(history.frame('swap').index.date) == DATES + [datetime.date(2020, 10, 13)]
+
+
+def test_rejects_dates_out_of_order(history):
+    curve = history.curve('swap', DATES[0])
+    with pytest.raises(ValueError):
+        history.append('swap', DATES[0], curve)
+
+
+def test_missing_date(history):
+    with pytest.raises(KeyError):
+        history.curve('swap', datetime.date(2020, 10, 10))
+
+
+def test_uncommitted_rows_are_dropped(history, tmp_path):
+    # a write interrupted before meta.json moved on leaves bytes the next append discards
+    with open(tmp_path / 'history' / 'swap' / 'values.bin', 'ab') as f:
+        f.write(b'\0' * 13)
+    assert history.update('swap', [datetime.date(2020, 10, 13)]) == [datetime.date(2020, 10, 13)]
+
+    reopened = CurveHistory(str(tmp_path / 'history'))
+    for today in DATES:
+        assert reopened.nodes('swap', today) == history.nodes('swap', today)
@@ -0,0 +1,59 @@
+import datetime
+import numpy as np
+import pytest
+
+import QuantLib as ql
+
+from quant_lib import swap_curve
+from quant_lib.discount_kernel import CurveKernel
+
+
+@pytest.fixture
+def curve(swap_date):
+    return swap_curve.swap_curve(swap_date, swap_curve.get_quote(swap_date))
+
+
+@pytest.fixture
+def dates(curve):
+    # every third day out to the last node, then past it on the flat forward extrapolation
+    last = curve.maxDate().serialNumber() - curve.referenceDate().serialNumber()
+    return [curve.referenceDate() + days for days in list(range(0, last, 3)) + [last]]
+
+
+def test_discount_matches_curve(curve, dates):
+    kernel = CurveKernel.from_curve(curve)
+    expected = np.array([curve.discount(date) for date in dates])
+    np.testing.assert_allclose(kernel.discount(dates), expected, rtol=0, atol=1e-15)
+
+
+def test_zero_rate_matches_curve(curve, dates):
+    kernel = CurveKernel.from_curve(curve)
+    expected = np.array([curve.zeroRate(date, ql.Actual360(), ql.Compounded, ql.Semiannual).rate()
+                         for date in dates])
+    np.testing.assert_allclose(kernel.zero_rate(dates), expected, rtol=0, atol=1e-12)
+
+
+def test_instantaneous_forward_matches_curve(curve, dates):
+    kernel = CurveKernel.from_curve(curve)
+    expected = np.array([curve.forwardRate(date, date, ql.Actual360(), ql.Compounded, ql.Semiannual).rate()
+                         for date in dates])
+    np.testing.assert_allclose(kernel.forward_rate(dates), expected, rtol=0, atol=1e-12)
+    assert kernel.forward_rate(dates[10]) == pytest.approx(expected[10], abs=1e-12)
+
+
+def test_period_forward_matches_curve(curve, dates):
+    kernel = CurveKernel.from_curve(curve)
+    starts, ends = dates[:-60], dates[60:]
+    expected = np.array([curve.forwardRate(start, end, ql.Actual360(), ql.Compounded, ql.Semiannual).rate()
+                         for start, end in zip(starts, ends)])
+    np.testing.assert_allclose(kernel.forward_rate(starts, ends), expected, rtol=0, atol=1e-12)
+
+
+def test_present_value_of_padded_cashflows(curve):
+    kernel = CurveKernel.from_curve(curve)
+    dates = np.array([[datetime.date(2021, 4, 13), datetime.date(2021, 10, 13)],
+                      [datetime.date(2022, 10, 13), datetime.date(2022, 10, 13)]], dtype='datetime64[D]')
+    amounts = np.array([[100.0, 200.0], [300.0, 0.0]])
+    expected = [100.0 * curve.discount(ql.Date(13, 4, 2021)) + 200.0 * curve.discount(ql.Date(13, 10, 2021)),
+                300.0 * curve.discount(ql.Date(13, 10, 2022))]
+    np.testing.assert_allclose(kernel.present_value(dates, amounts), expected, rtol=1e-14)
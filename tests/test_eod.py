@@ -0,0 +1,86 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+from quant_lib import eod
+from quant_lib.curve_cache import CurveRegistry
+from benchmarks.synthetic import swap_trades, cds_trades
+
+
+@pytest.fixture
+def book(tmp_path, cds_date):
+    # a mixed book, IRS and CDS interleaved so every chunk prices both
+    swaps = pd.DataFrame(swap_trades(30, cds_date)).assign(product='irs')
+    credit = pd.DataFrame(cds_trades(20, cds_date)).assign(product='cds')
+    frame = pd.concat([swaps, credit]).sort_index(kind='stable').reset_index(drop=True)
+    path = str(tmp_path / 'trades.csv')
+    frame.to_csv(path, index=False)
+    return path
+
+
+def _run(book, today, output_dir, **kwargs):
+    curves = eod.EodCurves(today, registry=CurveRegistry())
+    return eod.run_eod(book, today, str(output_dir), chunk_size=10, fmt='csv', curves=curves, **kwargs)
+
+
+def test_prices_every_trade(book, cds_date, tmp_path):
+    summary = _run(book, cds_date, tmp_path / 'out')
+    assert summary['trades'] == 50 and summary['chunks'] == 5 and summary['resumed_chunks'] == 0
+
+    swaps, credit = eod.read_results(str(tmp_path / 'out'), 'irs'), eod.read_results(str(tmp_path / 'out'), 'cds')
+    trades = pd.read_csv(book)
+    assert sorted(swaps['trade_id']) == list(trades.index[trades['product'] == 'irs'])
+    assert sorted(credit['trade_id']) == list(trades.index[trades['product'] == 'cds'])
+    assert (credit['name'] == eod.DEFAULT_NAME).all()
+    assert [column for column in swaps.columns if column.startswith('delta_')]
+    assert [column for column in credit.columns if column.startswith('cs01_')]
+    assert np.isfinite(swaps.drop(columns='trade_id').values).all()
+
+
+def test_resume_after_failure(book, cds_date, tmp_path, monkeypatch):
+    expected = _run(book, cds_date, tmp_path / 'expected')
+
+    price_chunk, calls = eod.price_chunk, []
+
+    def failing(chunk, curves):
+        calls.append(len(calls))
+        if len(calls) == 3:
+            raise RuntimeError('pricing failed')
+        return price_chunk(chunk, curves)
+
+    monkeypatch.setattr(eod, 'price_chunk', failing)
+    with pytest.raises(RuntimeError):
+        _run(book, cds_date, tmp_path / 'out')
+    with open(tmp_path / 'out' / 'checkpoint.json') as f:
+        assert json.load(f)['done'] == [0, 1]
+
+    monkeypatch.setattr(eod, 'price_chunk', price_chunk)
+    summary = _run(book, cds_date, tmp_path / 'out')
+    assert summary['resumed_chunks'] == 2
+    assert summary['trades'] == expected['trades'] and summary['chunks'] == expected['chunks']
+    for product in ('irs', 'cds'):
+        pd.testing.assert_frame_equal(eod.read_results(str(tmp_path / 'out'), product),
+                                      eod.read_results(str(tmp_path / 'expected'), product))
+
+    # a finished run has nothing left to do
+    assert _run(book, cds_date, tmp_path / 'out')['resumed_chunks'] == 5
+
+
+def test_checkpoint_of_another_run(book, cds_date, tmp_path):
+    _run(book, cds_date, tmp_path / 'out')
+    curves = eod.EodCurves(cds_date, registry=CurveRegistry())
+    with pytest.raises(ValueError):
+        eod.run_eod(book, cds_date, str(tmp_path / 'out'), chunk_size=20, fmt='csv', curves=curves)
+
+    # the same path holding another book is another run as well
+    pd.read_csv(book).iloc[:-1].to_csv(book, index=False)
+    with pytest.raises(ValueError):
+        _run(book, cds_date, tmp_path / 'out')
+
+
+def test_unknown_product(cds_date, tmp_path):
+    path = str(tmp_path / 'trades.csv')
+    pd.DataFrame(swap_trades(2, cds_date)).assign(product=['irs', 'swaption']).to_csv(path, index=False)
+    with pytest.raises(ValueError):
+        _run(path, cds_date, tmp_path / 'out')
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+import QuantLib as ql
+
+from quant_lib import swap_curve
+from quant_lib.credit_kernel import HazardKernel
+from quant_lib.evaluation import evaluation_date
+from quant_lib.exposure import HullWhite, SwapExposure, cva, exposure_profile
+from quant_lib.irs_portfolio import SwapPortfolio
+from benchmarks.synthetic import swap_trades
+
+
+@pytest.fixture
+def curve(swap_date):
+    with evaluation_date(swap_date):
+        return swap_curve.swap_curve(swap_date, swap_curve.get_quote(swap_date))
+
+
+@pytest.fixture
+def trades(swap_date):
+    return swap_trades(10, swap_date)
+
+
+@pytest.fixture
+def exposure(curve, trades, swap_date):
+    # the curve bootstraps on its first use here, against the curve date's helpers
+    with evaluation_date(swap_date):
+        return SwapExposure(trades, curve, HullWhite(0.03, 0.01))
+
+
+def _forward_value(book, t):
+    # value at 0 of the cashflows still to come after t, read off the initial curve
+    fixed = book.times[book.fixed_pay] > t
+    floating = book.times[book.float_pay] > t
+    return (book.fixed_amount[fixed] * book.discounts[book.fixed_pay[fixed]]).sum() + (
+        book.float_notional[floating] * book.float_scale[floating]
+        * (book.discounts[book.float_start[floating]] - book.discounts[book.float_end[floating]])
+        + book.float_spread[floating] * book.discounts[book.float_pay[floating]]
+    ).sum()
+
+
+def test_initial_value_matches_portfolio(exposure, curve, trades, swap_date):
+    values, deflators = exposure.simulate(paths=100)
+    with evaluation_date(swap_date):
+        npv = SwapPortfolio(trades, curve).npv().sum()
+
+    notional = sum(trade['notional'] for trade in trades)
+    np.testing.assert_allclose(values[:, 0], npv, rtol=0, atol=1e-10 * notional)
+    np.testing.assert_array_equal(deflators[:, 0], 1.0)
+
+
+def test_deflated_values_are_martingales(exposure):
+    # E[D(t) V(t)] is what is left of the book at t valued on the initial curve
+    values, deflators = exposure.simulate(paths=20000, block_size=5000)
+    np.testing.assert_allclose(deflators.mean(axis=0), exposure.discounts, rtol=5e-3)
+    for k in (5, 13, 30, 60):
+        deflated = values[:, k] * deflators[:, k]
+        error = deflated.std() / np.sqrt(len(deflated))
+        assert abs(deflated.mean() - _forward_value(exposure.book, exposure.times[k])) < 4.0 * error
+
+
+def test_seeded_and_independent_of_workers(exposure):
+    values, deflators = exposure.simulate(paths=300, seed=7, block_size=100)
+    again = exposure.simulate(paths=300, seed=7, block_size=100)
+    pooled = exposure.simulate(paths=300, seed=7, block_size=100, max_workers=2)
+    other = exposure.simulate(paths=300, seed=8, block_size=100)
+
+    for result in (again, pooled):
+        np.testing.assert_array_equal(result[0], values)
+        np.testing.assert_array_equal(result[1], deflators)
+    assert not np.array_equal(other[0], values)
+
+
+def test_profile(exposure):
+    values, deflators = exposure.simulate(paths=500)
+    profile = exposure_profile(values, deflators, exposure.dates)
+    assert list(profile.index) == exposure.dates
+    assert (profile['epe'] >= 0.0).all() and (profile['ene'] <= 0.0).all()
+    np.testing.assert_allclose(profile['epe'] + profile['ene'], values.mean(axis=0))
+    assert profile.equals(exposure.profile(paths=500))
+
+
+def test_cva_flat_hazard(exposure, swap_date):
+    profile = exposure.profile(paths=500)
+    reference = ql.Date(swap_date.day, swap_date.month, swap_date.year)
+    flat = HazardKernel(reference, ql.Actual365Fixed(), [0.0, 100.0], [0.02, 0.02])
+
+    times = np.array([ql.Actual365Fixed().yearFraction(reference, ql.Date(d.day, d.month, d.year))
+                      for d in profile.index])
+    defaults = np.exp(-0.02 * times[:-1]) - np.exp(-0.02 * times[1:])
+    expected = 0.6 * np.sum(profile['discounted_epe'].values[1:] * defaults)
+    assert cva(profile, flat) == pytest.approx(expected, rel=1e-12)
+    assert cva(profile, flat, recovery_rate=1.0) == 0.0
+    assert cva(profile, HazardKernel(reference, ql.Actual365Fixed(), [0.0, 100.0], [0.0, 0.0])) == 0.0
+
+
+def test_started_coupons_rejected(curve, swap_date):
+    trades = swap_trades(1, swap_date)
+    trades[0]['pricing_date'] = trades[0]['pricing_date'].replace(year=swap_date.year - 1)
+    with evaluation_date(swap_date), pytest.raises(ValueError):
+        SwapExposure(trades, curve)
@@ -0,0 +1,144 @@
+import datetime
+import dataclasses
+import numpy as np
+import pytest
+
+import QuantLib as ql
+
+from quant_lib.curve_cache import CurveRegistry
+from quant_lib.evaluation import evaluation_date
+from quant_lib.fx_swap_curve import CrossCurrencyEngine, get_quote, krwccs_curve, payment_date, usdirs_curve
+
+
+FX_SPOT = 1133.85
+CALENDAR = ql.JointCalendar(ql.SouthKorea(), ql.UnitedStates(ql.UnitedStates.Settlement))
+
+
+@pytest.fixture
+def engine(swap_date):
+    return CrossCurrencyEngine(swap_date, FX_SPOT, registry=CurveRegistry())
+
+
+def _date(date):
+    return ql.Date(date.day, date.month, date.year)
+
+
+def _spreaded(curve, spread):
+    return ql.ZeroSpreadedTermStructure(ql.YieldTermStructureHandle(curve), ql.QuoteHandle(ql.SimpleQuote(spread)))
+
+
+def _fx_forward(trade, usd_curve, krw_curve, spot):
+    maturity = _date(trade['maturity_date'])
+    sign = 1.0 if trade['position'] == 'long' else -1.0
+    return sign * trade['usd_notional'] * (spot * usd_curve.discount(maturity)
+                                           - trade['fx_forward'] * krw_curve.discount(maturity))
+
+
+def _ccs(trade, usd_curve, krw_curve, spot):
+    # cashflow by cashflow on the QuantLib curves, as the CCS notebook
+    reference = usd_curve.referenceDate()
+    dates = list(ql.Schedule(_date(trade['effective_date']), _date(trade['maturity_date']), ql.Period(6, ql.Months),
+                             CALENDAR, ql.ModifiedFollowing, ql.ModifiedFollowing, ql.DateGeneration.Backward, False))
+    pay = lambda date: CALENDAR.advance(date, 2, ql.Days, ql.ModifiedFollowing)
+    usd_notional = trade['usd_notional']
+    krw_notional = usd_notional * trade.get('fx_rate', FX_SPOT)
+    sign = -1.0 if trade['position'] == 'long' else 1.0
+
+    krw_flows = [(pay(dates[0]), -krw_notional), (pay(dates[-1]), krw_notional)] + [
+        (pay(end), krw_notional * trade['ccs_rate'] * ql.Actual365Fixed().yearFraction(start, end))
+        for start, end in zip(dates[:-1], dates[1:])
+    ]
+    krw = sum(sign * amount * krw_curve.discount(date) for date, amount in krw_flows if date > reference)
+    usd = sum(-sign * amount * usd_curve.discount(date)
+              for date, amount in [(pay(dates[0]), -usd_notional), (pay(dates[-1]), usd_notional)] if date > reference)
+    for start, end in zip(dates[:-1], dates[1:]):
+        if pay(end) <= reference:
+            continue
+        rate = trade['fixing'] if start < reference else \
+            usd_curve.forwardRate(start, end, ql.Actual360(), ql.Simple).rate()
+        usd -= sign * usd_notional * (rate + trade.get('spread', 0.0)) * ql.Actual360().yearFraction(start, end) \
+            * usd_curve.discount(pay(end))
+    return krw + usd * spot
+
+
+def _sensitivities(price, trade, usd_curve, krw_curve):
+    return [
+        price(trade, usd_curve, krw_curve, FX_SPOT),
+        (price(trade, usd_curve, krw_curve, FX_SPOT * 1.01) - price(trade, usd_curve, krw_curve, FX_SPOT * 0.99)) / 2,
+        (price(trade, _spreaded(usd_curve, 1e-4), krw_curve, FX_SPOT)
+         - price(trade, _spreaded(usd_curve, -1e-4), krw_curve, FX_SPOT)) / 2,
+        (price(trade, usd_curve, _spreaded(krw_curve, 1e-4), FX_SPOT)
+         - price(trade, usd_curve, _spreaded(krw_curve, -1e-4), FX_SPOT)) / 2,
+    ]
+
+
+def test_fx_forwards_match_curves(engine, swap_date):
+    rng = np.random.default_rng(0)
+    trades = [dict(maturity_date=swap_date + datetime.timedelta(days=int(rng.integers(-10, 3650))),
+                   fx_forward=float(rng.uniform(1050, 1250)), usd_notional=float(rng.uniform(1e6, 2e7)),
+                   position='long' if rng.random() < 0.5 else 'short') for _ in range(30)]
+    result = engine.price_fx_forwards(trades, theta_days=0)
+
+    for trade, row in zip(trades, result[['npv', 'fx_delta', 'usd_ir_delta', 'krw_ir_delta']].values):
+        if _date(trade['maturity_date']) <= engine.usd_curve.referenceDate():
+            np.testing.assert_array_equal(row, 0.0)
+        else:
+            np.testing.assert_allclose(row, _sensitivities(_fx_forward, trade, engine.usd_curve, engine.krw_curve),
+                                       rtol=1e-10, atol=1e-5)
+
+
+def test_ccs_match_cashflows(engine, swap_date):
+    rng = np.random.default_rng(0)
+    trades = []
+    for _ in range(30):
+        effective = swap_date + datetime.timedelta(days=int(rng.integers(-700, 400)))
+        maturity = max(effective + datetime.timedelta(days=int(rng.integers(1, 20)) * 182),
+                       swap_date + datetime.timedelta(days=400))
+        trades.append(dict(effective_date=effective, maturity_date=maturity, ccs_rate=float(rng.uniform(0, 0.02)),
+                           usd_notional=float(rng.uniform(1e6, 2e7)), position=rng.choice(['long', 'short']),
+                           spread=float(rng.uniform(0, 0.002)), fixing=0.0025))
+    result = engine.price_ccs(trades, theta_days=0)
+
+    for trade, row in zip(trades, result[['npv', 'fx_delta', 'usd_ir_delta', 'krw_ir_delta']].values):
+        np.testing.assert_allclose(row, _sensitivities(_ccs, trade, engine.usd_curve, engine.krw_curve),
+                                   rtol=1e-10, atol=1e-5)
+
+
+def test_started_coupon_needs_fixing(engine, swap_date):
+    trade = dict(effective_date=swap_date - datetime.timedelta(days=30),
+                 maturity_date=swap_date + datetime.timedelta(days=700),
+                 ccs_rate=0.01, usd_notional=1e7, position='long')
+    with pytest.raises(ValueError):
+        engine.price_ccs([trade], theta_days=0)
+
+
+def test_theta_rolls_down_constant_tenors(engine, swap_date):
+    trades = [dict(maturity_date=swap_date + datetime.timedelta(days=365), fx_forward=1140.0, usd_notional=1e7,
+                   position='long')]
+    result = engine.price_fx_forwards(trades)
+    assert ql.Settings.instance().evaluationDate == _date(swap_date)
+
+    # the same quotes and tenors one day later: the quote records keep their day counts
+    tomorrow = swap_date + datetime.timedelta(days=1)
+    with evaluation_date(tomorrow):
+        curves = [builder(tomorrow, dataclasses.replace(get_quote(swap_date, ticker), reference_date=tomorrow))
+                  for builder, ticker in ((usdirs_curve, 'USD'), (krwccs_curve, 'KRW'))]
+        rebuilt = CrossCurrencyEngine(tomorrow, FX_SPOT, CurveRegistry(), *curves).price_fx_forwards(trades, 0)
+    # a difference of two values of the order of the notional, bootstraps converge to ~1e-12
+    notional = 1e7 * 1140.0
+    assert result['theta'][0] == pytest.approx(rebuilt['npv'][0] - result['npv'][0], abs=1e-12 * notional)
+
+    with evaluation_date(swap_date):
+        rolled = engine.rolled(1).price_fx_forwards(trades, theta_days=0)
+    assert rolled['npv'][0] == pytest.approx(rebuilt['npv'][0], abs=1e-12 * notional)
+
+
+def test_payment_dates_are_cached(swap_date):
+    payment_date.cache_clear()
+    start = _date(swap_date)
+    dates = [start + k for k in range(400)]
+    for _ in range(2):
+        serials = [payment_date(date.serialNumber(), 2, ql.ModifiedFollowing) for date in dates]
+    assert serials == [CALENDAR.advance(date, 2, ql.Days, ql.ModifiedFollowing).serialNumber() for date in dates]
+    info = payment_date.cache_info()
+    assert info.misses == len(dates) and info.hits == len(dates) and info.maxsize is not None
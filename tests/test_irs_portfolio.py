@@ -0,0 +1,99 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+
+import QuantLib as ql
+
+from quant_lib import irs_portfolio, swap_curve
+from quant_lib.irs_portfolio import SwapPortfolio, schedule
+
+
+@pytest.fixture
+def trades(swap_date):
+    # forward starting, so no coupon needs a past fixing
+    return [
+        dict(pricing_date=datetime.date(2021, 1, 9), maturity_date=datetime.date(2021, 4, 9), irs_rate=0.00218,
+             notional=1e6, position='long'),
+        dict(pricing_date=datetime.date(2020, 11, 16), maturity_date=datetime.date(2025, 11, 17), irs_rate=0.0035,
+             notional=2.5e7, position='short'),
+        dict(pricing_date=datetime.date(2021, 3, 1), maturity_date=datetime.date(2030, 3, 1), irs_rate=0.0071,
+             notional=1e7, position='long', spread=0.001),
+        dict(pricing_date=datetime.date(2020, 12, 31), maturity_date=datetime.date(2040, 12, 31), irs_rate=0.0102,
+             notional=5e6, position='short'),
+    ]
+
+
+@pytest.fixture
+def curve(swap_date):
+    return swap_curve.swap_curve(swap_date, swap_curve.get_quote(swap_date))
+
+
+def _notebook_swap(trade, curve):
+    # one trade as the IRS notebook prices it
+    calendar = ql.UnitedStates()
+    convention = ql.ModifiedPreceding
+    day_counter = ql.Actual360()
+    curve_handle = ql.YieldTermStructureHandle(curve)
+    float_index = ql.USDLibor(ql.Period(3, ql.Months), curve_handle)
+
+    start = ql.Date(trade['pricing_date'].day, trade['pricing_date'].month, trade['pricing_date'].year)
+    end = ql.Date(trade['maturity_date'].day, trade['maturity_date'].month, trade['maturity_date'].year)
+    fixed_schedule = ql.Schedule(start, end, ql.Period(1, ql.Years), calendar, convention, convention,
+                                 ql.DateGeneration.Backward, False)
+    floating_schedule = ql.Schedule(start, end, ql.Period(3, ql.Months), calendar, convention, convention,
+                                    ql.DateGeneration.Backward, False)
+    position = ql.VanillaSwap.Payer if trade['position'] == 'long' else ql.VanillaSwap.Receiver
+    irs = ql.VanillaSwap(position, trade['notional'], fixed_schedule, trade['irs_rate'], day_counter,
+                         floating_schedule, float_index, trade.get('spread', 0.0), day_counter)
+    irs.setPricingEngine(ql.DiscountingSwapEngine(curve_handle))
+    return irs
+
+
+def test_matches_notebook_swaps(trades, curve):
+    portfolio = SwapPortfolio(trades, curve)
+    swaps = [_notebook_swap(trade, curve) for trade in trades]
+    np.testing.assert_allclose(portfolio.npv(), [swap.NPV() for swap in swaps], rtol=0, atol=1e-8)
+    np.testing.assert_allclose(portfolio.fair_rate(), [swap.fairRate() for swap in swaps], rtol=0, atol=1e-8)
+    assert [swap.type() for swap in portfolio.swaps] == [swap.type() for swap in swaps]
+    assert {swap.type() for swap in swaps} == {ql.VanillaSwap.Payer, ql.VanillaSwap.Receiver}
+
+
+def test_accepts_a_frame(trades, curve):
+    frame = pd.DataFrame(trades).fillna({'spread': 0.0})
+    np.testing.assert_array_equal(SwapPortfolio(frame, curve).npv(), SwapPortfolio(trades, curve).npv())
+
+
+def test_relinks_to_another_curve(trades, curve, swap_date):
+    record = swap_curve.get_quote(swap_date)
+    bumped = swap_curve.swap_curve(swap_date, record.with_mids(record.mids + 0.01))
+    portfolio = SwapPortfolio(trades, curve)
+    np.testing.assert_allclose(portfolio.npv(bumped), SwapPortfolio(trades, bumped).npv(), rtol=0, atol=1e-8)
+    np.testing.assert_allclose(portfolio.npv(curve), [_notebook_swap(trade, curve).NPV() for trade in trades],
+                               rtol=0, atol=1e-8)
+
+
+def test_schedules_are_shared(trades, monkeypatch):
+    start, end = ql.Date(9, 1, 2021), ql.Date(9, 4, 2031)
+    calendar = ql.UnitedStates()
+    shared = schedule(start, end, ql.Period(1, ql.Years), calendar, ql.ModifiedPreceding)
+    assert schedule(start, end, ql.Period(1, ql.Years), ql.UnitedStates(), ql.ModifiedPreceding) is shared
+    assert schedule(start, end, ql.Period(3, ql.Months), calendar, ql.ModifiedPreceding) is not shared
+    assert schedule(start, end, ql.Period(1, ql.Years), ql.TARGET(), ql.ModifiedPreceding) is not shared
+
+    # a second portfolio over the same trades builds no schedule
+    monkeypatch.setattr(irs_portfolio, '_schedules', {})
+    SwapPortfolio(trades)
+    assert len(irs_portfolio._schedules) == 2 * len(trades)
+    SwapPortfolio(trades)
+    assert len(irs_portfolio._schedules) == 2 * len(trades)
+
+
+def test_schedule_cache_is_bounded(trades, monkeypatch):
+    monkeypatch.setattr(irs_portfolio, '_schedules', {})
+    monkeypatch.setattr(irs_portfolio, 'SCHEDULE_CACHE_SIZE', 5)
+    SwapPortfolio(trades[:2])
+    assert len(irs_portfolio._schedules) == 4
+    # the sixth schedule finds the cache full and starts it afresh, two more follow
+    SwapPortfolio(trades[2:])
+    assert len(irs_portfolio._schedules) == 3
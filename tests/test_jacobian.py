@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from quant_lib import swap_curve, cds_curve
+from quant_lib.cds_portfolio import CdsPortfolio, cs01_ladder
+from quant_lib.evaluation import evaluation_date
+from quant_lib.irs_portfolio import SwapPortfolio
+from quant_lib.jacobian import bootstrap_jacobian, jacobian_ladder
+from quant_lib.live_curve import LiveCurve
+from quant_lib.risk import key_rate_ladder
+from benchmarks.synthetic import swap_trades, cds_trades
+
+
+def _per_notional(values, trades):
+    # bootstraps converge to ~1e-12 in rate, so values compare per unit of notional
+    return values / np.array([trade['notional'] for trade in trades])[:, None]
+
+
+def test_swap_ladder_matches_central_differences(swap_date):
+    record = swap_curve.get_quote(swap_date)
+    trades = swap_trades(50, swap_date)
+    ladder = jacobian_ladder(trades, swap_curve.swap_curve, swap_date, record)
+
+    # the central difference is off by O(bump^2): halving the bump cuts the gap by four
+    errors = []
+    for basis_point in (1.0, 0.5):
+        bumped = key_rate_ladder(trades, swap_curve.swap_curve, swap_date, record, basis_point=basis_point,
+                                 central=True) / basis_point
+        assert list(ladder.columns) == list(bumped.columns)
+        errors.append(np.abs(_per_notional(ladder.values - bumped.values, trades)).max())
+    assert errors[0] < 2e-9
+    assert 3.0 < errors[0] / errors[1] < 5.0
+
+
+def test_cds_ladder_matches_central_differences(cds_date, discount_curve):
+    record = cds_curve.get_cds_quote(cds_date)
+    trades = cds_trades(50, cds_date)
+    ladder = jacobian_ladder(trades, cds_curve.cds_curve, cds_date, record, discount_curve,
+                             portfolio_class=CdsPortfolio)
+    bumped = cs01_ladder(trades, cds_curve.cds_curve, cds_date, record, discount_curve, central=True)
+
+    assert list(ladder.columns) == list(bumped.columns)
+    np.testing.assert_allclose(_per_notional(ladder.values, trades), _per_notional(bumped.values, trades),
+                               atol=2e-9)
+
+
+def test_node_jacobian_matches_rebootstrap(swap_date):
+    record = swap_curve.get_quote(swap_date)
+    jacobian = bootstrap_jacobian(swap_curve.swap_curve, swap_date, record)
+    node_jacobian = jacobian.node_jacobian()
+
+    live = LiveCurve(swap_curve.swap_curve, swap_date, record)
+    errors = []
+    with evaluation_date(swap_date):
+        for basis_point in (1.0, 0.5):
+            error = 0.0
+            for tenor in live.tenors:
+                with live.bumped(tenor, basis_point):
+                    up = np.array([rate for _, rate in live.curve.nodes()][1:])
+                with live.bumped(tenor, -basis_point):
+                    down = np.array([rate for _, rate in live.curve.nodes()][1:])
+                error = max(error, np.abs(node_jacobian[tenor].values - (up - down) / (2.0 * basis_point)).max())
+            errors.append(error)
+    # node changes are ~1e-4, the central difference is off by O(bump^2) as for the ladders
+    assert errors[0] < 2e-9
+    assert 3.0 < errors[0] / errors[1] < 5.0
+
+
+def test_portfolio_must_match_curve(swap_date):
+    jacobian = bootstrap_jacobian(swap_curve.swap_curve, swap_date, swap_curve.get_quote(swap_date))
+    with evaluation_date(swap_date):
+        with pytest.raises(TypeError):
+            jacobian.node_sensitivities(CdsPortfolio(cds_trades(2, swap_date), jacobian.curve))
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import QuantLib as ql
+
+from quant_lib import swap_curve, cds_curve
+from quant_lib.live_curve import LiveCurve
+
+
+@pytest.fixture
+def record(swap_date):
+    return swap_curve.get_quote(swap_date)
+
+
+def _dates(curve):
+    return [curve.referenceDate() + ql.Period(years, ql.Years) for years in (1, 2, 3, 5, 7, 10)]
+
+
+def _discounts(curve):
+    return np.array([curve.discount(date) for date in _dates(curve)])
+
+
+def test_update_matches_rebuild(record, swap_date):
+    live = LiveCurve(swap_curve.swap_curve, swap_date, record)
+    before = _discounts(live.curve)
+    tenors = {'3MO': -0.02, '5Y': 0.1}
+    live.update_many({tenor: live.value(tenor) + move for tenor, move in tenors.items()})
+
+    mids = record.mids.copy()
+    for tenor, move in tenors.items():
+        mids[list(record.tenors).index(tenor)] += move
+    rebuilt = swap_curve.swap_curve(swap_date, record.with_mids(mids))
+    # bootstraps converge to ~1e-12 in rate
+    np.testing.assert_allclose(_discounts(live.curve), _discounts(rebuilt), rtol=0, atol=1e-11)
+    assert not np.allclose(_discounts(live.curve), before, rtol=0, atol=1e-8)
+
+    with pytest.raises(KeyError):
+        live.update('99Y', 1.0)
+
+
+def test_update_hazard_curve(cds_date):
+    discount_curve = cds_curve.swap_curve(cds_date, cds_curve.get_irs_quote(cds_date))
+    quote = cds_curve.get_cds_quote(cds_date)
+    live = LiveCurve(cds_curve.cds_curve, cds_date, quote, discount_curve)
+    # spreads are quoted in bp
+    live.update('5Y', live.value('5Y') + 10.0)
+
+    mids = quote.mids.copy()
+    mids[list(quote.tenors).index('5Y')] += 10.0
+    rebuilt = cds_curve.cds_curve(cds_date, quote.with_mids(mids), discount_curve)
+    dates = _dates(rebuilt)
+    np.testing.assert_allclose([live.curve.survivalProbability(date) for date in dates],
+                               [rebuilt.survivalProbability(date) for date in dates], rtol=0, atol=1e-11)
+
+
+def test_snapshot_is_a_copy(record, swap_date):
+    live = LiveCurve(swap_curve.swap_curve, swap_date, record)
+    np.testing.assert_allclose(live.snapshot().mids, record.mids, rtol=1e-15)
+
+    k = list(record.tenors).index('10Y')
+    live.update('10Y', live.value('10Y') + 0.05)
+    snapshot = live.snapshot()
+    live.update('10Y', live.value('10Y') + 0.05)
+    assert snapshot.mids[k] == pytest.approx(record.mids[k] + 0.05, rel=1e-14)
+    assert live.value('10Y') == pytest.approx(record.mids[k] + 0.1, rel=1e-14)
+    np.testing.assert_allclose(np.delete(snapshot.mids, k), np.delete(record.mids, k), rtol=1e-15)
+
+
+def test_bumped_restores_quotes(record, swap_date):
+    live = LiveCurve(swap_curve.swap_curve, swap_date, record)
+    values, discounts = live.values(), _discounts(live.curve)
+
+    with live.bumped('5Y', 1.0):
+        assert live.value('5Y') == pytest.approx(values[live.tenors.index('5Y')] + 0.01)
+        assert not np.array_equal(_discounts(live.curve), discounts)
+    np.testing.assert_array_equal(live.values(), values)
+    # re-bootstrapped from the bumped solution, converged to ~1e-12
+    np.testing.assert_allclose(_discounts(live.curve), discounts, rtol=0, atol=1e-11)
+
+    with pytest.raises(RuntimeError):
+        with live.bumped('3MO', 1.0):
+            raise RuntimeError('pricing failed')
+    np.testing.assert_array_equal(live.values(), values)
+    np.testing.assert_allclose(_discounts(live.curve), discounts, rtol=0, atol=1e-11)
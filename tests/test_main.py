@@ -0,0 +1,25 @@
+import os
+import sys
+import subprocess
+
+from quant_lib.__main__ import HEAVY_MODULES, import_time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_core_import_leaves_heavy_modules_out():
+    # a generous budget, only what the fresh interpreter loaded is checked here
+    result = subprocess.run([sys.executable, '-m', 'quant_lib', 'import-time', '--repeat', '1', '--budget', '60'],
+                            cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'pulled in' not in result.stdout
+
+    _, heavy = import_time(repeat=1)
+    assert heavy == []
+    assert 'pandas' in HEAVY_MODULES
+
+
+def test_heavy_module_is_reported():
+    _, heavy = import_time(['quant_lib.swap_curve', 'pandas'], repeat=1)
+    assert heavy == ['pandas']
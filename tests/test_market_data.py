@@ -0,0 +1,54 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from quant_lib.market_data import MARKET_DATA_DIR, MarketDataStore, save_frame, load_frame
+
+
+WORKBOOKS = [('swap_data.xlsx', 0), ('cds_data.xlsx', 'USDIRS'), ('cds_data.xlsx', 'ROKCDS'),
+             ('fx_swap_data.xlsx', 'KRWCCS')]
+
+
+@pytest.mark.parametrize('workbook, sheet_name', WORKBOOKS)
+def test_frame_round_trip(tmp_path, workbook, sheet_name):
+    frame = pd.read_excel(os.path.join(MARKET_DATA_DIR, workbook), sheet_name=sheet_name)
+    path = str(tmp_path / 'frame.npz')
+    save_frame(frame, path)
+
+    with np.load(path, allow_pickle=False) as data:
+        assert all(data[name].dtype != object for name in data.files)
+    pd.testing.assert_frame_equal(load_frame(path), frame)
+
+
+def test_round_trip_keeps_missing_strings(tmp_path):
+    frame = pd.DataFrame({'Tenor': ['1Y', None, '10Y'], 'Market.Mid': [1.0, np.nan, 3.0]})
+    path = str(tmp_path / 'frame.npz')
+    save_frame(frame, path)
+    pd.testing.assert_frame_equal(load_frame(path), frame)
+
+
+def test_warm_load_skips_excel(tmp_path, monkeypatch):
+    path = os.path.join(MARKET_DATA_DIR, 'swap_data.xlsx')
+    cold = MarketDataStore(cache_dir=str(tmp_path)).read_sheet(path, index_col='Tenor')
+    assert len(os.listdir(tmp_path)) == 1
+
+    def read_excel(*args, **kwargs):
+        raise AssertionError("warm load parsed the workbook")
+
+    monkeypatch.setattr(pd, 'read_excel', read_excel)
+    warm = MarketDataStore(cache_dir=str(tmp_path)).read_sheet(path, index_col='Tenor')
+    pd.testing.assert_frame_equal(warm, cold)
+
+
+def test_corrupt_cache_is_rebuilt(tmp_path):
+    path = os.path.join(MARKET_DATA_DIR, 'swap_data.xlsx')
+    expected = MarketDataStore(cache_dir=str(tmp_path)).read_sheet(path)
+    cache_path = os.path.join(str(tmp_path), os.listdir(tmp_path)[0])
+    with open(cache_path, 'wb') as f:
+        f.write(b'not an npz file')
+
+    with pytest.warns(RuntimeWarning, match='discarding market data cache'):
+        frame = MarketDataStore(cache_dir=str(tmp_path)).read_sheet(path)
+    pd.testing.assert_frame_equal(frame, expected)
+    pd.testing.assert_frame_equal(load_frame(cache_path), expected)
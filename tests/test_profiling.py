@@ -0,0 +1,96 @@
+import json
+import datetime
+import warnings
+
+import QuantLib as ql
+
+from quant_lib import profiling, swap_curve
+from quant_lib.evaluation import evaluation_date
+
+
+def _curve(today):
+    return swap_curve.swap_curve(today, swap_curve.get_quote(today))
+
+
+def _names(tracer):
+    return [event['name'] for event in tracer.events]
+
+
+def test_tracing_off_leaves_curve_alone(swap_date):
+    with evaluation_date(swap_date):
+        curve = _curve(swap_date)
+    assert 'discount' not in vars(curve)
+
+
+def test_bootstrap_timed_on_first_use(swap_date):
+    with profiling.tracing() as tracer, evaluation_date(swap_date):
+        quotes = {}
+        curve = swap_curve.swap_curve(swap_date, swap_curve.get_quote(swap_date), quotes=quotes)
+        # building the curve does not bootstrap it
+        assert 'swap_curve.bootstrap' not in _names(tracer)
+
+        # a quote moved before first use is picked up by the one bootstrap
+        tenor = next(iter(quotes))
+        quotes[tenor].setValue(quotes[tenor].value() + 1e-4)
+        date = curve.referenceDate() + ql.Period(5, ql.Years)
+        discount = curve.discount(date)
+        curve.discount(date)
+        curve.nodes()
+
+    bootstraps = [event for event in tracer.events if event['name'] == 'swap_curve.bootstrap']
+    assert len(bootstraps) == 1
+    assert bootstraps[0]['fields']['nodes'] == len(curve.nodes())
+    assert not {'discount', 'nodes'} & set(vars(curve))
+
+    with evaluation_date(swap_date):
+        fresh_quotes = {}
+        fresh = swap_curve.swap_curve(swap_date, swap_curve.get_quote(swap_date), quotes=fresh_quotes)
+        fresh_quotes[tenor].setValue(fresh_quotes[tenor].value() + 1e-4)
+        assert discount == fresh.discount(date)
+
+
+def test_first_use_after_tracing(swap_date):
+    with profiling.tracing() as tracer, evaluation_date(swap_date):
+        curve = _curve(swap_date)
+    with evaluation_date(swap_date):
+        curve.discount(curve.referenceDate() + ql.Period(1, ql.Years))
+    # the tracer was gone by the time the curve bootstrapped
+    assert 'swap_curve.bootstrap' not in _names(tracer)
+    assert 'discount' not in vars(curve)
+
+
+def test_budgets_and_trace_files(tmp_path):
+    seen = []
+    with profiling.tracing(str(tmp_path / 'trace.json'), budgets={'stage.*': 0.0},
+                           on_budget=lambda *args: seen.append(args)) as tracer:
+        with profiling.span('stage.one', rows=3):
+            pass
+        profiling.traced('other')(lambda: None)()
+
+    assert [name for name, _, _ in seen] == ['stage.one']
+    assert [event['name'] for event in tracer.violations] == ['stage.one']
+    assert set(tracer.summary().index) == {'stage.one', 'other'}
+    with open(tmp_path / 'trace.json') as f:
+        trace = json.load(f)
+    assert [event['name'] for event in trace['traceEvents']] == ['stage.one', 'other']
+    assert trace['traceEvents'][0]['args'] == {'rows': 3}
+
+
+def test_default_budget_warning():
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        with profiling.tracing(budgets={'slow': 0.0}):
+            with profiling.span('slow'):
+                pass
+    assert [warning.category for warning in caught] == [profiling.LatencyWarning]
+
+
+def test_discount_factor_is_traced_quietly(swap_date, capsys):
+    from quant_lib.curve import discount_factor
+
+    with profiling.tracing() as tracer, evaluation_date(swap_date):
+        curve = _curve(swap_date)
+        discount = discount_factor(swap_date + datetime.timedelta(days=365), curve)
+    assert 0.0 < discount < 1.0
+    assert 'curve.discount_factor' in _names(tracer)
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,87 @@
+import os
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+
+from quant_lib import swap_curve, cds_curve
+from quant_lib.market_data import MARKET_DATA_DIR, read_sheet
+from quant_lib.quote import preprocess_quote
+
+
+def _baseline(frame, today):
+    # the notebooks' preprocessing, one row at a time
+    quote = frame.copy()
+    quote['DaysToMaturity'] = np.nan
+    quote['Maturity'] = pd.to_datetime(quote['Maturity']).dt.date
+    for tenor in quote.index:
+        quote.loc[tenor, 'DaysToMaturity'] = (quote.loc[tenor, 'Maturity'] - today).days
+    return quote
+
+
+@pytest.fixture
+def record(swap_date):
+    return swap_curve.get_quote(swap_date)
+
+
+@pytest.mark.parametrize('sheet', [('swap_data.xlsx', 0), ('cds_data.xlsx', 'USDIRS'), ('cds_data.xlsx', 'ROKCDS')])
+def test_matches_baseline_preprocessing(sheet, swap_date):
+    frame = read_sheet(os.path.join(MARKET_DATA_DIR, sheet[0]), sheet_name=sheet[1], index_col='Tenor')
+    expected = _baseline(frame, swap_date)
+    pd.testing.assert_frame_equal(preprocess_quote(frame, swap_date).to_frame(), expected,
+                                  check_dtype=False, check_index_type=False)
+
+
+def test_select_and_partition(record):
+    swaps = record.select('SWAP')
+    assert len(swaps) == (record.inst_types == 'SWAP').sum() > 0
+    assert (swaps.inst_types == 'SWAP').all()
+    np.testing.assert_array_equal(swaps.mids, record.mids[record.inst_types == 'SWAP'])
+    assert len(record.select('BOND')) == 0
+
+    parts = record.partition()
+    # first-seen order of the instrument types, every row in exactly one part
+    assert list(parts) == ['CASH', 'FUTURE', 'SWAP']
+    assert sum(len(part) for part in parts.values()) == len(record)
+    np.testing.assert_array_equal(np.concatenate([part.tenors for part in parts.values()]), record.tenors)
+
+
+def test_records_are_immutable(record):
+    with pytest.raises(ValueError):
+        record.mids[0] = 0.0
+
+    bumped = record.with_mids(record.mids + 0.01)
+    np.testing.assert_allclose(bumped.mids, record.mids + 0.01)
+    np.testing.assert_array_equal(bumped.tenors, record.tenors)
+    with pytest.raises(ValueError):
+        bumped.mids[0] = 0.0
+
+
+def test_rebase_keeps_maturities(record, swap_date):
+    assert record.rebase(swap_date) is record
+    later = swap_date + datetime.timedelta(days=10)
+    rebased = record.rebase(later)
+    assert rebased.reference_date == later
+    np.testing.assert_array_equal(rebased.maturities, record.maturities)
+    np.testing.assert_array_equal(rebased.days, record.days - 10)
+
+
+def test_basis_points(record, cds_date):
+    expected = {'CASH': 0.01, 'FUTURE': -0.01, 'SWAP': 0.01}
+    np.testing.assert_array_equal(record.basis_points(), [expected[inst_type] for inst_type in record.inst_types])
+
+    # CDS sheets have no InstType, spreads are already in bp
+    spreads = cds_curve.get_cds_quote(cds_date)
+    assert (spreads.inst_types == '').all()
+    np.testing.assert_array_equal(spreads.basis_points(), np.ones(len(spreads)))
+
+
+def test_fingerprint(record, swap_date):
+    # stable across loads, sensitive to the date and to every mid
+    assert record.fingerprint() == swap_curve.get_quote(swap_date).fingerprint()
+    assert record.fingerprint() == record.with_mids(record.mids.copy()).fingerprint()
+    assert record.fingerprint() != record.rebase(swap_date + datetime.timedelta(days=1)).fingerprint()
+
+    mids = record.mids.copy()
+    mids[-1] += 1e-10
+    assert record.fingerprint() != record.with_mids(mids).fingerprint()
@@ -0,0 +1,99 @@
+import datetime
+import dataclasses
+import numpy as np
+import pytest
+
+import QuantLib as ql
+
+from quant_lib import swap_curve
+from quant_lib.evaluation import evaluation_date, roll_down
+from quant_lib.irs_portfolio import SwapPortfolio
+from quant_lib.live_curve import LiveCurve
+from quant_lib.risk import key_rate_ladder, theta
+from benchmarks.synthetic import swap_trades
+
+
+@pytest.fixture
+def record(swap_date):
+    return swap_curve.get_quote(swap_date)
+
+
+@pytest.fixture
+def trades(swap_date):
+    return swap_trades(20, swap_date)
+
+
+def _per_notional(values, trades):
+    # bootstraps converge to ~1e-12 in rate, so values compare per unit of notional
+    return values / np.array([trade['notional'] for trade in trades])
+
+
+def _rebuilt_npv(trades, today, record):
+    with evaluation_date(today):
+        return SwapPortfolio(trades, swap_curve.swap_curve(today, record)).npv()
+
+
+@pytest.mark.parametrize('central', [False, True])
+def test_key_rate_ladder_matches_bump_and_rebuild(trades, swap_date, record, central):
+    ladder = key_rate_ladder(trades, swap_curve.swap_curve, swap_date, record, central=central)
+    base = _rebuilt_npv(trades, swap_date, record)
+    basis_points = dict(zip(record.tenors.tolist(), record.basis_points()))
+
+    for tenor in ladder.columns:
+        mids = record.mids.copy()
+        mids[record.tenors == tenor] += basis_points[tenor]
+        up = _rebuilt_npv(trades, swap_date, record.with_mids(mids))
+        if central:
+            mids[record.tenors == tenor] -= 2 * basis_points[tenor]
+            expected = (up - _rebuilt_npv(trades, swap_date, record.with_mids(mids))) / 2
+        else:
+            expected = up - base
+        np.testing.assert_allclose(_per_notional(ladder[tenor].values, trades), _per_notional(expected, trades),
+                                   rtol=0, atol=1e-11)
+
+
+def test_key_rate_ladder_pool_matches_serial(trades, swap_date, record):
+    serial = key_rate_ladder(trades, swap_curve.swap_curve, swap_date, record)
+    pooled = key_rate_ladder(trades, swap_curve.swap_curve, swap_date, record, max_workers=2)
+    assert list(pooled.columns) == list(serial.columns)
+    np.testing.assert_allclose(_per_notional(pooled.values.T, trades), _per_notional(serial.values.T, trades),
+                               rtol=0, atol=1e-11)
+
+
+def test_bumped_quote_is_restored(swap_date, record):
+    live = LiveCurve(swap_curve.swap_curve, swap_date, record)
+    before = live.values()
+    with live.bumped(live.tenors[5], 10.0):
+        assert live.value(live.tenors[5]) == pytest.approx(before[5] + 0.1)
+    np.testing.assert_array_equal(live.values(), before)
+
+
+def test_theta_matches_rebuild_at_next_day(trades, swap_date, record):
+    live = LiveCurve(swap_curve.swap_curve, swap_date, record, floating=True)
+    rolled = theta(SwapPortfolio(trades), live)
+
+    # same tenors one day later: the quote record keeps its day counts
+    tomorrow = swap_date + datetime.timedelta(days=1)
+    expected = _rebuilt_npv(trades, tomorrow, dataclasses.replace(record, reference_date=tomorrow)) - \
+        _rebuilt_npv(trades, swap_date, record)
+    np.testing.assert_allclose(_per_notional(rolled, trades), _per_notional(expected, trades), rtol=0, atol=1e-10)
+
+
+def test_theta_needs_floating_curve(trades, swap_date, record):
+    with pytest.raises(ValueError):
+        theta(SwapPortfolio(trades), LiveCurve(swap_curve.swap_curve, swap_date, record))
+
+
+def test_roll_down_prices_both_dates(swap_date):
+    seen = []
+
+    def value(date):
+        seen.append((date, ql.Settings.instance().evaluationDate))
+        return float(len(seen))
+
+    before = ql.Settings.instance().evaluationDate
+    assert roll_down(value, swap_date, days=3) == 1.0
+    tomorrow = swap_date + datetime.timedelta(days=3)
+    assert seen == [(swap_date, ql.Date(swap_date.day, swap_date.month, swap_date.year)),
+                    (tomorrow, ql.Date(tomorrow.day, tomorrow.month, tomorrow.year))]
+    assert ql.Settings.instance().evaluationDate == before
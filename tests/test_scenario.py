@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from quant_lib import scenario, swap_curve
+from quant_lib.evaluation import evaluation_date
+from quant_lib.irs_portfolio import SwapPortfolio
+from benchmarks.synthetic import swap_trades
+
+
+@pytest.fixture
+def record(swap_date):
+    return swap_curve.get_quote(swap_date)
+
+
+@pytest.fixture
+def trades(swap_date):
+    return swap_trades(10, swap_date)
+
+
+@pytest.fixture
+def shifts(record):
+    return np.vstack([scenario.parallel_shifts(record, [-25.0, 10.0]), scenario.twist_shifts(record, [15.0])])
+
+
+def _per_notional(values, trades):
+    # bootstraps converge to ~1e-12 in rate, so P&L compares per unit of notional
+    return values / np.array([trade['notional'] for trade in trades])
+
+
+def test_serial_matches_full_rebuild(trades, swap_date, record, shifts):
+    pnl = scenario.run_scenarios(trades, swap_curve.swap_curve, swap_date, record, shifts, max_workers=1)
+
+    with evaluation_date(swap_date):
+        base = SwapPortfolio(trades, swap_curve.swap_curve(swap_date, record)).npv()
+        for shift, row in zip(shifts, pnl):
+            curve = swap_curve.swap_curve(swap_date, record.with_mids(record.mids + shift))
+            expected = SwapPortfolio(trades, curve).npv() - base
+            np.testing.assert_allclose(_per_notional(row, trades), _per_notional(expected, trades),
+                                       rtol=0, atol=1e-11)
+    assert 'shm' not in scenario._worker
+
+
+def test_pool_matches_serial(trades, swap_date, record, shifts):
+    serial = scenario.run_scenarios(trades, swap_curve.swap_curve, swap_date, record, shifts, max_workers=1)
+    pooled = scenario.run_scenarios(trades, swap_curve.swap_curve, swap_date, record, shifts,
+                                    max_workers=2, block_size=1)
+    np.testing.assert_allclose(_per_notional(pooled, trades), _per_notional(serial, trades), rtol=0, atol=1e-11)
+
+
+def test_value_at_risk_and_shortfall():
+    pnl = np.arange(-50.0, 50.0).reshape(100, 1)
+    assert scenario.value_at_risk(pnl, level=0.95) == pytest.approx(-np.quantile(pnl, 0.05))
+    assert scenario.expected_shortfall(pnl, level=0.95) == pytest.approx(48.0)
+
+
+def test_twist_pivot_inside_the_curve(record):
+    years = record.days / 365.0
+    weights = scenario.twist_shifts(record, [1.0])[0] / record.basis_points()
+    assert weights[np.argmax(years)] == 1.0
+    assert np.all(weights[years <= 5.0] <= 0.0)
+
+    with pytest.raises(ValueError):
+        scenario.twist_shifts(record, [1.0], pivot_years=years.max())
+    with pytest.raises(ValueError):
+        scenario.twist_shifts(record, [1.0], pivot_years=100.0)
@@ -0,0 +1,167 @@
+import asyncio
+import datetime
+import numpy as np
+import pytest
+
+from quant_lib import server, swap_curve
+from quant_lib.cds_portfolio import CdsPortfolio
+from quant_lib.curve_cache import CurveRegistry
+from quant_lib.evaluation import evaluation_date
+from quant_lib.fx_swap_curve import CrossCurrencyEngine
+from quant_lib.irs_portfolio import SwapPortfolio
+from quant_lib.live_curve import LiveCurve
+from quant_lib.server import PricingClient, PricingError, PricingServer
+from benchmarks.synthetic import swap_trades, cds_trades
+
+
+FX_SPOT = 1100.0
+
+
+def _json(trades):
+    return [{key: value.isoformat() if isinstance(value, datetime.date) else value
+             for key, value in trade.items()} for trade in trades]
+
+
+def _column(rows, name):
+    return np.array([row[name] for row in rows])
+
+
+def _per_notional(values, trades):
+    # a live curve re-bootstraps from its last solution, converged to ~1e-12 in rate
+    return values / np.array([trade['notional'] for trade in trades])
+
+
+@pytest.fixture(scope='module')
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope='module')
+def running(loop, cds_date):
+    # one server with two worker processes for the module, on a free port
+    pricing = loop.run_until_complete(PricingServer(cds_date, fx_spot=FX_SPOT, max_workers=2).start(port=0))
+    host, port = pricing.address[:2]
+    client = loop.run_until_complete(PricingClient.connect(host, port))
+    yield pricing, client
+    loop.run_until_complete(client.close())
+    loop.run_until_complete(pricing.close())
+
+
+def test_irs_matches_portfolio(loop, running, cds_date):
+    _, client = running
+    trades = swap_trades(20, cds_date)
+    rows = loop.run_until_complete(client.price('irs', _json(trades)))
+
+    with evaluation_date(cds_date):
+        portfolio = SwapPortfolio(trades, swap_curve.swap_curve(cds_date, swap_curve.get_quote(cds_date)))
+        np.testing.assert_allclose(_column(rows, 'npv'), portfolio.npv(), rtol=1e-12, atol=1e-6)
+        np.testing.assert_allclose(_column(rows, 'fair_rate'), portfolio.fair_rate(), rtol=1e-12)
+
+
+def test_cds_matches_portfolio(loop, running, cds_date, discount_curve, hazard_curve):
+    _, client = running
+    trades = cds_trades(10, cds_date)
+    rows = loop.run_until_complete(client.price('cds', _json(trades)))
+
+    with evaluation_date(cds_date):
+        portfolio = CdsPortfolio(trades, hazard_curve, discount_curve)
+        np.testing.assert_allclose(_column(rows, 'npv'), portfolio.npv(), rtol=1e-12, atol=1e-6)
+        np.testing.assert_allclose(_column(rows, 'fair_spread'), portfolio.fair_spread(), rtol=1e-12)
+
+
+def test_fx_forward_matches_engine(loop, running, cds_date):
+    _, client = running
+    trades = [dict(maturity_date=cds_date + datetime.timedelta(days=days), fx_forward=1090.0 + days / 100,
+                   usd_notional=1e6 * (k + 1), position='long' if k % 2 else 'short')
+              for k, days in enumerate([30, 180, 365, 1000])]
+    rows = loop.run_until_complete(client.price('fx_forward', _json(trades)))
+
+    with evaluation_date(cds_date):
+        frame = CrossCurrencyEngine(cds_date, FX_SPOT, registry=CurveRegistry()).price_fx_forwards(trades, theta_days=0)
+    for column in ('npv', 'fx_delta', 'usd_ir_delta', 'krw_ir_delta'):
+        np.testing.assert_allclose(_column(rows, column), frame[column].values, rtol=1e-12, atol=1e-6)
+
+
+def test_update_moves_next_price(loop, running, cds_date):
+    pricing, client = running
+    trades = swap_trades(5, cds_date)
+    before = _column(loop.run_until_complete(client.price('irs', _json(trades))), 'npv')
+
+    original = pricing.quotes['swap']['5Y']
+    versions = loop.run_until_complete(client.update('swap', {'5Y': original + 0.1}))
+    try:
+        assert versions == {'swap': pricing.versions['swap']}
+        # every worker has to catch up, whichever one prices the next batches
+        for _ in range(4):
+            after = _column(loop.run_until_complete(client.price('irs', _json(trades))), 'npv')
+            with evaluation_date(cds_date):
+                live = LiveCurve(swap_curve.swap_curve, cds_date, swap_curve.get_quote(cds_date))
+                live.update('5Y', original + 0.1)
+                expected = SwapPortfolio(trades, live.curve).npv()
+            assert not np.allclose(after, before)
+            np.testing.assert_allclose(_per_notional(after, trades), _per_notional(expected, trades), atol=1e-11)
+    finally:
+        loop.run_until_complete(client.update('swap', {'5Y': original}))
+    restored = _column(loop.run_until_complete(client.price('irs', _json(trades))), 'npv')
+    np.testing.assert_allclose(_per_notional(restored, trades), _per_notional(before, trades), atol=1e-11)
+
+
+def test_bad_trade_fails_alone(loop, running, cds_date):
+    _, client = running
+    trades = _json(swap_trades(6, cds_date))
+    broken = {'pricing_date': trades[0]['pricing_date']}
+
+    async def batch():
+        return await asyncio.gather(*[client.price('irs', [trade]) for trade in trades[:3]],
+                                    client.price('irs', [broken]),
+                                    *[client.price('irs', [trade]) for trade in trades[3:]],
+                                    return_exceptions=True)
+
+    results = loop.run_until_complete(batch())
+    assert isinstance(results[3], PricingError)
+    good = [result for k, result in enumerate(results) if k != 3]
+    assert all(isinstance(rows, list) and len(rows) == 1 for rows in good)
+
+    with pytest.raises(PricingError):
+        loop.run_until_complete(client.price('swaption', trades))
+    with pytest.raises(PricingError):
+        loop.run_until_complete(client.update('swap', {'99Y': 1.0}))
+
+
+def test_only_quote_changes_are_shipped(cds_date):
+    async def run():
+        pricing = await PricingServer(cds_date, max_workers=0).start(port=0)
+        try:
+            assert pricing._state() == {}
+            pricing.update('swap', {'5Y': pricing.quotes['swap']['5Y'] + 0.1})
+            pricing.update('swap', {'7Y': pricing.quotes['swap']['7Y'] + 0.1})
+            assert pricing._state() == {'swap': (2, 0, {'5Y': pricing.quotes['swap']['5Y'],
+                                                        '7Y': pricing.quotes['swap']['7Y']})}
+
+            await pricing.price('irs', swap_trades(1, cds_date))
+            # the worker is at version 2, there is nothing left to send
+            assert pricing._state() == {}
+            assert server._worker['curves']['swap'][1] == 2
+        finally:
+            await pricing.close()
+
+    asyncio.run(run())
+
+
+def test_close_fails_queued_requests(cds_date):
+    async def run():
+        pricing = await PricingServer(cds_date, max_workers=0).start(port=0)
+        trades = swap_trades(1, cds_date)
+        requests = [asyncio.ensure_future(pricing.price('irs', trades)) for _ in range(5)]
+        await asyncio.sleep(0)
+        await pricing.close()
+
+        results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 5.0)
+        assert all(isinstance(result, (list, ConnectionError)) for result in results)
+        assert any(isinstance(result, ConnectionError) for result in results)
+        with pytest.raises(ConnectionError):
+            await pricing.price('irs', trades)
+
+    asyncio.run(run())